@@ -1,9 +1,40 @@
-from flask import Flask, render_template, request, jsonify
-from preflop_range_calculator import generate_two_card_hands, group_hands, calculate_top_range_str, ungroup_hands
-from deck_of_cards import Deck, convert_card_list_str
+from typing import List, Optional, Tuple
+import atexit
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import threading
+from flask import Flask, Response, render_template, request, jsonify
+from preflop_range_calculator import generate_two_card_hands, group_hands, top_range_groups, top_weighted_range, ungroup_hands
+from deck_of_cards import Board, Card, Deck, Player, convert_card_list_str, convert_str_card_list, cards_to_ints, cards_to_mask
+from poker_calculator import counts_to_percentages, simulate_counts, stream_win_tie_loss
+from range_equity import range_combos, hand_combos
+from hand_range import WeightedRange
+from equity_service import EquityBatcher, runouts_for_error
+from instrumentation import METRICS, prometheus_text
 
 app = Flask(__name__)
 
+# Equity engine, started once with the app: the evaluator tables are loaded on import,
+# the batcher coalesces heads up requests and the process pool, started on the first
+# multiway request, runs multiway simulations
+ENGINE_BATCHER = EquityBatcher()
+_engine_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+_engine_pool_lock = threading.Lock()
+
+def engine_pool() -> concurrent.futures.ProcessPoolExecutor:
+    # Workers come from a fork server or are spawned, forking this process would copy it mid way through
+    # the batcher thread's work
+    global _engine_pool
+    with _engine_pool_lock:
+        if _engine_pool is None:
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _engine_pool = concurrent.futures.ProcessPoolExecutor(os.cpu_count() or 1,
+                                                                  mp_context=multiprocessing.get_context(start_method))
+            atexit.register(_engine_pool.shutdown)
+        return _engine_pool
+
 # Define the route for the index page
 @app.route('/')
 def index():
@@ -24,7 +55,10 @@ def sort_cells():
   selected_cells = data.get("selected_cells", [])
 
   # Call the group_hands function to sort the selected cells
-  sorted_cells = group_hands(selected_cells)
+  try:
+    sorted_cells = group_hands(selected_cells)
+  except (ValueError, TypeError) as error:
+    return jsonify({"error": str(error)}), 400
 
   # Return the sorted result as JSON
   return jsonify({"sorted_cells": sorted_cells})
@@ -34,11 +68,13 @@ def calculate_top_range():
     data = request.get_json()
     percentage = data.get("percentage", 0)
 
-    # Call the calculate_top_range_str function to calculate the top range
-    calculated_hands = group_hands(calculate_top_range_str(int(percentage)))
+    # Grouped top range, memoized per percentage
+    calculated_hands = top_range_groups(int(percentage))
+    # The same range filled to the exact percentage, the last class at a partial weight
+    weighted_range = str(top_weighted_range(float(percentage)))
 
     # Return the calculated result as JSON
-    return jsonify({"calculated_hands": calculated_hands})
+    return jsonify({"calculated_hands": calculated_hands, "weighted_range": weighted_range})
 
 @app.route('/ungroup-hands', methods=['POST'])
 def ungroup_sort_hands():
@@ -46,10 +82,93 @@ def ungroup_sort_hands():
   selected_cells = data.get("selected_cells", [])
 
   # Call the group_hands function to sort the selected cells
-  ungrouped_cells = ungroup_hands(selected_cells)
+  try:
+    ungrouped_cells = ungroup_hands(selected_cells)
+  except (ValueError, TypeError) as error:
+    return jsonify({"error": str(error)}), 400
 
   # Return the sorted result as JSON
   return jsonify({"sorted_cells": ungrouped_cells})
 
+def parse_cards(card_strs: str) -> List[Card]:
+    # Comma separated cards as on the calculator page, ex: "JS,4C,2D"
+    return convert_str_card_list([card_str for card_str in card_strs.split(",") if card_str])
+
+def check_spot(board: Board, hands: List[List[Card]], dead_cards: List[Card] = ()) -> None:
+    # Every equity route's spot: a 0, 3, 4 or 5 card board, at least 2 players with 2 cards or none
+    # (a random hand or a range) and no card used twice
+    if len(board.board) not in (0, 3, 4, 5):
+        raise ValueError("The board needs 0, 3, 4 or 5 cards")
+    if len(hands) < 2 or any(len(hand) not in (0, 2) for hand in hands):
+        raise ValueError("Give at least 2 players, each with a 2 card hand or no cards")
+    cards = board.board + list(dead_cards) + [card for hand in hands for card in hand]
+    if len(set(cards)) != len(cards):
+        raise ValueError("A card can only be used once")
+
+def parse_spot(board_str: str, hand_strs: List[str]) -> Tuple[Board, List[Player]]:
+    board = Board(parse_cards(board_str))
+    hands = [parse_cards(hand_str) for hand_str in hand_strs]
+    check_spot(board, hands)
+    return board, [Player(f"Player {i + 1}", hand) for i, hand in enumerate(hands)]
+
+@app.route('/equity/stream')
+def equity_stream():
+  try:
+    board, players = parse_spot(request.args.get("board", ""), request.args.getlist("hand"))
+    target_error = float(request.args.get("target_error", 0.5))
+    time_budget = float(request.args.get("time_budget", 5))
+  except ValueError as error:
+    return jsonify({"error": str(error)}), 400
+
+  # Server sent events, one running estimate per batch
+  def generate():
+    for win_tie_loss, errors, trials in stream_win_tie_loss(board, players, target_error, time_budget):
+      yield f"data: {json.dumps({'win_tie_loss': win_tie_loss, 'errors': errors, 'trials': trials})}\n\n"
+    yield "event: done\ndata: {}\n\n"
+
+  return Response(generate(), mimetype='text/event-stream')
+
+@app.route('/equity', methods=['POST'])
+def equity():
+  try:
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+      raise ValueError("Send a JSON object with the board and players")
+    board = Board(convert_str_card_list(data.get("board", [])))
+    dead_cards = convert_str_card_list(data.get("dead_cards", []))
+    players = data.get("players", [])
+    if not isinstance(players, list) or not all(isinstance(player, dict) for player in players):
+      raise ValueError("players needs to be a list of objects with a hand or a range")
+    target_error = float(data.get("target_error", 0.5))
+    # A player without a hand plays their range
+    hands = [convert_str_card_list(player.get("hand", [])) for player in players]
+    check_spot(board, hands, dead_cards)
+    if target_error <= 0:
+      raise ValueError("target_error must be positive")
+
+    dead_mask = cards_to_mask(cards_to_ints(dead_cards))
+    n = runouts_for_error(target_error)
+    if len(players) == 2:
+      combos = [hand_combos(cards_to_ints(hand)) if hand else range_combos(player.get("range", []))
+                for hand, player in zip(hands, players)]
+      win, tie, loss = ENGINE_BATCHER.submit(combos[0], combos[1], tuple(board.board_ints()), dead_mask, n).result()
+      win_tie_loss = {"Player 1": (win, tie, loss), "Player 2": (loss, tie, win)}
+    else:
+      # Multiway ranges are sampled combo by combo by weight
+      ranges = {f"Player {i + 1}": WeightedRange.parse(player.get("range", []))
+                for i, (hand, player) in enumerate(zip(hands, players)) if not hand}
+      players = [Player(f"Player {i + 1}", hand) for i, hand in enumerate(hands)]
+      counts = simulate_counts(board, players, n=n, executor=engine_pool(), dead_cards=dead_cards, ranges=ranges)
+      win_tie_loss = {player.name: percentages for player, percentages in zip(players, counts_to_percentages(counts))}
+  except (ValueError, KeyError, IndexError, TypeError) as error:
+    return jsonify({"error": str(error)}), 400
+
+  return jsonify({"win_tie_loss": win_tie_loss})
+
+@app.route('/metrics')
+def metrics():
+  # Prometheus scrape target, counters stay at 0 unless instrumentation is enabled (POKER_METRICS=1)
+  return Response(prometheus_text(METRICS.stats()), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     app.run()
\ No newline at end of file
@@ -0,0 +1,224 @@
+from typing import Callable, Dict, List, Optional, Tuple
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import numpy as np
+from deck_of_cards import CARDS, convert_card_list_str
+from evaluate_poker_hand import evaluate_five_card_hand, evaluate_hand, evaluate_ints, evaluate_hand_batch
+from poker_calculator import run_trials
+from preflop_range_calculator import calculate_top_range_str, group_hands, ungroup_hands
+
+# Benchmark suite
+#
+# Every benchmark does a fixed, seeded amount of work per call and is timed over repeated
+# calls; its result is the work rate (hands evaluated, trials simulated, calls made per
+# second). Results are written as JSON and compared against BASELINE_PATH, a benchmark
+# slower than the baseline by more than the tolerance fails the run. Run with
+#   python benchmark.py --output results.json
+# and refresh the baseline after an intended change with --save-baseline.
+
+BENCHMARK_VERSION = 1
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'benchmark_baseline.json')
+SEED = 0
+
+# A benchmark returns the function to time, the work done per call and the unit of work
+Benchmark = Callable[[], Tuple[Callable[[], object], int, str]]
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+def benchmark(name: str) -> Callable[[Benchmark], Benchmark]:
+    """Register a benchmark under name"""
+    def register(setup: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+def _sample_hands(num_hands: int, num_cards: int) -> List[List[int]]:
+    rng = random.Random(SEED)
+    return [rng.sample(range(52), num_cards) for _ in range(num_hands)]
+
+@benchmark("evaluate_five_card_hand")
+def bench_evaluate_five_card_hand():
+    hands = [[CARDS[i] for i in hand] for hand in _sample_hands(1000, 5)]
+    return lambda: [evaluate_five_card_hand(hand) for hand in hands], len(hands), "hands"
+
+@benchmark("evaluate_hand")
+def bench_evaluate_hand():
+    hands = [[CARDS[i] for i in hand] for hand in _sample_hands(1000, 7)]
+    return lambda: [evaluate_hand(hand[2:], hand[:2]) for hand in hands], len(hands), "hands"
+
+@benchmark("evaluate_ints")
+def bench_evaluate_ints():
+    hands = _sample_hands(1000, 7)
+    return lambda: [evaluate_ints(hand) for hand in hands], len(hands), "hands"
+
+@benchmark("evaluate_hand_batch")
+def bench_evaluate_hand_batch():
+    hands = np.array(_sample_hands(100000, 7), dtype=np.int64)
+    return lambda: evaluate_hand_batch(hands), len(hands), "hands"
+
+# Simulations of a spot on each street, heads up and 6 way, every hand known
+_HEADS_UP = [[51, 46], [40, 37]] # AsKh vs QcJd
+_SIX_WAY = [[51, 46], [40, 37], [35, 34], [23, 19], [28, 25], [1, 5]] # and ThTs, 6s7s, 8d9c, 2d3d
+_BOARDS = {"preflop": [], "flop": [36, 9, 0], "turn": [36, 9, 0, 50], "river": [36, 9, 0, 50, 22]} # Jc4d2c Ah 7h
+
+def _simulation(hands: List[List[int]], board_ints: List[int]) -> Benchmark:
+    used = [card for hand in hands for card in hand] + board_ints
+    if len(set(used)) != len(used):
+        raise ValueError(f"The board {board_ints} and the hands {hands} share a card")
+
+    def setup():
+        return lambda: run_trials(board_ints, hands, 5000, seed=SEED), 5000, "trials"
+    return setup
+
+for _street, _board in _BOARDS.items():
+    benchmark(f"simulate_heads_up_{_street}")(_simulation(_HEADS_UP, _board))
+    benchmark(f"simulate_six_way_{_street}")(_simulation(_SIX_WAY, _board))
+
+@benchmark("calculate_top_range_str")
+def bench_calculate_top_range_str():
+    return lambda: calculate_top_range_str(20), 1, "calls"
+
+@benchmark("group_hands")
+def bench_group_hands():
+    hands = calculate_top_range_str(30)
+    return lambda: group_hands(hands), 1, "calls"
+
+@benchmark("ungroup_hands")
+def bench_ungroup_hands():
+    groups = group_hands(calculate_top_range_str(30))
+    return lambda: ungroup_hands(groups), 1, "calls"
+
+def _endpoint(method: str, path: str, payload: Optional[dict] = None, clear_caches: bool = False) -> Benchmark:
+    def setup():
+        from app import app
+        from equity_cache import EQUITY_CACHE
+        from range_equity import RUNOUT_CACHE
+        client = app.test_client()
+
+        def request():
+            # Cold engine caches so the request does its work instead of a cache hit
+            if clear_caches:
+                EQUITY_CACHE.clear()
+                RUNOUT_CACHE.clear()
+            response = client.open(path, method=method, json=payload)
+            assert response.status_code == 200, response.get_data(as_text=True)
+        return request, 1, "requests"
+    return setup
+
+benchmark("endpoint_calculate")(_endpoint("GET", "/calculate"))
+benchmark("endpoint_calculate_top_range")(_endpoint("POST", "/calculate-top-range", {"percentage": 20}))
+benchmark("endpoint_ungroup_hands")(_endpoint("POST", "/ungroup-hands", {"selected_cells": ["22+", "A2s+", "KTo+"]}))
+benchmark("endpoint_equity_heads_up")(_endpoint(
+    "POST", "/equity", {"board": ["JS", "4C", "2D"], "players": [{"range": ["TT+", "AQs+"]}, {"hand": ["QD", "JC"]}]},
+    clear_caches=True))
+benchmark("endpoint_equity_multiway")(_endpoint(
+    "POST", "/equity", {"board": ["JS", "4C", "2D"], "target_error": 1,
+                        "players": [{"hand": convert_card_list_str([CARDS[i] for i in hand])} for hand in _SIX_WAY[:3]]},
+    clear_caches=True))
+
+def run_benchmark(setup: Benchmark, min_time: float = 0.5, min_repeats: int = 3) -> Dict[str, float]:
+    """Time one benchmark
+
+    Args:
+        setup (Benchmark): registered benchmark
+        min_time (float): seconds to keep repeating the call for
+        min_repeats (int): calls to time at least
+
+    Returns:
+        Dict[str, float]: unit, median work rate per second and median seconds per call
+    """
+    function, work, unit = setup()
+    function() # Warm up caches and lazily loaded tables
+
+    timings = []
+    start_time = time.perf_counter()
+    while len(timings) < min_repeats or time.perf_counter() - start_time < min_time:
+        call_start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - call_start)
+
+    seconds_per_call = statistics.median(timings)
+    return {"unit": unit, "ops_per_sec": round(work / seconds_per_call, 1), "seconds_per_call": seconds_per_call,
+            "repeats": len(timings)}
+
+def run_benchmarks(name_filter: str = "", min_time: float = 0.5) -> dict:
+    """Run every registered benchmark whose name contains name_filter
+
+    Returns:
+        dict: JSON ready report with the environment and each benchmark's result
+    """
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if name_filter in name:
+            results[name] = run_benchmark(setup, min_time)
+    return {"benchmark_version": BENCHMARK_VERSION, "python": platform.python_version(),
+            "machine": platform.machine(), "seed": SEED, "results": results}
+
+def compare_results(report: dict, baseline: dict, tolerance: float = 0.3) -> List[str]:
+    """Find the benchmarks that got slower than the baseline
+
+    Args:
+        report (dict): report from run_benchmarks
+        baseline (dict): earlier report to compare with
+        tolerance (float): allowed slowdown, 0.3 fails a benchmark running under 70% of its baseline rate
+
+    Returns:
+        List[str]: a message for each regression, empty when there are none
+    """
+    regressions = []
+    for name, result in report["results"].items():
+        baseline_result = baseline.get("results", {}).get(name)
+        if baseline_result is None:
+            continue
+        ratio = result["ops_per_sec"] / baseline_result["ops_per_sec"]
+        if ratio < 1 - tolerance:
+            regressions.append(f"{name}: {result['ops_per_sec']:.1f} {result['unit']}/s is {ratio:.0%} "
+                               f"of the baseline {baseline_result['ops_per_sec']:.1f} {result['unit']}/s")
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the evaluator, simulator, range utilities and endpoints")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds to time each benchmark for")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed slowdown against the baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.filter, args.min_time)
+    for name, result in report["results"].items():
+        print(f"{name:40} {result['ops_per_sec']:>14,.1f} {result['unit']}/s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        # Keep the baseline of benchmarks that weren't run this time
+        previous_results = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                previous_results = json.load(f).get("results", {})
+        baseline = dict(report, results={**previous_results, **report["results"]})
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Saved {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, save one with --save-baseline")
+        return 0
+    with open(args.baseline) as f:
+        regressions = compare_results(report, json.load(f), args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
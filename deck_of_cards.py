@@ -1,12 +1,15 @@
 # Deck of Cards
 
 import random
-from typing import List
+from itertools import permutations
+from typing import Iterable, List, Optional, Tuple
 
 suits = ['Club', 'Diamond', 'Heart',  'Spade']
 ranks = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']
 
 class Card:
+    __slots__ = ('value', 'suit')
+
     def __init__(self, value, suit):
         self.value = value
         self.suit = suit
@@ -28,6 +31,8 @@ class Card:
 class Deck:
     def __init__(self):
         self.cards: List[Card] = []
+        # Bit i set while card int i is in the deck, so membership and removal are bit operations
+        self.mask = 0
         self.build()
 
     # Build a 52 unique card deck
@@ -35,43 +40,69 @@ class Deck:
         for value in ranks:
             for suit in suits:
                 self.cards.append(Card(value,suit))
+        self.mask = FULL_DECK_MASK
     
     # Shuffle the deck using Fisher-Yates/Knuth shuffle algorithm
-    def shuffle(self):
+    def shuffle(self, rng: random.Random = random):
         n = len(self.cards)
         for i in range(n - 1, 0, -1):
-            j = random.randrange(i + 1)
+            j = rng.randrange(i + 1)
             self.cards[i], self.cards[j] = self.cards[j], self.cards[i]
 
     # Return the top Card of the deck and remove it from the deck
     def draw_card(self) -> Card:
-        return self.cards.pop()
+        card = self.cards.pop()
+        i = card_index(card)
+        if i >= 0:
+            self.mask &= ~(1 << i)
+        return card
     
     # Remove List of cards from deck
     def remove_cards(self, removal:List[Card]):
-        self.cards = [card for card in self.cards if card not in removal]
+        self.remove_mask(cards_to_mask(i for i in map(card_index, removal) if i >= 0))
+
+    def remove_mask(self, removal_mask: int):
+        """Remove every card int set in removal_mask, ex: dead cards from cards_to_mask"""
+        if removal_mask:
+            self.cards = [card for card in self.cards if not (removal_mask >> card_index(card)) & 1]
+            self.mask &= ~removal_mask
     
     # Check if a card with the given value and suit exists in the deck
     def has_card(self, card: Card) -> bool:
-        for c in self.cards:
-            if c.value == card.value and c.suit == card.suit:
-                return True
-        return False
+        i = card_index(card)
+        return i >= 0 and (self.mask >> i) & 1 == 1
+
+    def remaining_ints(self) -> List[int]:
+        """Card ints left in the deck in increasing order"""
+        return mask_to_ints(self.mask)
     
     def copy(self) -> 'Deck':
         """Create a copy of the deck object."""
-        new_deck = Deck()
+        new_deck = Deck.__new__(Deck)
         new_deck.cards = self.cards.copy()
+        new_deck.mask = self.mask
         return new_deck
 
+    def to_ints(self) -> List[int]:
+        return cards_to_ints(self.cards)
+
+    @classmethod
+    def from_ints(cls, card_ints: List[int]) -> 'Deck':
+        """Create a deck holding only the given cards, in order."""
+        deck = cls.__new__(cls)
+        deck.cards = ints_to_cards(card_ints)
+        deck.mask = cards_to_mask(card_ints)
+        return deck
+
     def display(self):
         for c in self.cards:
             c.display()
 
 class Player:
-    def __init__(self, name, hand:List[Card]=[], money=0):
+    def __init__(self, name, hand:Optional[List[Card]]=None, money=0):
         self.name = name
-        self.hand = hand
+        # A new list per player, a shared default would collect every player's drawn cards
+        self.hand = hand if hand is not None else []
         self.money = money
 
     # Add a Card from the deck to the Player's hand
@@ -82,6 +113,9 @@ class Player:
     def __iter__(self):
         return iter(self.hand)
 
+    def hand_ints(self) -> List[int]:
+        return cards_to_ints(self.hand)
+
     def display_hand(self) -> str:
         hand_string = ""
         for card in self.hand:
@@ -89,8 +123,8 @@ class Player:
         return hand_string.rstrip(", ")
 
 class Board:
-    def __init__(self, board: List[Card]=[]):
-        self.board = board
+    def __init__(self, board: Optional[List[Card]]=None):
+        self.board = board if board is not None else []
         
     # Change 1 card on board based on position number 1-5
     def change_card_pos(self, pos, newCard):
@@ -107,6 +141,9 @@ class Board:
     def display(self):
         card_strings = [card.display() for card in self.board]
         return ', '.join(card_strings)
+
+    def board_ints(self) -> List[int]:
+        return cards_to_ints(self.board)
     
 def deal_flop(deck: Deck) -> List[Card]:
     flop = deal_cards(3, deck)
@@ -128,3 +165,101 @@ def convert_card_list_str(cards: List[Card], full_suit = False):
             result.append(card.value + card.suit[0])
     return result
 
+def convert_str_card_list(card_strs: List[str]) -> List[Card]:
+    """Inverse of convert_card_list_str, raises ValueError for strings that aren't a card"""
+    return [CARDS[str_to_int(card_str)] for card_str in card_strs]
+
+
+
+# Integer card encoding
+#
+# Every card is an int 0-51: rank index * 4 + suit index, the same order Deck.build
+# uses, so Deck().to_ints() == list(range(52)). A set of cards is a 52 bit mask
+# with bit i set for card i.
+
+RANK_INDEX = {rank: i for i, rank in enumerate(ranks)}
+SUIT_INDEX = {suit[0]: i for i, suit in enumerate(suits)} # Keyed by first letter: 'C', 'D', 'H', 'S'
+
+CARDS = tuple(Card(value, suit) for value in ranks for suit in suits)
+FULL_DECK_MASK = (1 << 52) - 1
+CARD_STRS = tuple(value + suit[0] for value in ranks for suit in suits)
+CARD_STR_INDEX = {card_str: i for i, card_str in enumerate(CARD_STRS)}
+
+def card_to_int(card: Card) -> int:
+    """Convert a Card to its 0-51 index
+
+    Args:
+        card (Card): Card with a value from ranks and a suit from suits
+
+    Raises:
+        ValueError: If the card is not one of the 52 cards of the deck
+
+    Returns:
+        int: Card index, rank index * 4 + suit index
+    """
+    try:
+        return RANK_INDEX[card.value] * 4 + SUIT_INDEX[card.suit[0]]
+    except (KeyError, IndexError):
+        raise ValueError(f"Not a card in the deck: {card.value} of {card.suit}") from None
+
+def card_index(card: Card) -> int:
+    """card_to_int that returns -1 instead of raising for a card that isn't in the deck"""
+    rank_index = RANK_INDEX.get(card.value)
+    suit_index = SUIT_INDEX.get(card.suit[:1])
+    if rank_index is None or suit_index is None:
+        return -1
+    return rank_index * 4 + suit_index
+
+def int_to_card(card_int: int) -> Card:
+    return CARDS[card_int]
+
+def cards_to_ints(cards: List[Card]) -> List[int]:
+    return [card_to_int(card) for card in cards]
+
+def ints_to_cards(card_ints: List[int]) -> List[Card]:
+    return [CARDS[i] for i in card_ints]
+
+def str_to_int(card_str: str) -> int:
+    """Convert a card string to its 0-51 index
+
+    Args:
+        card_str (str): "AS", "ASpade" (see convert_card_list_str) or "A of Spade" (see Card.display)
+
+    Raises:
+        ValueError: If the string is not one of the 52 cards of the deck
+
+    Returns:
+        int: Card index
+    """
+    card_str = card_str.replace(" of ", "", 1)
+    value, suit = card_str[:1], card_str[1:]
+    if suit not in suits and suit not in SUIT_INDEX:
+        raise ValueError(f"Not a card in the deck: {card_str}")
+    try:
+        return RANK_INDEX[value] * 4 + SUIT_INDEX[suit[0]]
+    except KeyError:
+        raise ValueError(f"Not a card in the deck: {card_str}") from None
+
+def int_to_str(card_int: int, full_suit = False) -> str:
+    return convert_card_list_str([CARDS[card_int]], full_suit)[0]
+
+def cards_to_mask(card_ints: List[int]) -> int:
+    mask = 0
+    for i in card_ints:
+        mask |= 1 << i
+    return mask
+
+def mask_to_ints(mask: int) -> List[int]:
+    card_ints = []
+    while mask:
+        low_bit = mask & -mask
+        card_ints.append(low_bit.bit_length() - 1)
+        mask ^= low_bit
+    return card_ints
+
+# The 24 ways to relabel the four suits, a permutation maps suit index s to permutation[s]
+SUIT_PERMUTATIONS = list(permutations(range(4)))
+
+def relabel_suits(card_ints: Iterable[int], permutation: Tuple[int, ...]) -> Tuple[int, ...]:
+    """Cards with their suits relabelled by permutation, sorted so the order they came in doesn't matter"""
+    return tuple(sorted((c & ~3) | permutation[c & 3] for c in card_ints))
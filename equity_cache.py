@@ -0,0 +1,69 @@
+from typing import Dict, Hashable, List, Optional, Tuple
+from collections import OrderedDict
+import threading
+from deck_of_cards import SUIT_PERMUTATIONS, relabel_suits
+
+# Equity only depends on a spot up to relabelling the suits: AsKh vs QdJc on Js4c2d
+# plays the same as AhKs vs QcJd on Jh4d2c. canonicalize picks one representative per
+# class of such spots so EquityCache can answer every member from one simulation.
+
+Spot = Tuple[Tuple[int, ...], Tuple[Tuple[int, ...], ...], Tuple[int, ...]]
+
+def canonicalize(board_ints: List[int], hands: List[List[int]], dead_ints: List[int] = ()) -> Spot:
+    """Map a spot to the smallest of its 24 suit relabellings
+
+    The board and dead cards are unordered, each hand is unordered but players keep their order,
+    so counts computed for the canonical spot belong to the same players.
+
+    Args:
+        board_ints (List[int]): Board cards as ints
+        hands (List[List[int]]): Two card ints per player, empty list for a random hand
+        dead_ints (List[int]): Cards out of play as ints
+
+    Returns:
+        Spot: canonical (board, hands, dead cards)
+    """
+    best = None
+    for perm in SUIT_PERMUTATIONS:
+        spot = (relabel_suits(board_ints, perm), tuple(relabel_suits(hand, perm) for hand in hands),
+                relabel_suits(dead_ints, perm))
+        if best is None or spot < best:
+            best = spot
+    return best
+
+class EquityCache:
+    """Size bounded least recently used cache of equity results with hit/miss counters"""
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[object]:
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return self._results[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, result: object) -> None:
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._results), "maxsize": self.maxsize}
+
+# Shared by simulate_win_tie_loss
+EQUITY_CACHE = EquityCache()
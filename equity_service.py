@@ -0,0 +1,119 @@
+from typing import Dict, List, Tuple
+from collections import defaultdict
+import concurrent.futures
+import math
+import queue
+import threading
+import time
+import numpy as np
+from deck_of_cards import cards_to_mask
+from range_equity import COMBO_MASKS, combo_equity, runout_strengths
+
+# Heads up equity requests coming in together are answered together: requests on the
+# same board share one set of runouts, and every combo any of them needs is scored in
+# a single evaluate_hand_batch call before each request is resolved. Requests too big
+# to hold up the others are resolved on a thread of their own, and the biggest refused.
+
+# Sampled runouts a target error asks for at most
+MAX_RUNOUTS = 40000
+# Work, see request_work, of a request resolved with the others on the coalescing thread
+MAX_BATCHED_WORK = 250000
+# Work of the largest request answered at all, about 20 seconds
+MAX_REQUEST_WORK = 1 << 25
+# Combo pair comparisons costing about as much as one hand evaluation
+PAIRS_PER_EVALUATION = 50
+
+def runouts_for_error(target_error: float) -> int:
+    """Sampled runouts for a standard error of target_error percentage points at a 50% equity, the worst case,
+    at most MAX_RUNOUTS"""
+    return min(MAX_RUNOUTS, max(1, math.ceil(2500 / target_error ** 2)))
+
+def request_work(combos: Dict[int, float], opponent_combos: Dict[int, float], board_ints: Tuple[int, ...] = (),
+                 dead_mask: int = 0, n: int = 2000) -> int:
+    """Cost of a request in hand evaluations: every combo scored on every runout, then every combo pair compared
+
+    Args:
+        Same as EquityBatcher.submit
+
+    Returns:
+        int: hand evaluations, ignoring the combos already scored on this board
+    """
+    if len(board_ints) >= 3: # Every runout is dealt once the flop is out
+        live = 52 - len(board_ints) - bin(dead_mask).count("1")
+        n = math.comb(live, 5 - len(board_ints))
+    pairs = len(combos) * len(opponent_combos)
+    return n * (len(combos) + len(opponent_combos) + pairs // PAIRS_PER_EVALUATION)
+
+class EquityBatcher:
+    """Coalesces heads up equity requests arriving within window seconds into one batched evaluation"""
+    def __init__(self, window: float = 0.005, max_batched_work: int = MAX_BATCHED_WORK,
+                 max_work: int = MAX_REQUEST_WORK):
+        self.window = window
+        self.max_batched_work = max_batched_work
+        self.max_work = max_work
+        self._requests: queue.Queue = queue.Queue()
+        # Big requests queue up behind each other here instead of behind the small ones
+        self._large_requests = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="equity-large")
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, combos: Dict[int, float], opponent_combos: Dict[int, float], board_ints: Tuple[int, ...] = (),
+               dead_mask: int = 0, n: int = 2000) -> concurrent.futures.Future:
+        """Queue a request, see range_equity.combo_equity for the arguments
+
+        Raises:
+            ValueError: If the request's work is over max_work, ex: wide ranges at a small target error
+
+        Returns:
+            concurrent.futures.Future: resolves to the Win Tie Loss Percentage of combos
+        """
+        work = request_work(combos, opponent_combos, board_ints, dead_mask, n)
+        if work > self.max_work:
+            raise ValueError("The ranges are too wide for this many runouts, narrow them or raise target_error")
+        if work > self.max_batched_work:
+            return self._large_requests.submit(combo_equity, combos, opponent_combos, tuple(board_ints), dead_mask, n, None)
+
+        future = concurrent.futures.Future()
+        self._requests.put((future, combos, opponent_combos, tuple(board_ints), dead_mask, n))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._requests.get()]
+            deadline = time.perf_counter() + self.window
+            while True:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._evaluate(batch)
+
+    def _evaluate(self, batch: List[tuple]):
+        boards = defaultdict(list)
+        for request in batch:
+            boards[request[3:]].append(request)
+
+        for (board_ints, dead_mask, n), requests in boards.items():
+            try:
+                runouts = runout_strengths(board_ints, dead_mask, n, None)
+                blocked_mask = dead_mask | cards_to_mask(board_ints)
+                needed = set()
+                for _, combos, opponent_combos, *_ in requests:
+                    needed.update(combos)
+                    needed.update(opponent_combos)
+                needed = [i for i in sorted(needed) if not int(COMBO_MASKS[i]) & blocked_mask]
+                if needed:
+                    runouts.strengths(np.array(needed, dtype=np.int64))
+            except Exception as error:
+                for future, *_ in requests:
+                    future.set_exception(error)
+                continue
+
+            for future, combos, opponent_combos, *_ in requests:
+                try:
+                    future.set_result(combo_equity(combos, opponent_combos, board_ints, dead_mask, n, None))
+                except Exception as error:
+                    future.set_exception(error)
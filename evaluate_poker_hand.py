@@ -1,6 +1,12 @@
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 from collections import Counter
-from deck_of_cards import Card, Deck, Board, Player
+from itertools import combinations, combinations_with_replacement
+import os
+import pickle
+import time
+import numpy as np
+from deck_of_cards import Card, Deck, Board, Player, ranks, suits, card_to_int
+from instrumentation import METRICS
 
 ranks_dict = {'2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, '9': 9, 'T': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14}
 
@@ -27,25 +33,7 @@ def evaluate_hand(board: List[Card], hand: List[Card]) -> Tuple[int, List[int]]:
     Returns:
         Tuple[int, List[int]]: A tuple containing the rank and kickers of the best 5 card hand/board combination
     """
-    all_cards = board + hand
-    best_rank = HandRank['HIGH_CARD']
-    best_kickers = []
-
-    # Evaluate each five-card combination
-    for i in range(len(all_cards)-4):
-        for j in range(i+1, len(all_cards)-3):
-            for k in range(j+1, len(all_cards)-2):
-                for l in range(k+1, len(all_cards)-1):
-                    for m in range(l+1, len(all_cards)):
-                        five_cards = [all_cards[i], all_cards[j], all_cards[k], all_cards[l], all_cards[m]]
-                        rank, kickers = evaluate_five_card_hand(five_cards)
-                        if rank > best_rank:
-                            best_rank = rank
-                            best_kickers = kickers
-                        elif rank == best_rank and kickers > best_kickers:
-                            best_kickers = kickers
-
-    return (best_rank, best_kickers)
+    return decode_strength(evaluate_cards(board + hand))
 
 def sort_cards(cards: List[Card]):
     return sorted([ranks_dict[card.value] for card in cards], reverse=True)
@@ -174,4 +162,235 @@ class TexasHoldem:
         card = self.deck.draw_card()
         self.board.change_card_pos(4, card)
 
-    #def bet
\ No newline at end of file
+    #def bet
+
+# Lookup table evaluator
+#
+# A hand strength is a single int: the HandRank in the high bits followed by five
+# 4 bit kicker slots, so comparing two strengths gives the same answer as comparing
+# the (rank, kickers) tuples returned by evaluate_five_card_hand.
+#
+# Each card adds 5 ** rank to a rank key (a rank appears at most 4 times, so the key
+# is unique per rank multiset) and 1 << 3 * suit to a suit key. Non flush hands are
+# looked up by rank key, flushes by the 13 bit rank mask of the flush suit.
+# CARD_KEYS holds both keys for each 0-51 card int as rank key << 12 | suit key.
+
+TABLE_VERSION = 1
+TABLE_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'hand_tables.pkl')
+
+KICKER_COUNTS = [5, 4, 3, 3, 1, 5, 2, 2, 1, 0] # Number of kickers for each HandRank
+RANK_KEYS = [5 ** i for i in range(13)]
+CARD_KEYS = [RANK_KEYS[i >> 2] << 12 | 1 << (3 * (i & 3)) for i in range(52)]
+# Flush suit for every suit key, -1 when no suit has 5 cards
+FLUSH_SUITS = [next((suit for suit in range(4) if (key >> (3 * suit)) & 7 >= 5), -1) for key in range(4096)]
+
+def encode_strength(rank: int, kickers: List[int]) -> int:
+    """Pack a (rank, kickers) tuple into a single comparable int
+
+    Args:
+        rank (int): HandRank 0-9
+        kickers (List[int]): Kickers 2-14, at most 5
+
+    Returns:
+        int: Hand strength, larger is better
+    """
+    strength = rank
+    for i in range(5):
+        strength = (strength << 4) | (kickers[i] if i < len(kickers) else 0)
+    return strength
+
+def decode_strength(strength: int) -> Tuple[int, List[int]]:
+    """Unpack a hand strength back into its (rank, kickers) tuple
+
+    Args:
+        strength (int): Hand strength from encode_strength or evaluate_cards
+
+    Returns:
+        Tuple[int, List[int]]: A tuple containing the rank and kickers of the hand
+    """
+    rank = strength >> 20
+    kickers = [(strength >> (16 - 4 * i)) & 15 for i in range(KICKER_COUNTS[rank])]
+    return (rank, kickers)
+
+def build_tables() -> Tuple[Dict[int, int], Dict[int, int]]:
+    """Build the rank key and flush mask lookup tables for 5, 6 and 7 cards.
+
+    The 5 card entries come straight from evaluate_five_card_hand, the 6 and 7 card
+    entries are the best entry left after removing any one card.
+
+    Returns:
+        Tuple[Dict[int, int], Dict[int, int]]: rank key table and flush mask table
+    """
+    rank_table = {}
+    for combo in combinations_with_replacement(range(13), 5):
+        if combo[0] == combo[4]: # Five of a kind can't happen
+            continue
+        # Neighbouring cards get different suits so the hand is never a flush
+        cards = [Card(ranks[r], suits[i % 4]) for i, r in enumerate(combo)]
+        key = sum(RANK_KEYS[r] for r in combo)
+        rank_table[key] = encode_strength(*evaluate_five_card_hand(cards))
+
+    for size in (6, 7):
+        for combo in combinations_with_replacement(range(13), size):
+            if any(combo[i] == combo[i + 4] for i in range(size - 4)):
+                continue
+            key = sum(RANK_KEYS[r] for r in combo)
+            rank_table[key] = max(rank_table[key - RANK_KEYS[r]] for r in set(combo))
+
+    flush_table = {}
+    for combo in combinations(range(13), 5):
+        cards = [Card(ranks[r], suits[0]) for r in combo]
+        mask = sum(1 << r for r in combo)
+        flush_table[mask] = encode_strength(*evaluate_five_card_hand(cards))
+
+    for size in (6, 7):
+        for combo in combinations(range(13), size):
+            mask = sum(1 << r for r in combo)
+            flush_table[mask] = max(flush_table[mask ^ (1 << r)] for r in combo)
+
+    return rank_table, flush_table
+
+def load_tables(path: str = TABLE_CACHE_PATH) -> Tuple[Dict[int, int], Dict[int, int]]:
+    """Load the lookup tables from disk, building and caching them if missing or stale
+
+    Args:
+        path (str): Location of the pickled tables
+
+    Returns:
+        Tuple[Dict[int, int], Dict[int, int]]: rank key table and flush mask table
+    """
+    try:
+        with open(path, 'rb') as f:
+            version, rank_table, flush_table = pickle.load(f)
+        if version == TABLE_VERSION:
+            return rank_table, flush_table
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        pass
+
+    rank_table, flush_table = build_tables()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            pickle.dump((TABLE_VERSION, rank_table, flush_table), f, pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass # Read only install, keep the tables in memory only
+    return rank_table, flush_table
+
+RANK_TABLE, FLUSH_TABLE = load_tables()
+
+def evaluate_cards(cards: List[Card]) -> int:
+    """Evaluate the best 5 card hand out of 5, 6 or 7 cards with the lookup tables
+
+    Args:
+        cards (List[Card]): 5 to 7 Cards
+
+    Returns:
+        int: Hand strength, compare with other strengths or decode with decode_strength
+    """
+    # evaluate_ints and evaluate_key are counted by their callers in bulk, a check per call would be
+    # a measurable share of their cost
+    if METRICS.enabled:
+        METRICS.count("evaluations")
+    return evaluate_ints([card_to_int(card) for card in cards])
+
+def evaluate_ints(card_ints: List[int]) -> int:
+    """Evaluate the best 5 card hand out of 5, 6 or 7 cards given as 0-51 ints
+
+    Args:
+        card_ints (List[int]): 5 to 7 card ints, see deck_of_cards.card_to_int
+
+    Returns:
+        int: Hand strength
+    """
+    key = 0
+    for i in card_ints:
+        key += CARD_KEYS[i]
+
+    flush_suit = FLUSH_SUITS[key & 4095]
+    if flush_suit < 0:
+        return RANK_TABLE[key >> 12]
+
+    mask = 0
+    for i in card_ints:
+        if i & 3 == flush_suit:
+            mask |= 1 << (i >> 2)
+    return FLUSH_TABLE[mask]
+
+def evaluate_key(key: int, hand_ints: List[int], board_ints: List[int]) -> int:
+    """Evaluate the best 5 card hand out of hand_ints + board_ints, 5 to 7 cards, from their summed CARD_KEYS
+
+    Keys add up card by card, so a caller dealing the board a street at a time keeps the flop key
+    and adds the turn and then the river card to it instead of summing every card again.
+
+    Args:
+        key (int): sum of CARD_KEYS of every card
+        hand_ints (List[int]): hole card ints, only read for flushes
+        board_ints (List[int]): board card ints, only read for flushes
+
+    Returns:
+        int: Hand strength
+    """
+    flush_suit = FLUSH_SUITS[key & 4095]
+    if flush_suit < 0:
+        return RANK_TABLE[key >> 12]
+
+    mask = 0
+    for i in hand_ints:
+        if i & 3 == flush_suit:
+            mask |= 1 << (i >> 2)
+    for i in board_ints:
+        if i & 3 == flush_suit:
+            mask |= 1 << (i >> 2)
+    return FLUSH_TABLE[mask]
+
+# Strength of two hole cards alone, indexed by card int 1 * 52 + card int 2, ordered like evaluate_two_card_hand
+TWO_CARD_STRENGTHS = [encode_strength(HandRank['PAIR'], [(i >> 2) + 2]) if i >> 2 == j >> 2
+                      else encode_strength(HandRank['HIGH_CARD'], sorted([(i >> 2) + 2, (j >> 2) + 2], reverse=True))
+                      for i in range(52) for j in range(52)]
+
+
+# Batch evaluation with NumPy
+#
+# The dict tables as sorted key / strength arrays for np.searchsorted, and the flush
+# table as a dense array indexed by the 13 bit rank mask.
+
+_RANK_TABLE_KEYS = np.array(sorted(RANK_TABLE), dtype=np.int64)
+_RANK_TABLE_STRENGTHS = np.array([RANK_TABLE[key] for key in _RANK_TABLE_KEYS.tolist()], dtype=np.int32)
+_FLUSH_TABLE_STRENGTHS = np.zeros(1 << 13, dtype=np.int32)
+for _mask, _strength in FLUSH_TABLE.items():
+    _FLUSH_TABLE_STRENGTHS[_mask] = _strength
+_CARD_RANK_KEYS = np.array([RANK_KEYS[i >> 2] for i in range(52)], dtype=np.int64)
+
+def evaluate_hand_batch(card_ints: np.ndarray) -> np.ndarray:
+    """Evaluate many hands at once, each row one hand of 5 to 7 card ints
+
+    Args:
+        card_ints (np.ndarray): (N, 7) integer array of card ints, (N, 5) and (N, 6) also work
+
+    Returns:
+        np.ndarray: (N,) int32 array of hand strengths, same values as evaluate_ints on each row
+    """
+    start_time = time.perf_counter() if METRICS.enabled else None
+    card_ints = np.asarray(card_ints, dtype=np.int64)
+    card_ranks = card_ints >> 2
+    card_suits = card_ints & 3
+
+    # Non flush strength from the rank histogram key
+    rank_keys = _CARD_RANK_KEYS[card_ints].sum(axis=1)
+    # Clipped so rows repeating a card give a meaningless strength instead of an IndexError
+    table_indexes = np.minimum(np.searchsorted(_RANK_TABLE_KEYS, rank_keys), len(_RANK_TABLE_KEYS) - 1)
+    strengths = _RANK_TABLE_STRENGTHS[table_indexes]
+
+    # Suit counts, at most one suit can have 5 or more cards
+    suit_counts = np.stack([(card_suits == suit).sum(axis=1) for suit in range(4)], axis=1)
+    flush_suits = suit_counts.argmax(axis=1)
+    is_flush = suit_counts.max(axis=1) >= 5
+    if is_flush.any():
+        in_flush = (card_suits[is_flush] == flush_suits[is_flush, None])
+        masks = np.bitwise_or.reduce(np.where(in_flush, 1 << card_ranks[is_flush], 0), axis=1)
+        strengths[is_flush] = _FLUSH_TABLE_STRENGTHS[masks]
+
+    if start_time is not None:
+        METRICS.count("evaluations", len(strengths))
+        METRICS.add_time("evaluate", time.perf_counter() - start_time)
+    return strengths
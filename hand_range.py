@@ -0,0 +1,330 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from functools import lru_cache
+from itertools import combinations
+import numpy as np
+from deck_of_cards import CARD_STRS, CARD_STR_INDEX
+from preflop_equity import HAND_CLASSES, HAND_CLASS_INDEX, class_combos
+
+# Preflop ranges as a 169 bit set
+#
+# Bit i of a Range stands for HAND_CLASSES[i], the 13 x 13 grid read row by row with A
+# first: pairs on the diagonal, suited hands above it and off suit hands below. Groups in
+# the compact notation ("88+", "KTs+", "J8s-JTs", "22-44", "AKo") parse to a mask once and
+# are cached, printing walks the grid's rows and columns.
+#
+# A WeightedRange goes down to single combos: a weight 0-1 for each of the 1326 two card
+# combos, ex: "AKo:0.5" plays half of the AKo combos' frequency and "AsQs" only that combo.
+
+RANGE_RANKS = "AKQJT98765432"
+RANGE_RANK_INDEX = {rank: i for i, rank in enumerate(RANGE_RANKS)}
+
+FULL_RANGE_MASK = (1 << len(HAND_CLASSES)) - 1
+
+# Every two card combo has an index 0-1325 into COMBOS, its two card ints low card first
+COMBOS = list(combinations(range(52), 2))
+COMBO_INDEX = {combo: i for i, combo in enumerate(COMBOS)}
+COMBO_CARDS = np.array(COMBOS, dtype=np.int64)
+COMBO_MASKS = np.array([(1 << c1) | (1 << c2) for c1, c2 in COMBOS], dtype=np.uint64)
+# Combo indexes of each hand class, in HAND_CLASSES order like the bits of a Range
+CLASS_COMBOS = [[COMBO_INDEX[tuple(sorted(combo))] for combo in class_combos(hand_class)] for hand_class in HAND_CLASSES]
+
+@lru_cache(maxsize=4096)
+def group_classes(group: str) -> Tuple[str, ...]:
+    """Hand classes of one group of the compact notation, lowest first
+
+    Args:
+        group (str): ex: "99", "88+", "22-44", "AKs", "KTs+", "J8s-JTs", ranges read the same either end first
+
+    Raises:
+        ValueError: If group isn't in the notation
+
+    Returns:
+        Tuple[str, ...]: hand classes ex: ("KTs", "KJs", "KQs") for "KTs+"
+    """
+    if group in HAND_CLASS_INDEX: # Lone pair, suited or off suit hand
+        return (group,)
+    if len(group) == 3 and group[2] == "+" and group[0] == group[1] and group[0] in RANGE_RANK_INDEX:
+        # Pairs through AA, ex: 99+
+        return tuple(rank + rank for rank in RANGE_RANKS[RANGE_RANK_INDEX[group[0]]::-1])
+    if len(group) == 5 and group[2] == "-" and group[:2] in HAND_CLASS_INDEX and group[3:] in HAND_CLASS_INDEX \
+            and group[0] == group[1] and group[3] == group[4]:
+        # Pairs through, ex: 22-44, either end first
+        low, high = sorted((RANGE_RANK_INDEX[group[0]], RANGE_RANK_INDEX[group[3]]), reverse=True)
+        return tuple(rank + rank for rank in RANGE_RANKS[low:high - 1 if high else None:-1])
+    if len(group) == 4 and group[3] == "+" and group[:3] in HAND_CLASS_INDEX:
+        # Suited/off suit through the kicker right below the high card, ex: KTs+
+        high, low = RANGE_RANK_INDEX[group[0]], RANGE_RANK_INDEX[group[1]]
+        return tuple(group[0] + rank + group[2] for rank in RANGE_RANKS[low:high:-1])
+    if len(group) == 7 and group[3] == "-" and group[:3] in HAND_CLASS_INDEX and group[4:] in HAND_CLASS_INDEX \
+            and group[0] == group[4] and group[2] == group[6]:
+        # Suited/off suit through, ex: J8s-JTs, either end first
+        low, high = sorted((RANGE_RANK_INDEX[group[1]], RANGE_RANK_INDEX[group[5]]), reverse=True)
+        return tuple(group[0] + rank + group[2] for rank in RANGE_RANKS[low:high - 1:-1])
+    raise ValueError(f"Unknown hand group {group}")
+
+@lru_cache(maxsize=4096)
+def group_mask(group: str) -> int:
+    """Range mask of one group of the compact notation, see group_classes"""
+    mask = 0
+    for hand_class in group_classes(group):
+        mask |= 1 << HAND_CLASS_INDEX[hand_class]
+    return mask
+
+def _runs(indexes: List[int]) -> List[List[int]]:
+    # Split increasing indexes into runs of consecutive ones
+    runs = []
+    for i in indexes:
+        if runs and i == runs[-1][-1] + 1:
+            runs[-1].append(i)
+        else:
+            runs.append([i])
+    return runs
+
+class Range:
+    """Set of preflop hand classes backed by a 169 bit int, bit i is HAND_CLASSES[i]"""
+    __slots__ = ("mask",)
+
+    def __init__(self, hands: Iterable[str] = (), mask: int = 0):
+        """
+        Args:
+            hands (Iterable[str]): hand classes or groups in the compact notation ex: ["88+", "AKo"]
+            mask (int): bits to start from
+        """
+        for group in hands:
+            mask |= group_mask(group)
+        self.mask = mask
+
+    @classmethod
+    def parse(cls, notation: Union[str, Iterable[str]]) -> "Range":
+        """Range of the compact notation, a comma separated string ex: "88+, A9s+, KTs-KQs" or a list of groups
+
+        Raises:
+            ValueError: If a group isn't in the notation
+        """
+        if isinstance(notation, str):
+            notation = [group.strip() for group in notation.split(",") if group.strip()]
+        return cls(notation)
+
+    def add(self, hand: str) -> None:
+        self.mask |= 1 << HAND_CLASS_INDEX[hand]
+
+    def remove(self, hand: str) -> None:
+        """Remove hand, KeyError if it isn't in the range"""
+        bit = 1 << HAND_CLASS_INDEX[hand]
+        if not self.mask & bit:
+            raise KeyError(hand)
+        self.mask ^= bit
+
+    def discard(self, hand: str) -> None:
+        self.mask &= ~(1 << HAND_CLASS_INDEX[hand])
+
+    def __contains__(self, hand: str) -> bool:
+        i = HAND_CLASS_INDEX.get(hand)
+        return i is not None and bool(self.mask >> i & 1)
+
+    def __iter__(self) -> Iterator[str]:
+        # Grid order, see HAND_CLASSES
+        mask = self.mask
+        while mask:
+            low_bit = mask & -mask
+            yield HAND_CLASSES[low_bit.bit_length() - 1]
+            mask ^= low_bit
+
+    def __len__(self) -> int:
+        return bin(self.mask).count("1")
+
+    def __or__(self, other: "Range") -> "Range":
+        return Range(mask=self.mask | other.mask)
+
+    def __and__(self, other: "Range") -> "Range":
+        return Range(mask=self.mask & other.mask)
+
+    def __sub__(self, other: "Range") -> "Range":
+        return Range(mask=self.mask & ~other.mask)
+
+    def __invert__(self) -> "Range":
+        return Range(mask=FULL_RANGE_MASK & ~self.mask)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Range) and self.mask == other.mask
+
+    def __hash__(self) -> int:
+        return hash(self.mask)
+
+    def __repr__(self) -> str:
+        return f"Range({str(self)!r})"
+
+    def __str__(self) -> str:
+        return ", ".join(self.groups())
+
+    def combos(self) -> int:
+        """Number of two card combos in the range, 6 per pair, 4 per suited and 12 per off suit hand"""
+        return sum(len(CLASS_COMBOS[HAND_CLASS_INDEX[hand]]) for hand in self)
+
+    def groups(self) -> List[str]:
+        """The range in the compact notation: pairs, then suited then off suit hands, strongest groups first
+
+        Returns:
+            List[str]: groups ex: ['99+', '77', 'AKs', 'Q6s-Q7s', 'T7s+', '97o']
+        """
+        mask = self.mask
+        result = []
+
+        # Pairs, a run up to AA is written 99+, others 22-44
+        for run in _runs([r for r in range(13) if mask >> (r * 14) & 1]):
+            low, high = RANGE_RANKS[run[-1]], RANGE_RANKS[run[0]]
+            if len(run) == 1:
+                result.append(low + low)
+            elif high == "A":
+                result.append(f"{low}{low}+")
+            else:
+                result.append(f"{low}{low}-{high}{high}")
+
+        # Suited hands sit above the diagonal at row high card, column kicker, off suit ones below it
+        for suit in ("s", "o"):
+            for high in range(12):
+                if suit == "s":
+                    kickers = [low for low in range(high + 1, 13) if mask >> (high * 13 + low) & 1]
+                else:
+                    kickers = [low for low in range(high + 1, 13) if mask >> (low * 13 + high) & 1]
+                for run in _runs(kickers):
+                    start = RANGE_RANKS[high] + RANGE_RANKS[run[-1]] + suit
+                    if len(run) == 1:
+                        result.append(start)
+                    elif run[0] == high + 1: # Through the kicker right below the high card
+                        result.append(start + "+")
+                    else:
+                        result.append(f"{start}-{RANGE_RANKS[high]}{RANGE_RANKS[run[0]]}{suit}")
+        return result
+
+
+def combo_str(i: int) -> str:
+    """Combo COMBOS[i] as its high card then its low card ex: "AsKs" """
+    c1, c2 = COMBOS[i]
+    return CARD_STRS[c2][0] + CARD_STRS[c2][1].lower() + CARD_STRS[c1][0] + CARD_STRS[c1][1].lower()
+
+@lru_cache(maxsize=4096)
+def group_combos(group: str) -> Tuple[int, ...]:
+    """Combo indexes of a group of the compact notation or of a single combo ex: "AsKs"
+
+    Raises:
+        ValueError: If group isn't in the notation or repeats a card
+    """
+    card_strs = (group[:2].upper(), group[2:].upper())
+    if len(group) == 4 and card_strs[0] in CARD_STR_INDEX and card_strs[1] in CARD_STR_INDEX:
+        c1, c2 = sorted(CARD_STR_INDEX[card_str] for card_str in card_strs)
+        if c1 == c2:
+            raise ValueError(f"Combo {group} uses a card twice")
+        return (COMBO_INDEX[(c1, c2)],)
+    return tuple(i for hand_class in group_classes(group) for i in CLASS_COMBOS[HAND_CLASS_INDEX[hand_class]])
+
+class WeightedRange:
+    """Weight 0-1 of every two card combo, a float64 array of 1326 in COMBOS order"""
+    __slots__ = ("weights",)
+
+    def __init__(self, weights: Optional[np.ndarray] = None):
+        self.weights = np.zeros(len(COMBOS)) if weights is None else np.array(weights, dtype=np.float64)
+
+    @classmethod
+    def from_range(cls, hand_range: Range, weight: float = 1.0) -> "WeightedRange":
+        """Every combo of the classes in hand_range at weight"""
+        weighted_range = cls()
+        for hand_class in hand_range:
+            weighted_range.weights[CLASS_COMBOS[HAND_CLASS_INDEX[hand_class]]] = weight
+        return weighted_range
+
+    @classmethod
+    def parse(cls, notation: Union[str, Iterable[str]]) -> "WeightedRange":
+        """Range of the compact notation with an optional weight per group and single combos,
+        ex: "QQ+, AKs, AKo:0.5, AsQs" as a comma separated string or a list. Later groups overwrite
+        the weight of earlier ones
+
+        Raises:
+            ValueError: If a group isn't in the notation or a weight isn't 0-1
+        """
+        if isinstance(notation, str):
+            notation = [group.strip() for group in notation.split(",") if group.strip()]
+        weighted_range = cls()
+        for group in notation:
+            group, _, weight = group.partition(":")
+            weighted_range.set(group, float(weight) if weight else 1.0)
+        return weighted_range
+
+    def set(self, group: str, weight: float = 1.0) -> None:
+        """Set the weight of every combo of a group, class or single combo"""
+        if not 0 <= weight <= 1:
+            raise ValueError(f"Weight {weight} of {group} isn't between 0 and 1")
+        self.weights[list(group_combos(group))] = weight
+
+    def __getitem__(self, combo: str) -> float:
+        """Weight of a single combo ex: "AsKs" """
+        indexes = group_combos(combo)
+        if len(indexes) != 1:
+            raise KeyError(combo)
+        return float(self.weights[indexes[0]])
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, WeightedRange) and np.array_equal(self.weights, other.weights)
+
+    def __repr__(self) -> str:
+        return f"WeightedRange({str(self)!r})"
+
+    def __str__(self) -> str:
+        # Full weight classes grouped, classes with one weight as "AKo:0.5", the rest combo by combo
+        full = Range()
+        parts = []
+        for hand_class, indexes in zip(HAND_CLASSES, CLASS_COMBOS):
+            weights = self.weights[indexes]
+            if not weights.any():
+                continue
+            if (weights == 1).all():
+                full.add(hand_class)
+            elif (weights == weights[0]).all():
+                parts.append(f"{hand_class}:{weights[0]:g}")
+            else:
+                parts += [combo_str(i) if self.weights[i] == 1 else f"{combo_str(i)}:{self.weights[i]:g}"
+                          for i in indexes if self.weights[i]]
+        return ", ".join(full.groups() + parts)
+
+    def combos(self) -> float:
+        """Weighted number of combos, a full weight class counts 6, 4 or 12"""
+        return float(self.weights.sum())
+
+    def to_range(self) -> Range:
+        """Classes with at least one combo of non zero weight"""
+        return Range(mask=sum(1 << i for i, indexes in enumerate(CLASS_COMBOS) if self.weights[indexes].any()))
+
+    def live_weights(self, dead_mask: int = 0) -> np.ndarray:
+        """Weights with every combo using a card of dead_mask at 0"""
+        if not dead_mask:
+            return self.weights.copy()
+        return np.where((COMBO_MASKS & np.uint64(dead_mask)) != 0, 0.0, self.weights)
+
+    def combo_weights(self, dead_mask: int = 0) -> Dict[int, float]:
+        """Combo index and weight of every combo of non zero weight not using a card of dead_mask"""
+        weights = self.live_weights(dead_mask)
+        return {i: float(weights[i]) for i in np.flatnonzero(weights).tolist()}
+
+    def sample(self, rng: np.random.Generator, n: int, dead_mask: int = 0) -> np.ndarray:
+        """Draw n combos with probability proportional to their weight
+
+        Raises:
+            ValueError: If every combo not using a card of dead_mask has weight 0
+
+        Returns:
+            np.ndarray: (n,) combo indexes into COMBOS
+        """
+        return sample_combos(rng, np.cumsum(self.live_weights(dead_mask)), n)
+
+def sample_combos(rng: np.random.Generator, cumulative_weights: np.ndarray, n: int) -> np.ndarray:
+    """Draw n combo indexes from the running sum of combo weights with one binary search each
+
+    Raises:
+        ValueError: If the weights are all 0
+    """
+    total = cumulative_weights[-1]
+    if total <= 0:
+        raise ValueError("No combo of the range can be dealt")
+    # A combo of weight 0 adds nothing to the running sum, so no draw lands on it
+    indexes = np.searchsorted(cumulative_weights, rng.random(n) * total, side="right")
+    return np.minimum(indexes, len(cumulative_weights) - 1)
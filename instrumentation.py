@@ -0,0 +1,130 @@
+from typing import Dict, Iterator
+from collections import defaultdict
+from contextlib import contextmanager
+import os
+import threading
+import time
+from equity_cache import EQUITY_CACHE
+
+# Engine instrumentation
+#
+# METRICS counts trials, hand evaluations and showdowns and adds up the wall time spent
+# in each phase of a simulation. It records nothing until enabled, with METRICS.enable()
+# or by starting the process with POKER_METRICS=1, and the hot loops only check a local
+# flag per trial while it's off. Worker processes record into a private Metrics per chunk
+# that is merged back, see poker_calculator.run_chunks.
+
+# Counter names and their help text, in /metrics order
+COUNTERS = {
+    "simulations": "Equity calculations asked of simulate_counts",
+    "trials": "Runouts simulated or enumerated",
+    "evaluations": "Hand strengths evaluated",
+    "showdowns": "Showdowns resolved",
+}
+
+# Phases timed, in /metrics order
+PHASES = ["deal", "evaluate", "showdown", "aggregate", "simulate"]
+
+class Metrics:
+    """Thread safe counters and per phase wall time, recorded only while enabled"""
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.counters: Dict[str, float] = defaultdict(int)
+        self.timings: Dict[str, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.timings.clear()
+
+    def count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += value
+
+    def add_time(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            self.timings[phase] += seconds
+
+    @contextmanager
+    def timer(self, phase: str) -> Iterator[None]:
+        """Add the wall time of the with block to phase while enabled"""
+        if not self.enabled:
+            yield
+            return
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(phase, time.perf_counter() - start_time)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Picklable copy of the counters and timings"""
+        with self._lock:
+            return {"counters": dict(self.counters), "timings": dict(self.timings)}
+
+    def merge(self, snapshot: Dict[str, Dict[str, float]]) -> None:
+        """Add a snapshot, ex: of a chunk run in a worker process, into these metrics"""
+        with self._lock:
+            for name, value in snapshot["counters"].items():
+                self.counters[name] += value
+            for phase, seconds in snapshot["timings"].items():
+                self.timings[phase] += seconds
+
+    def stats(self) -> dict:
+        """Counters, seconds per phase and EQUITY_CACHE statistics
+
+        Returns:
+            dict: enabled, counters and timings with every known name present, and equity_cache
+        """
+        snapshot = self.snapshot()
+        return {"enabled": self.enabled,
+                "counters": {name: snapshot["counters"].get(name, 0) for name in COUNTERS},
+                "timings": {phase: snapshot["timings"].get(phase, 0.0) for phase in PHASES},
+                "equity_cache": EQUITY_CACHE.stats()}
+
+def prometheus_text(stats: dict) -> str:
+    """Render Metrics.stats in the Prometheus text exposition format
+
+    Args:
+        stats (dict): result of Metrics.stats
+
+    Returns:
+        str: metric families, one sample per line
+    """
+    lines = ["# HELP poker_instrumentation_enabled Whether the engine is recording metrics",
+             "# TYPE poker_instrumentation_enabled gauge",
+             f"poker_instrumentation_enabled {int(stats['enabled'])}"]
+    for name, value in stats["counters"].items():
+        lines += [f"# HELP poker_{name}_total {COUNTERS.get(name, name)}",
+                  f"# TYPE poker_{name}_total counter",
+                  f"poker_{name}_total {value}"]
+
+    lines += ["# HELP poker_phase_seconds_total Wall time spent in each phase of the engine",
+              "# TYPE poker_phase_seconds_total counter"]
+    lines += [f'poker_phase_seconds_total{{phase="{phase}"}} {seconds:.9f}' for phase, seconds in stats["timings"].items()]
+
+    cache = stats["equity_cache"]
+    lines += ["# HELP poker_equity_cache_hits_total Equity results answered from the cache",
+              "# TYPE poker_equity_cache_hits_total counter",
+              f"poker_equity_cache_hits_total {cache['hits']}",
+              "# HELP poker_equity_cache_misses_total Equity results not found in the cache",
+              "# TYPE poker_equity_cache_misses_total counter",
+              f"poker_equity_cache_misses_total {cache['misses']}",
+              "# HELP poker_equity_cache_size Equity results held in the cache",
+              "# TYPE poker_equity_cache_size gauge",
+              f"poker_equity_cache_size {cache['size']}"]
+    return "\n".join(lines) + "\n"
+
+def env_enabled(value: str) -> bool:
+    """Whether an environment variable's value turns a switch on: 1, true, yes or on in any case"""
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+# Shared by the simulator, the evaluators and the /metrics endpoint
+METRICS = Metrics(enabled=env_enabled(os.environ.get("POKER_METRICS", "")))
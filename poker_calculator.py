@@ -1,131 +1,880 @@
-from typing import Dict, List, Tuple
-from collections import defaultdict
-from deck_of_cards import Card, Player, Deck, Board, deal_cards, deal_flop
-from evaluate_poker_hand import evaluate_five_card_hand, evaluate_two_card_hand
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+from itertools import combinations
+from deck_of_cards import CARD_STRS, FULL_DECK_MASK, Card, Player, Board, cards_to_ints, cards_to_mask, mask_to_ints
+from evaluate_poker_hand import CARD_KEYS, HandRank, TWO_CARD_STRENGTHS, encode_strength, evaluate_cards, evaluate_ints, evaluate_key, evaluate_two_card_hand
+from equity_cache import EQUITY_CACHE, canonicalize
+from hand_range import COMBO_CARDS, COMBO_MASKS, WeightedRange, sample_combos
+from instrumentation import METRICS, Metrics
 import concurrent.futures
+import math
+import time
+import numpy as np
 
-def simulate_win_tie_loss(board: Board, players: List[Player], n: int = 10000) -> Dict[str, Tuple[float, float, float]]:
-    """Poker calculator to calculate Win Tie Loss of each player based on the board using Monte Carlo Method
+# Trials per task handed to a worker, fixed so a seeded run gives the same result for any worker count
+CHUNK_SIZE = 1000
+
+# Counters kept per player: wins, ties and losses, then the pot share, the fraction of the
+# pot won summed over trials so a two way split adds 1/2 and a three way split 1/3
+POT_SHARE = 3
+
+# A run's seed: an int, a np.random.SeedSequence, or None for fresh entropy. Every chunk
+# of trials draws from its own substream of it, see chunk_seed
+Seed = Optional[Union[int, np.random.SeedSequence]]
+
+# Streets and the number of board cards out on each
+STREETS = ["Preflop", "Flop", "Turn", "River"]
+STREET_BOARD_SIZES = [0, 3, 4, 5]
+
+def simulate_win_tie_loss(board: Board, players: List[Player], n: int = 10000, workers: int = 1,
+                          seed: Seed = None, exact: Optional[bool] = None, use_cache: bool = True,
+                          executor: Optional[concurrent.futures.Executor] = None,
+                          dead_cards: Optional[List[Card]] = None,
+                          ranges: Optional[Dict[str, WeightedRange]] = None) -> Dict[str, Tuple[float, float, float]]:
+    """Poker calculator to calculate Win Tie Loss of each player based on the board using Monte Carlo Method,
+    or by enumerating every runout when exact
 
     Args:
         board (Board): Board that is 0, 3 , 4, 5 cards
         players (List[Player]): List of players
         n (int): number of simulations to be ran, default is 10,000
+        workers (int): number of processes to run the simulations on, 1 runs them in this process
+        seed (Seed): seed or SeedSequence for reproducible results, random if None
+        exact (Optional[bool]): enumerate every runout instead of sampling, if None enumerate when
+        the flop is out and every player has a hand
+        use_cache (bool): answer repeated and suit isomorphic spots from EQUITY_CACHE
+        executor (Optional[concurrent.futures.Executor]): long lived process pool to run the chunks on,
+        instead of starting one for this call
+        dead_cards (Optional[List[Card]]): folded or otherwise known cards that can't be dealt
+        ranges (Optional[Dict[str, WeightedRange]]): weighted range by Player.name of players without a hand,
+        their hand is drawn from it by weight instead of uniformly. Spots with ranges aren't cached
+
+    Raises:
+        ValueError: If exact is True and a player has no hand, a card is used twice or a range can't be dealt
 
     Returns:
         Dict[str, Tuple[float, float, float]]: Return a dicionary with Player.name and Tuple of Win Tie Loss Percentage
     """
-    win_tie_loss = {player.name: (0.0, 0.0, 0.0) for player in players}
-    deck = Deck()
+    counts = simulate_counts(board, players, n, workers, seed, exact, use_cache, executor, dead_cards, ranges)
+    win_tie_loss = {player.name: percentages for player, percentages in zip(players, counts_to_percentages(counts))}
+
+    print(win_tie_loss)
+    return win_tie_loss
+
+def simulate_equity(board: Board, players: List[Player], n: int = 10000, workers: int = 1,
+                    seed: Seed = None, exact: Optional[bool] = None, use_cache: bool = True,
+                    executor: Optional[concurrent.futures.Executor] = None,
+                    dead_cards: Optional[List[Card]] = None,
+                    ranges: Optional[Dict[str, WeightedRange]] = None) -> Dict[str, float]:
+    """Pot equity of each player, the percentage of the pot they win on average with split pots
+    shared between the tied players. Equities of all players add up to 100
+
+    Args:
+        Same as simulate_win_tie_loss
+
+    Returns:
+        Dict[str, float]: Return a dicionary with Player.name and its equity percentage
+    """
+    counts = simulate_counts(board, players, n, workers, seed, exact, use_cache, executor, dead_cards, ranges)
+    return {player.name: equity for player, equity in zip(players, counts_to_equities(counts))}
+
+def simulate_street_equity(board: Board, players: List[Player], n: int = 10000, workers: int = 1,
+                           seed: Seed = None, executor: Optional[concurrent.futures.Executor] = None,
+                           dead_cards: Optional[List[Card]] = None,
+                           ranges: Optional[Dict[str, WeightedRange]] = None) -> Dict[str, Dict[str, float]]:
+    """Equity curve of each player: the share of the pot they'd win if the hand was shown down on
+    each street from the current one to the river, all from the same n runouts
+
+    Every runout is dealt once and scored as each street's cards come out, so the curve costs
+    about as much as a river only simulation.
+
+    Args:
+        board (Board): Board that is 0, 3 , 4, 5 cards
+        players (List[Player]): List of players
+        n (int): number of simulations to be ran, default is 10,000
+        workers (int): number of processes to run the simulations on, 1 runs them in this process
+        seed (Seed): seed or SeedSequence for reproducible results, random if None
+        executor (Optional[concurrent.futures.Executor]): long lived process pool to run the chunks on
+        dead_cards (Optional[List[Card]]): folded or otherwise known cards that can't be dealt
+        ranges (Optional[Dict[str, WeightedRange]]): weighted range by Player.name of players without a hand
+
+    Returns:
+        Dict[str, Dict[str, float]]: Return a dicionary with Player.name and its equity percentage on each
+        street of STREETS still to come, the river equity is the one of simulate_equity
+    """
+    board_ints, hands, dead_ints = spot_ints(board, players, dead_cards)
+    streets = [street for street, size in zip(STREETS, STREET_BOARD_SIZES) if size >= len(board_ints)]
+    board_sizes = tuple(STREET_BOARD_SIZES[STREETS.index(street)] for street in streets)
+
+    street_counts = run_street_trials(board_ints, hands, n, board_sizes, workers, seed, executor,
+                                      dead_mask=cards_to_mask(dead_ints), ranges=range_weights(players, ranges))
+    curves = {player.name: {} for player in players}
+    for street, counts in zip(streets, street_counts):
+        for player, equity in zip(players, counts_to_equities(counts)):
+            curves[player.name][street] = equity
+    return curves
+
+def simulate_hand_report(board: Board, players: List[Player], n: int = 10000, workers: int = 1,
+                         seed: Seed = None, executor: Optional[concurrent.futures.Executor] = None,
+                         dead_cards: Optional[List[Card]] = None,
+                         ranges: Optional[Dict[str, WeightedRange]] = None) -> Dict[str, Dict[str, dict]]:
+    """Equity, hand category distribution and outs of each player on every street still to come,
+    counted from the evaluations of one simulate_street_equity run
+
+    Args:
+        Same as simulate_street_equity
+
+    Returns:
+        Dict[str, Dict[str, dict]]: Return a dicionary with Player.name and for each street of STREETS still to come:
+        "equity": equity percentage,
+        "categories": percentage of trials ending the street with each HandRank,
+        and on the turn and river:
+        "out_percentage": percentage of trials where the street card gave the player the best hand from behind,
+        "outs": each card that did, with the percentage of the times it was dealt that it did, 100 for a sure out
+        "improving_cards": each card raising the player's HandRank, with the percentage of the times it did
+    """
+    board_ints, hands, dead_ints = spot_ints(board, players, dead_cards)
+    streets = [street for street, size in zip(STREETS, STREET_BOARD_SIZES) if size >= len(board_ints)]
+    board_sizes = tuple(STREET_BOARD_SIZES[STREETS.index(street)] for street in streets)
+
+    results = run_street_trials(board_ints, hands, n, board_sizes, workers, seed, executor, collect_stats=True,
+                                dead_mask=cards_to_mask(dead_ints), ranges=range_weights(players, ranges))
+    street_counts, street_stats = results[:len(streets)], results[len(streets):]
+    rank_names = sorted(HandRank, key=HandRank.get)
+    report = {player.name: {} for player in players}
+    for street, counts, stats in zip(streets, street_counts, street_stats):
+        trials = sum(counts[0][:POT_SHARE])
+        for i, (player, equity) in enumerate(zip(players, counts_to_equities(counts))):
+            player_report = {"equity": equity,
+                             "categories": {name: round(stats.categories[i][rank] / trials * 100, 2)
+                                            for rank, name in enumerate(rank_names)}}
+            if sum(stats.dealt):
+                player_report["out_percentage"] = round(sum(stats.outs[i]) / trials * 100, 2)
+                player_report["outs"] = {CARD_STRS[card]: round(stats.outs[i][card] / dealt * 100, 2)
+                                         for card, dealt in enumerate(stats.dealt) if stats.outs[i][card]}
+                player_report["improving_cards"] = {CARD_STRS[card]: round(stats.improvements[i][card] / dealt * 100, 2)
+                                                    for card, dealt in enumerate(stats.dealt) if stats.improvements[i][card]}
+            report[player.name][street] = player_report
+    return report
+
+def simulate_counts(board: Board, players: List[Player], n: int = 10000, workers: int = 1,
+                    seed: Seed = None, exact: Optional[bool] = None, use_cache: bool = True,
+                    executor: Optional[concurrent.futures.Executor] = None,
+                    dead_cards: Optional[List[Card]] = None,
+                    ranges: Optional[Dict[str, WeightedRange]] = None) -> List[List[float]]:
+    """Win, Tie, Loss and pot share counts of each player behind simulate_win_tie_loss and simulate_equity
+
+    Args:
+        Same as simulate_win_tie_loss
+
+    Raises:
+        ValueError: If exact is True and a player has no hand, a card is used twice or a range can't be dealt
+
+    Returns:
+        List[List[float]]: Win, Tie, Loss and pot share counts for each player, see POT_SHARE
+    """
+    with METRICS.timer("simulate"):
+        return _simulate_counts(board, players, n, workers, seed, exact, use_cache, executor, dead_cards, ranges)
+
+def _simulate_counts(board: Board, players: List[Player], n: int, workers: int, seed: Seed, exact: Optional[bool],
+                     use_cache: bool, executor: Optional[concurrent.futures.Executor],
+                     dead_cards: Optional[List[Card]], ranges: Optional[Dict[str, WeightedRange]]) -> List[List[float]]:
+    if METRICS.enabled:
+        METRICS.count("simulations")
+    board_ints, hands, dead_ints = spot_ints(board, players, dead_cards)
+    weights = range_weights(players, ranges)
+    if weights is not None:
+        if exact:
+            raise ValueError("Exact enumeration needs a hand for every player")
+        # Weights don't follow the suit relabelling of canonicalize, ranged spots are simulated as given
+        return run_trials(board_ints, hands, n, workers, seed, executor, cards_to_mask(dead_ints), weights)
+
+    all_hands_known = all(hands)
+    if exact is None:
+        exact = all_hands_known and len(board_ints) >= 3
+    if exact and not all_hands_known:
+        raise ValueError("Exact enumeration needs a hand for every player")
+
+    # Simulate the canonical spot so every isomorphic spot shares one result
+    spot = canonicalize(board_ints, hands, dead_ints)
+    seed_key = (seed.entropy, seed.spawn_key) if isinstance(seed, np.random.SeedSequence) else seed
+    key = (spot, exact, None if exact else n, None if exact else seed_key)
+    # Cached as tuples and handed out as fresh lists, so callers adding to their counts can't change the cache
+    cached = EQUITY_CACHE.get(key) if use_cache else None
+    if cached is not None:
+        return [list(player_counts) for player_counts in cached]
+    board_ints, hands, dead_mask = list(spot[0]), [list(hand) for hand in spot[1]], cards_to_mask(spot[2])
+    if exact:
+        counts = enumerate_runouts(board_ints, hands, dead_mask)
+    else:
+        counts = run_trials(board_ints, hands, n, workers, seed, executor, dead_mask)
+    if use_cache:
+        EQUITY_CACHE.put(key, tuple(tuple(player_counts) for player_counts in counts))
+    return counts
+
+def range_weights(players: List[Player], ranges: Optional[Dict[str, WeightedRange]] = None
+                  ) -> Optional[List[Optional[np.ndarray]]]:
+    """Combo weights of each player's range for the trial runners, None for a player without one
+
+    Raises:
+        ValueError: If a player has both a hand and a range
+
+    Returns:
+        Optional[List[Optional[np.ndarray]]]: weights in COMBOS order per player, None when no player has a range
+    """
+    if not ranges:
+        return None
     for player in players:
-            if len(player.hand) == 2:
-                deck.remove_cards(player.hand)
-
-    deck.remove_cards(board.board)
-
-    def simulate_single_game():
-    # for _ in range(n):
-        remaining_cards = deck.copy()
-        simulation_board = Board(board.board[:])
-        for player in players:
-            if len(player.hand) == 0:
-                for _ in range(2):
-                    player.draw(remaining_cards)
-        
-        remaining_cards.shuffle()
+        if player.name in ranges and player.hand:
+            raise ValueError(f"{player.name} has both a hand and a range")
+    return [ranges[player.name].weights if player.name in ranges else None for player in players]
 
-        # Evaluate hand strength at preflop
-        # hand_ranks = evaluate_hand_ranks(simulation_board, players)
-        # preflop_results = compare_hand_ranks(hand_ranks)
-        # update_win_tie_loss(win_tie_loss, preflop_results)
+def spot_ints(board: Board, players: List[Player], dead_cards: Optional[List[Card]] = None
+              ) -> Tuple[List[int], List[List[int]], List[int]]:
+    """Board, hands and dead cards of a spot as card ints
+
+    Args:
+        board (Board): Board that is 0, 3 , 4, 5 cards
+        players (List[Player]): List of players, a player without a 2 card hand gets a random hand
+        dead_cards (Optional[List[Card]]): cards that can't be dealt
+
+    Raises:
+        ValueError: If a card is used twice
+
+    Returns:
+        Tuple[List[int], List[List[int]], List[int]]: board ints, two ints per player or an empty list
+        for a random hand, dead card ints
+    """
+    board_ints = board.board_ints()
+    hands = [player.hand_ints() if len(player.hand) == 2 else [] for player in players]
+    dead_ints = cards_to_ints(dead_cards) if dead_cards else []
 
-        # Deal the flop
-        if len(simulation_board.board) == 0:
-            flop = deal_flop(remaining_cards)
-            simulation_board.add_card_list(flop)
+    used = board_ints + dead_ints + [card for hand in hands for card in hand]
+    if len(set(used)) != len(used):
+        raise ValueError("A card can only be used once")
+    return board_ints, hands, dead_ints
+
+def estimate_win_tie_loss(board: Board, players: List[Player], target_error: float = 0.5, time_budget: float = 1.0,
+                          max_trials: int = 1000000, workers: int = 1, seed: Seed = None,
+                          dead_cards: Optional[List[Card]] = None, ranges: Optional[Dict[str, WeightedRange]] = None
+                          ) -> Tuple[Dict[str, Tuple[float, float, float]], Dict[str, Tuple[float, float]], int]:
+    """Monte Carlo Win Tie Loss that samples chunk by chunk until the estimates converge
+
+    Stops once the standard error of every player's win and tie percentage is at most target_error,
+    the time budget is spent or max_trials have been ran, whichever comes first.
+
+    Args:
+        board (Board): Board that is 0, 3 , 4, 5 cards
+        players (List[Player]): List of players
+        target_error (float): standard error to reach, in percentage points
+        time_budget (float): seconds to spend at most, checked after every chunk of CHUNK_SIZE trials
+        max_trials (int): number of simulations to be ran at most
+        workers (int): number of processes, the ones past the first simulate the next chunks ahead. Seeded
+        results are the same for any number of workers
+        seed (Seed): seed or SeedSequence for reproducible results, random if None
+        dead_cards (Optional[List[Card]]): folded or otherwise known cards that can't be dealt
+        ranges (Optional[Dict[str, WeightedRange]]): weighted range by Player.name of players without a hand
+
+    Raises:
+        ValueError: If max_trials is less than 1 or a card is used twice
+
+    Returns:
+        Tuple[Dict[str, Tuple[float, float, float]], Dict[str, Tuple[float, float]], int]: Win Tie Loss Percentage
+        and the standard error of the Win and Tie Percentage for each Player.name, and the number of simulations ran
+    """
+    for snapshot in stream_win_tie_loss(board, players, target_error, time_budget, max_trials, workers, seed, dead_cards,
+                                        ranges):
+        pass
+    return snapshot
+
+def stream_win_tie_loss(board: Board, players: List[Player], target_error: float = 0.5, time_budget: float = 1.0,
+                        max_trials: int = 1000000, workers: int = 1, seed: Seed = None,
+                        dead_cards: Optional[List[Card]] = None, ranges: Optional[Dict[str, WeightedRange]] = None
+                        ) -> Iterator[Tuple[Dict[str, Tuple[float, float, float]], Dict[str, Tuple[float, float]], int]]:
+    """Generator version of estimate_win_tie_loss, yields the running estimate after every chunk
+
+    Args:
+        Same as estimate_win_tie_loss
+
+    Raises:
+        ValueError: If max_trials is less than 1 or a card is used twice, on the first next()
+
+    Yields:
+        Tuple[Dict[str, Tuple[float, float, float]], Dict[str, Tuple[float, float]], int]: Win Tie Loss Percentage
+        and the standard error of the Win and Tie Percentage for each Player.name, and the number of simulations ran so far
+    """
+    if max_trials < 1:
+        raise ValueError("max_trials must be at least 1")
+    board_ints, hands, dead_ints = spot_ints(board, players, dead_cards)
+    dead_mask = cards_to_mask(dead_ints)
+    weights = range_weights(players, ranges)
+    root_seed = seed_sequence(seed)
+
+    # Same chunks and chunk seeds as run_trials, checked one at a time in order so the
+    # stopping point doesn't depend on the number of workers
+    chunks = ((board_ints, hands, min(CHUNK_SIZE, max_trials - start), chunk_seed(root_seed, i), dead_mask, weights)
+              for i, start in enumerate(range(0, max_trials, CHUNK_SIZE)))
+
+    start_time = time.perf_counter()
+    counts = new_counts(len(hands))
+    trials = 0
+    executor = concurrent.futures.ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        for result in iterate_chunks(simulate_chunk, chunks, executor, prefetch=workers):
+            with METRICS.timer("aggregate"):
+                add_counts(counts, result)
+            trials = min(max_trials, trials + CHUNK_SIZE)
+
+            errors = standard_errors(counts)
+            yield ({player.name: percentages for player, percentages in zip(players, counts_to_percentages(counts))},
+                   {player.name: error for player, error in zip(players, errors)},
+                   trials)
+
+            if max(max(error) for error in errors) <= target_error:
+                break
+            if time.perf_counter() - start_time >= time_budget:
+                break
+    finally:
+        if executor is not None:
+            # Chunks prefetched past the stopping point are dropped
+            executor.shutdown(cancel_futures=True)
+
+def new_counts(num_players: int) -> List[List[float]]:
+    """Zeroed Win, Tie, Loss and pot share counters for each player"""
+    return [[0, 0, 0, 0.0] for _ in range(num_players)]
+
+def add_counts(counts: List[List[float]], other: List[List[float]]) -> None:
+    """Add the counters of other into counts in place"""
+    for player_counts, other_counts in zip(counts, other):
+        for i in range(len(player_counts)):
+            player_counts[i] += other_counts[i]
+
+def counts_to_percentages(counts: List[List[float]]) -> List[Tuple[float, float, float]]:
+    """Turn Win Tie Loss counts into percentages rounded to 2 decimals"""
+    total_simulations = sum(counts[0][:POT_SHARE])
+    percentages = []
+    for wins, ties, losses, _ in counts:
+        win_percentage = round(wins / total_simulations * 100, 2)
+        tie_percentage = round(ties / total_simulations * 100, 2)
+        loss_percentage = round(losses / total_simulations * 100, 2)
+        percentages.append((win_percentage, tie_percentage, loss_percentage))
+    return percentages
+
+def counts_to_equities(counts: List[List[float]]) -> List[float]:
+    """Turn pot share counts into equity percentages rounded to 2 decimals"""
+    total_simulations = sum(counts[0][:POT_SHARE])
+    return [round(player_counts[POT_SHARE] / total_simulations * 100, 2) for player_counts in counts]
+
+def standard_errors(counts: List[List[float]]) -> List[Tuple[float, float]]:
+    """Standard error of the Win and Tie Percentage of each player, sqrt(p * (1 - p) / n) in percentage points"""
+    total_simulations = sum(counts[0][:POT_SHARE])
+    errors = []
+    for wins, ties, *_ in counts:
+        win, tie = wins / total_simulations, ties / total_simulations
+        errors.append((round(math.sqrt(win * (1 - win) / total_simulations) * 100, 3),
+                       round(math.sqrt(tie * (1 - tie) / total_simulations) * 100, 3)))
+    return errors
+
+def resolve_showdown(strengths: List[int], counts: List[List[float]]) -> int:
+    """Credit one showdown to the counters in a single pass over the players
 
-        # Evaluate hand strength at flop
-        # hand_ranks = evaluate_hand_ranks(simulation_board, players)
-        # flop_results = compare_hand_ranks(hand_ranks)
-        # update_win_tie_loss(win_tie_loss, flop_results)
+    Args:
+        strengths (List[int]): hand strength of each player, larger wins
+        counts (List[List[float]]): Win, Tie, Loss and pot share counts of each player, updated in place
 
-        # Deal the turn
-        if len(simulation_board.board) == 3:
-            turn = deal_cards(1, remaining_cards)
-            simulation_board.add_card_list(turn)
+    Returns:
+        int: the best strength, held by every winner
+    """
+    best = -1
+    num_best = 0
+    for strength in strengths:
+        if strength > best:
+            best = strength
+            num_best = 1
+        elif strength == best:
+            num_best += 1
+
+    result = 0 if num_best == 1 else 1
+    share = 1.0 / num_best
+    for strength, player_counts in zip(strengths, counts):
+        if strength == best:
+            player_counts[result] += 1
+            player_counts[POT_SHARE] += share
+        else:
+            player_counts[2] += 1
+    return best
 
-        # Evaluate hand strength at turn
-        # hand_ranks = evaluate_hand_ranks(simulation_board, players)
-        # turn_results = compare_hand_ranks(hand_ranks)
-        # update_win_tie_loss(win_tie_loss, turn_results)
+class StreetStats:
+    """Hand categories and outs seen on one street, counted over many trials
 
-        # Deal the river
-        if len(simulation_board.board) == 4:
-            river = deal_cards(1, remaining_cards)
-            simulation_board.add_card_list(river)
+    categories[player][rank] counts the trials ending the street with each HandRank. For a street that
+    adds one card to a scored street before it, dealt[card] counts the trials it was the street card,
+    outs[player][card] the trials it took the player from behind to the best hand (shared or not) and
+    improvements[player][card] the trials it raised the player's HandRank.
+    """
+    def __init__(self, num_players: int):
+        self.categories = [[0] * len(HandRank) for _ in range(num_players)]
+        self.outs = [[0] * 52 for _ in range(num_players)]
+        self.improvements = [[0] * 52 for _ in range(num_players)]
+        self.dealt = [0] * 52
+
+    def add(self, other: 'StreetStats') -> None:
+        """Add the counters of other into these in place"""
+        for counters, other_counters in ((self.categories, other.categories), (self.outs, other.outs),
+                                         (self.improvements, other.improvements)):
+            for player_counters, other_player_counters in zip(counters, other_counters):
+                for i, count in enumerate(other_player_counters):
+                    player_counters[i] += count
+        for i, count in enumerate(other.dealt):
+            self.dealt[i] += count
+
+def run_trials(board_ints: List[int], hands: List[List[int]], n: int, workers: int = 1,
+               seed: Seed = None, executor: Optional[concurrent.futures.Executor] = None,
+               dead_mask: int = 0, ranges: Optional[List[Optional[np.ndarray]]] = None) -> List[List[float]]:
+    """Split n trials into chunks and run them in this process or across a process pool
 
-        # Evaluate hand strength at river
-        hand_ranks = evaluate_hand_ranks(simulation_board, players)
-        river_results = compare_hand_ranks(hand_ranks)
+    Args:
+        board_ints (List[int]): Board cards as ints, 0, 3, 4 or 5 cards
+        hands (List[List[int]]): Two card ints per player, empty list for a random hand
+        n (int): number of simulations to be ran
+        workers (int): number of processes, 1 runs the chunks in this process
+        seed (Seed): seed or SeedSequence for reproducible results, random if None
+        executor (Optional[concurrent.futures.Executor]): pool to run the chunks on, overrides workers
+        dead_mask (int): card mask of the cards that can't be dealt
+        ranges (Optional[List[Optional[np.ndarray]]]): combo weights of each player without a hand to draw it by,
+        None draws uniformly, see range_weights
 
-        return river_results
-        # update_win_tie_loss(win_tie_loss, river_results)
+    Returns:
+        List[List[float]]: Win, Tie, Loss and pot share counts for each player
+    """
+    return run_street_trials(board_ints, hands, n, (5,), workers, seed, executor, dead_mask=dead_mask, ranges=ranges)[0]
 
-        # print(river_results)
-        # print(simulation_board.display())
-        # print(win_tie_loss)
+def run_street_trials(board_ints: List[int], hands: List[List[int]], n: int, board_sizes: Tuple[int, ...] = (5,),
+                      workers: int = 1, seed: Seed = None,
+                      executor: Optional[concurrent.futures.Executor] = None,
+                      collect_stats: bool = False, dead_mask: int = 0,
+                      ranges: Optional[List[Optional[np.ndarray]]] = None) -> List[List[List[float]]]:
+    """run_trials recording a showdown at every board size in board_sizes
 
-    # Number of threads to use
-    num_threads = 4
+    Args:
+        board_sizes (Tuple[int, ...]): board sizes to score at, in increasing order from 0, 3, 4, 5
+        collect_stats (bool): also count hand categories and outs, see StreetStats
+        Others same as run_trials
 
-    # Create a ThreadPoolExecutor with the desired number of threads
-    executor = concurrent.futures.ThreadPoolExecutor(num_threads)
+    Returns:
+        List[List[List[float]]]: Win, Tie, Loss and pot share counts for each player, for each board size,
+        followed by a List[StreetStats] for each board size when collect_stats
+    """
+    root_seed = seed_sequence(seed)
+
+    # Every chunk gets its own substream of the run seed by chunk number, not by worker
+    chunks = [(board_ints, hands, min(CHUNK_SIZE, n - start), chunk_seed(root_seed, i), board_sizes, collect_stats, dead_mask,
+               ranges)
+              for i, start in enumerate(range(0, n, CHUNK_SIZE))]
+
+    if executor is None and workers > 1 and len(chunks) > 1:
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            results = run_chunks(simulate_street_chunk, chunks, executor)
+    else:
+        results = run_chunks(simulate_street_chunk, chunks, executor)
+
+    with METRICS.timer("aggregate"):
+        street_counts = [new_counts(len(hands)) for _ in board_sizes]
+        for result in results:
+            for counts, chunk_counts in zip(street_counts, result):
+                add_counts(counts, chunk_counts)
+        if not collect_stats:
+            return street_counts
+
+        street_stats = [StreetStats(len(hands)) for _ in board_sizes]
+        for result in results:
+            for stats, chunk_stats in zip(street_stats, result[len(board_sizes):]):
+                stats.add(chunk_stats)
+        return street_counts + street_stats
+
+def run_chunks(chunk_function: Callable, chunks: List[tuple], executor: Optional[concurrent.futures.Executor] = None) -> List:
+    """Call chunk_function with the arguments of every chunk, on executor or in this process
+
+    While METRICS is enabled each chunk records into a Metrics of its own, merged into METRICS
+    here, so chunks run in worker processes are counted too.
 
-    # Submit the simulations to the executor
-    futures = [executor.submit(simulate_single_game) for _ in range(n)]
+    Args:
+        chunk_function (Callable): simulate_chunk or simulate_street_chunk
+        chunks (List[tuple]): positional arguments of each call
+        executor (Optional[concurrent.futures.Executor]): pool to run the chunks on, None runs them in this process
 
-    # Wait for all simulations to complete
-    concurrent.futures.wait(futures)
+    Returns:
+        List: result of each chunk, in order
+    """
+    if not METRICS.enabled:
+        if executor is None:
+            return [chunk_function(*chunk) for chunk in chunks]
+        return list(executor.map(chunk_function, *zip(*chunks)))
+
+    if executor is None:
+        timed_results = [instrumented_chunk(chunk_function, *chunk) for chunk in chunks]
+    else:
+        timed_results = list(executor.map(instrumented_chunk, [chunk_function] * len(chunks), *zip(*chunks)))
+    for _, snapshot in timed_results:
+        METRICS.merge(snapshot)
+    return [result for result, _ in timed_results]
+
+def iterate_chunks(chunk_function: Callable, chunks: Iterator[tuple],
+                   executor: Optional[concurrent.futures.Executor] = None, prefetch: int = 1) -> Iterator:
+    """Lazy run_chunks: yield the result of every chunk in order, with up to prefetch chunks running
+    ahead on executor while the caller looks at the earlier ones
 
-    # Process the results
-    for future in futures:
+    Args:
+        chunk_function (Callable): simulate_chunk or simulate_street_chunk
+        chunks (Iterator[tuple]): positional arguments of each call, only drawn as the chunks are submitted
+        executor (Optional[concurrent.futures.Executor]): pool to run the chunks on, None runs each in this
+        process when its result is asked for
+        prefetch (int): chunks submitted ahead of the one being waited on
+
+    Yields:
+        object: result of each chunk, in order
+    """
+    if executor is None:
+        for chunk in chunks:
+            yield run_chunks(chunk_function, [chunk])[0]
+        return
+
+    pending = []
+    chunks = iter(chunks)
+    while True:
+        for chunk in chunks:
+            instrumented = METRICS.enabled
+            if instrumented:
+                future = executor.submit(instrumented_chunk, chunk_function, *chunk)
+            else:
+                future = executor.submit(chunk_function, *chunk)
+            pending.append((future, instrumented))
+            if len(pending) >= max(1, prefetch):
+                break
+        if not pending:
+            return
+        future, instrumented = pending.pop(0)
         result = future.result()
-        update_win_tie_loss(win_tie_loss, result)
+        if instrumented:
+            result, snapshot = result
+            METRICS.merge(snapshot)
+        yield result
 
-    # Calculate percentages
-    total_simulations = n
-    for player in win_tie_loss:
-        win_percentage = round(win_tie_loss[player][0] / total_simulations * 100, 2)
-        tie_percentage = round(win_tie_loss[player][1] / total_simulations * 100, 2)
-        loss_percentage = round(win_tie_loss[player][2] / total_simulations * 100, 2)
-        win_tie_loss[player] = (win_percentage, tie_percentage, loss_percentage)
+def instrumented_chunk(chunk_function: Callable, *args) -> Tuple[object, Dict[str, Dict[str, float]]]:
+    """Run one chunk recording into a private Metrics, picklable so it can run in a worker process
 
-    print(win_tie_loss)
-    return win_tie_loss
+    Returns:
+        Tuple[object, Dict[str, Dict[str, float]]]: the chunk's result and its Metrics.snapshot
+    """
+    metrics = Metrics(enabled=True)
+    return chunk_function(*args, metrics=metrics), metrics.snapshot()
+
+def seed_sequence(seed: Seed = None) -> np.random.SeedSequence:
+    """Root SeedSequence of a run, from OS entropy when seed is None"""
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    return np.random.SeedSequence(seed)
+
+def chunk_seed(root_seed: np.random.SeedSequence, i: int) -> np.random.SeedSequence:
+    """Independent substream for chunk i, the same as root_seed.spawn(i + 1)[i] without spawning the others"""
+    return np.random.SeedSequence(root_seed.entropy, spawn_key=root_seed.spawn_key + (i,))
+
+def deal_batch(rng: np.random.Generator, live: np.ndarray, n: int, num_draw: int) -> List[List[int]]:
+    """Deal num_draw distinct cards out of live for each of n trials with one bulk draw of random keys
+
+    Args:
+        rng (np.random.Generator): random number generator
+        live (np.ndarray): card ints that can be dealt
+        n (int): number of trials
+        num_draw (int): cards dealt per trial
+
+    Returns:
+        List[List[int]]: cards dealt in each trial, in random order
+    """
+    if not num_draw:
+        return [[] for _ in range(n)]
+    order = np.argsort(rng.random((n, len(live))), axis=1)[:, :num_draw]
+    return live[order].tolist()
+
+def deal_range_batch(rng: np.random.Generator, live: np.ndarray, n: int, num_draw: int,
+                     cumulative_weights: List[np.ndarray]) -> List[List[int]]:
+    """deal_batch for trials where some players hold a weighted range
+
+    Args:
+        rng (np.random.Generator): random number generator
+        live (np.ndarray): card ints that can be dealt
+        n (int): number of trials
+        num_draw (int): cards dealt per trial after the ranges' combos
+        cumulative_weights (List[np.ndarray]): running sum of the combo weights of each range, every combo
+        of non zero weight only using live cards
+
+    Raises:
+        ValueError: If a range has no combo to deal or the ranges can't be dealt together
+
+    Returns:
+        List[List[int]]: cards dealt in each trial, the two cards of each range's combo first
+    """
+    combos = sample_range_hands(rng, cumulative_weights, n)
+    combo_cards = COMBO_CARDS[combos].reshape(n, 2 * len(cumulative_weights))
+
+    # The combos' cards sort after every other live card so they're never drawn again
+    live_positions = np.zeros(52, dtype=np.int64)
+    live_positions[live] = np.arange(len(live))
+    keys = rng.random((n, len(live)))
+    np.put_along_axis(keys, live_positions[combo_cards], 2.0, axis=1)
+    order = np.argsort(keys, axis=1)[:, :num_draw]
+    return np.concatenate([combo_cards, live[order]], axis=1).tolist()
+
+def sample_range_hands(rng: np.random.Generator, cumulative_weights: List[np.ndarray], n: int) -> np.ndarray:
+    """Combo of each range for n trials, drawn by weight, trials where two combos share a card drawn again
+
+    Raises:
+        ValueError: If a range has no combo to deal or the ranges can't be dealt together
+
+    Returns:
+        np.ndarray: (n, ranges) combo indexes
+    """
+    accepted = []
+    needed = n
+    while needed:
+        size = max(needed, CHUNK_SIZE)
+        combos = np.stack([sample_combos(rng, weights, size) for weights in cumulative_weights], axis=1)
+        masks = COMBO_MASKS[combos]
+        clash = np.zeros(size, dtype=bool)
+        for a in range(len(cumulative_weights)):
+            for b in range(a + 1, len(cumulative_weights)):
+                clash |= (masks[:, a] & masks[:, b]) != 0
+        combos = combos[~clash][:needed]
+        if not len(combos):
+            raise ValueError("The ranges can't be dealt together")
+        accepted.append(combos)
+        needed -= len(combos)
+    return np.concatenate(accepted)
+
+def simulate_chunk(board_ints: List[int], hands: List[List[int]], n: int, seed: Seed, dead_mask: int = 0,
+                   ranges: Optional[List[Optional[np.ndarray]]] = None,
+                   metrics: Optional[Metrics] = None) -> List[List[float]]:
+    """Run n simulations with a private RNG, picklable so it can run in a worker process
+
+    Args:
+        board_ints (List[int]): Board cards as ints, 0, 3, 4 or 5 cards
+        hands (List[List[int]]): Two card ints per player, empty list for a random hand
+        n (int): number of simulations to be ran
+        seed (Seed): seed of this chunk's RNG, see chunk_seed
+        dead_mask (int): card mask of the cards that can't be dealt
+        ranges (Optional[List[Optional[np.ndarray]]]): combo weights of each player without a hand, see run_trials
+        metrics (Optional[Metrics]): records trials, evaluations and phase timings when given
+
+    Returns:
+        List[List[float]]: Win, Tie, Loss and pot share counts for each player
+    """
+    return simulate_street_chunk(board_ints, hands, n, seed, (5,), dead_mask=dead_mask, ranges=ranges, metrics=metrics)[0]
+
+def simulate_street_chunk(board_ints: List[int], hands: List[List[int]], n: int, seed: Seed,
+                          board_sizes: Tuple[int, ...] = (5,), collect_stats: bool = False,
+                          dead_mask: int = 0, ranges: Optional[List[Optional[np.ndarray]]] = None,
+                          metrics: Optional[Metrics] = None) -> List[List[List[float]]]:
+    """simulate_chunk recording a showdown at every board size in board_sizes as the runout is dealt
+
+    Args:
+        board_sizes (Tuple[int, ...]): board sizes to score at, each at least len(board_ints)
+        collect_stats (bool): also count hand categories and outs from the same evaluations, see StreetStats
+        Others same as simulate_chunk
 
-def evaluate_hand_ranks(board: Board, players: List[Player]) -> Dict[Player, Tuple[int, List[int]]]:
-    """Evaluate hand rank of each player giving them a rank 0-9
+    Returns:
+        List[List[List[float]]]: Win, Tie, Loss and pot share counts for each player, for each board size,
+        followed by a StreetStats for each board size when collect_stats
+    """
+    rng = np.random.default_rng(seed)
+    dead_mask |= cards_to_mask(board_ints)
+    for hand in hands:
+        dead_mask |= cards_to_mask(hand)
+    live = np.array(mask_to_ints(FULL_DECK_MASK & ~dead_mask), dtype=np.int64)
+    num_players = len(hands)
+    players = range(num_players)
+
+    # Counters of the street reached at each board size, None where that street isn't scored
+    street_counts = [new_counts(num_players) for _ in board_sizes]
+    counts_at = [None] * 6
+    for size, counts in zip(board_sizes, street_counts):
+        counts_at[size] = counts
+    street_stats = [StreetStats(num_players) for _ in board_sizes] if collect_stats else []
+    stats_at = [None] * 6
+    for size, stats in zip(board_sizes, street_stats):
+        stats_at[size] = stats
+
+    # Players with a range take the first cards of a trial, then players dealt a random hand, the board the rest
+    ranged = [i for i, weights in enumerate(ranges or []) if weights is not None]
+    unknown = [i for i, hand in enumerate(hands) if not hand and i not in ranged]
+    dealt_players = ranged + unknown
+    num_known_board = len(board_ints)
+    num_draw = 2 * len(unknown) + 5 - num_known_board
+    # Running sums of each range's weights with the combos blocked by known cards zeroed, searched per draw
+    cumulative_weights = [np.cumsum(WeightedRange(ranges[i]).live_weights(dead_mask)) for i in ranged]
+
+    # Hole cards and their summed CARD_KEYS reused by every trial, random hands are rewritten in place.
+    # The board grows a card at a time and its key sum with it, so the flop evaluation's key feeds the
+    # turn's and the turn's the river's
+    player_hands = [list(hand) if hand else [0, 0] for hand in hands]
+    hand_keys = [CARD_KEYS[hand[0]] + CARD_KEYS[hand[1]] for hand in player_hands]
+    board_cards = list(board_ints)
+    known_board_key = sum(CARD_KEYS[i] for i in board_ints)
+    strengths = [0] * num_players
+    # Strengths and best strength of the street before, for outs
+    previous_strengths = [0] * num_players
+    previous_best = -1
+    previous_size = -1
+
+    # Phase timings only read the clock when metrics are given, otherwise a local flag is checked per street
+    timed = metrics is not None and metrics.enabled
+    evaluate_time = 0.0
+    showdown_time = 0.0
+
+    # Cards for CHUNK_SIZE trials at a time come from one bulk draw, each trial only reads its row
+    def deals() -> Iterator[List[int]]:
+        for start in range(0, n, CHUNK_SIZE):
+            if timed:
+                deal_start = time.perf_counter()
+            if ranged:
+                batch = deal_range_batch(rng, live, min(CHUNK_SIZE, n - start), num_draw, cumulative_weights)
+            else:
+                batch = deal_batch(rng, live, min(CHUNK_SIZE, n - start), num_draw)
+            if timed:
+                metrics.add_time("deal", time.perf_counter() - deal_start)
+            yield from batch
+
+    for dealt in deals():
+        drawn = 0
+        for i in dealt_players:
+            card1, card2 = dealt[drawn], dealt[drawn + 1]
+            player_hands[i][0] = card1
+            player_hands[i][1] = card2
+            hand_keys[i] = CARD_KEYS[card1] + CARD_KEYS[card2]
+            drawn += 2
+
+        # Evaluate hand strength at preflop
+        counts = counts_at[0]
+        if counts is not None:
+            if timed:
+                evaluate_start = time.perf_counter()
+            for i in players:
+                strengths[i] = TWO_CARD_STRENGTHS[player_hands[i][0] * 52 + player_hands[i][1]]
+            if timed:
+                showdown_start = time.perf_counter()
+                evaluate_time += showdown_start - evaluate_start
+            best = resolve_showdown(strengths, counts)
+            if timed:
+                showdown_time += time.perf_counter() - showdown_start
+            stats = stats_at[0]
+            if stats is not None:
+                for i in players:
+                    stats.categories[i][strengths[i] >> 20] += 1
+                strengths, previous_strengths = previous_strengths, strengths
+                previous_best = best
+                previous_size = 0
+
+        # Deal the flop, turn and river missing from the board, evaluating hand strength
+        # once the flop is out, at the turn and at the river
+        del board_cards[num_known_board:]
+        board_key = known_board_key
+        for size in range(num_known_board, 6):
+            if size > num_known_board:
+                card = dealt[drawn]
+                board_cards.append(card)
+                board_key += CARD_KEYS[card]
+                drawn += 1
+            counts = counts_at[size]
+            if counts is not None and size:
+                if timed:
+                    evaluate_start = time.perf_counter()
+                for i in players:
+                    strengths[i] = evaluate_key(hand_keys[i] + board_key, player_hands[i], board_cards)
+                if timed:
+                    showdown_start = time.perf_counter()
+                    evaluate_time += showdown_start - evaluate_start
+                best = resolve_showdown(strengths, counts)
+                if timed:
+                    showdown_time += time.perf_counter() - showdown_start
+
+                stats = stats_at[size]
+                if stats is not None:
+                    categories = stats.categories
+                    for i in players:
+                        categories[i][strengths[i] >> 20] += 1
+                    # Turn and river cards against the street right before them
+                    if previous_size == size - 1 and size > 3:
+                        card = board_cards[-1]
+                        stats.dealt[card] += 1
+                        for i in players:
+                            strength = strengths[i]
+                            previous_strength = previous_strengths[i]
+                            if strength == best and previous_strength != previous_best:
+                                stats.outs[i][card] += 1
+                            if strength >> 20 > previous_strength >> 20:
+                                stats.improvements[i][card] += 1
+                    strengths, previous_strengths = previous_strengths, strengths
+                    previous_best = best
+                    previous_size = size
+
+    if timed:
+        metrics.count("trials", n)
+        metrics.count("evaluations", n * num_players * len(board_sizes))
+        metrics.count("showdowns", n * len(board_sizes))
+        metrics.add_time("evaluate", evaluate_time)
+        metrics.add_time("showdown", showdown_time)
+    return street_counts + street_stats
+
+def enumerate_runouts(board_ints: List[int], hands: List[List[int]], dead_mask: int = 0) -> List[List[float]]:
+    """Deal every possible runout of the board once, giving exact Win Tie Loss counts
 
     Args:
-        board (Board): _description_
+        board_ints (List[int]): Board cards as ints, 0, 3, 4 or 5 cards
+        hands (List[List[int]]): Two card ints per player
+        dead_mask (int): card mask of the cards that can't be dealt
+
+    Returns:
+        List[List[float]]: Win, Tie, Loss and pot share counts for each player over all runouts
+    """
+    dead_mask |= cards_to_mask(board_ints)
+    for hand in hands:
+        dead_mask |= cards_to_mask(hand)
+    remaining = mask_to_ints(FULL_DECK_MASK & ~dead_mask)
+    counts = new_counts(len(hands))
+
+    timed = METRICS.enabled
+    start_time = time.perf_counter() if timed else 0.0
+    for runout in combinations(remaining, 5 - len(board_ints)):
+        simulation_board = board_ints + list(runout)
+        resolve_showdown([evaluate_ints(hand + simulation_board) for hand in hands], counts)
+
+    if timed:
+        # Evaluation and showdown are timed together, a clock read per runout would cost more than either
+        num_runouts = math.comb(len(remaining), 5 - len(board_ints))
+        METRICS.count("trials", num_runouts)
+        METRICS.count("evaluations", num_runouts * len(hands))
+        METRICS.count("showdowns", num_runouts)
+        METRICS.add_time("evaluate", time.perf_counter() - start_time)
+    return counts
+
+def evaluate_hand_ranks(board: Board, players: List[Player]) -> Dict[Player, int]:
+    """Evaluate the hand strength of each player, the best 5 cards out of their hand and the board
+
+    Args:
+        board (Board): Board that is 0, 3, 4, 5 cards
         players (List[Player]): List of Players
 
     Returns:
-        Dict[Player, Tuple[int, List[int]]]: _return a Dictionary where each player 
-        is assigned to their Hand strength 0-9 and List of kickers
+        Dict[Player, int]: return a Dictionary where each player is assigned their hand strength,
+        a larger strength wins, see evaluate_poker_hand.decode_strength for the rank 0-9 and kickers
     """
     hand_ranks = {}
 
     for player in players:
         # Evaluate only player's hole cards
         if board is None or not board.board:
-            rank, kickers = evaluate_two_card_hand(player.hand)
+            hand_ranks[player] = encode_strength(*evaluate_two_card_hand(player.hand))
         # Evaluate based off the board and hole cards
         else:
-            all_cards = player.hand + board.board
-            rank, kickers = evaluate_five_card_hand(all_cards)
-
-        hand_ranks[player] = (rank, kickers)
+            hand_ranks[player] = evaluate_cards(player.hand + board.board)
 
     return hand_ranks
 
@@ -158,36 +907,22 @@ def compare_single_hand_rank(hand1: Tuple[int, List[int]], hand2: Tuple[int, Lis
             return -1
     return 0  # Tie
 
-def compare_hand_ranks(players: Dict[Player, Tuple[int, List[int]]]) -> Dict[Player, str]:
-    """Compare hand ranks 0-9 and kickers to see who wins or loses off the given board
+def compare_hand_ranks(players: Dict[Player, int]) -> Dict[Player, str]:
+    """Compare hand strengths to see who wins or loses off the given board
+
+    Every player holding the best strength wins, or ties if they share it, everyone else loses.
 
     Args:
-        players (List[Tuple[Player, List[int]]]): dictionary with Players and 
-        their Hand strength 0-9 and List of kickers
+        players (Dict[Player, int]): dictionary with Players and their hand strength from
+        evaluate_hand_ranks, or (rank 0-9, List of kickers) tuples which order the same way
 
     Returns:
         Dict[Player, str]: dictionary with each Player a winner or loser of the board
     """
-    results = {player: "Tie" for player in players}
-
-    player_list = list(players.keys())
-    num_players = len(player_list)
-
-    for i in range(num_players):
-        for j in range(i + 1, num_players):
-            hand1 = players[player_list[i]]
-            hand2 = players[player_list[j]]
-
-            result = compare_single_hand_rank(hand1, hand2)
-            if result > 0:
-                if not results[player_list[i]] == "Loss":
-                    results[player_list[i]] = "Win"
-                results[player_list[j]] = "Loss"
-            elif result < 0:
-                if not results[player_list[j]] == "Loss":
-                    results[player_list[j]] = "Win"
-                results[player_list[i]] = "Loss"
-    return results
+    best = max(players.values())
+    winners = sum(1 for strength in players.values() if strength == best)
+    best_result = "Win" if winners == 1 else "Tie"
+    return {player: best_result if strength == best else "Loss" for player, strength in players.items()}
 
 def update_win_tie_loss(win_tie_loss: Dict[str, Tuple[float, float, float]], results: Dict[Player, str]) -> None:
     """Update the win/tie/loss counts for each player based on the simulation results.
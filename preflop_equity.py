@@ -0,0 +1,170 @@
+from typing import Dict, List, Tuple
+from collections import Counter
+from functools import lru_cache
+import argparse
+import concurrent.futures
+import os
+import numpy as np
+from deck_of_cards import RANK_INDEX, SUIT_PERMUTATIONS, relabel_suits
+from evaluate_poker_hand import evaluate_hand_batch
+
+# Heads up all in equity of every starting hand class against every other class.
+#
+# EQUITY_TABLE_PATH holds a 169 x 169 float32 array in HAND_CLASSES order where
+# row i, column j is the equity (win + tie / 2) of class i against class j. Build it with
+#   python preflop_equity.py --trials 3000
+# A matchup has 3.3 suit patterns on average, each dealt --trials boards.
+
+EQUITY_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'preflop_equity.npy')
+
+# Same order as preflop_range_calculator.generate_two_card_hands
+_CLASS_RANKS = ['A', 'K', 'Q', 'J', 'T', '9', '8', '7', '6', '5', '4', '3', '2']
+HAND_CLASSES = [_CLASS_RANKS[i] + _CLASS_RANKS[j] if i == j
+                else _CLASS_RANKS[i] + _CLASS_RANKS[j] + 's' if i < j
+                else _CLASS_RANKS[j] + _CLASS_RANKS[i] + 'o'
+                for i in range(13) for j in range(13)]
+HAND_CLASS_INDEX = {hand_class: i for i, hand_class in enumerate(HAND_CLASSES)}
+
+def class_combos(hand_class: str) -> List[Tuple[int, int]]:
+    """List every concrete two card combo of a hand class
+
+    Args:
+        hand_class (str): hand class ex: "AA", "AKs" or "AKo"
+
+    Returns:
+        List[Tuple[int, int]]: 6 combos for a pair, 4 suited, 12 off suit, as card ints
+    """
+    rank1 = RANK_INDEX[hand_class[0]] * 4
+    rank2 = RANK_INDEX[hand_class[1]] * 4
+    if len(hand_class) == 2:
+        return [(rank1 + s1, rank1 + s2) for s1 in range(4) for s2 in range(s1 + 1, 4)]
+    if hand_class[2] == 's':
+        return [(rank1 + s, rank2 + s) for s in range(4)]
+    return [(rank1 + s1, rank2 + s2) for s1 in range(4) for s2 in range(4) if s1 != s2]
+
+def canonical_matchup(hand: Tuple[int, int], opponent: Tuple[int, int]) -> Tuple[int, int, int, int]:
+    """Relabel suits so every suit isomorphic matchup maps to the same four cards
+
+    Args:
+        hand (Tuple[int, int]): Two card ints
+        opponent (Tuple[int, int]): Two card ints
+
+    Returns:
+        Tuple[int, int, int, int]: Smallest relabelling of hand + opponent over all 24 suit permutations
+    """
+    return min(relabel_suits(hand, perm) + relabel_suits(opponent, perm) for perm in SUIT_PERMUTATIONS)
+
+def matchup_patterns(hand_class: str, opponent_class: str) -> Dict[Tuple[int, int, int, int], int]:
+    """Reduce all card disjoint combo matchups of two classes to their suit isomorphic patterns
+
+    Args:
+        hand_class (str): hand class ex: "AKs"
+        opponent_class (str): hand class ex: "QQ"
+
+    Returns:
+        Dict[Tuple[int, int, int, int], int]: Canonical matchup and how many concrete matchups it stands for
+    """
+    patterns = Counter()
+    for hand in class_combos(hand_class):
+        for opponent in class_combos(opponent_class):
+            if not set(hand) & set(opponent):
+                patterns[canonical_matchup(hand, opponent)] += 1
+    return patterns
+
+def matchup_equity(hand_class: str, opponent_class: str, trials: int, rng: np.random.Generator) -> float:
+    """Monte Carlo equity of one class against another, boards dealt in one NumPy batch
+
+    Only one matchup per suit pattern is simulated: every pattern gets trials boards and its
+    equity counts as often as the concrete matchups it stands for, so AA against KK costs
+    trials boards for each of its 3 patterns rather than for each of its 36 combo pairs.
+
+    Args:
+        hand_class (str): hand class ex: "AKs"
+        opponent_class (str): hand class ex: "QQ"
+        trials (int): number of boards to deal per suit pattern
+        rng (np.random.Generator): random number generator
+
+    Returns:
+        float: equity of hand_class, win + tie / 2
+    """
+    patterns = matchup_patterns(hand_class, opponent_class)
+    holes = np.repeat(np.array(list(patterns.keys()), dtype=np.int64), trials, axis=0)
+    weights = np.repeat(np.array(list(patterns.values()), dtype=np.float64), trials)
+
+    # Random board per trial: the 5 smallest random keys among the live cards
+    keys = rng.random((len(holes), 52))
+    np.put_along_axis(keys, holes, 2.0, axis=1)
+    boards = np.argpartition(keys, 5, axis=1)[:, :5]
+
+    strengths = evaluate_hand_batch(np.concatenate([holes[:, :2], boards], axis=1))
+    opponent_strengths = evaluate_hand_batch(np.concatenate([holes[:, 2:], boards], axis=1))
+    results = (strengths > opponent_strengths) + 0.5 * (strengths == opponent_strengths)
+    return float((results * weights).sum() / weights.sum())
+
+def _equity_row(i: int, trials: int, seed: int) -> List[float]:
+    # Row i against every later class, with an RNG of its own so rows match for any worker count
+    rng = np.random.default_rng([seed, i])
+    return [matchup_equity(HAND_CLASSES[i], HAND_CLASSES[j], trials, rng) for j in range(i + 1, len(HAND_CLASSES))]
+
+def build_equity_table(trials: int = 3000, workers: int = 1, seed: int = 0) -> np.ndarray:
+    """Compute the 169 x 169 heads up equity table
+
+    Args:
+        trials (int): boards dealt per suit pattern of each pair of classes
+        workers (int): number of processes, 1 builds in this process
+        seed (int): seed for reproducible tables
+
+    Returns:
+        np.ndarray: float32 equity table in HAND_CLASSES order
+    """
+    num_classes = len(HAND_CLASSES)
+    if workers == 1:
+        rows = [_equity_row(i, trials, seed) for i in range(num_classes)]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            rows = list(executor.map(_equity_row, range(num_classes), [trials] * num_classes, [seed] * num_classes))
+
+    # A class against itself is even by symmetry, the lower half mirrors the upper half
+    table = np.full((num_classes, num_classes), 0.5, dtype=np.float32)
+    for i, row in enumerate(rows):
+        table[i, i + 1:] = row
+        table[i + 1:, i] = 1.0 - np.array(row, dtype=np.float32)
+    return table
+
+def save_equity_table(table: np.ndarray, path: str = EQUITY_TABLE_PATH) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.save(path, table.astype(np.float32))
+
+@lru_cache(maxsize=None)
+def load_equity_table(path: str = EQUITY_TABLE_PATH) -> np.ndarray:
+    """Memory map the equity table, loaded once per process
+
+    Raises:
+        FileNotFoundError: If the table hasn't been built yet
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No preflop equity table at {path}, build it with: python preflop_equity.py")
+    return np.load(path, mmap_mode='r')
+
+def class_equity(hand_class: str, opponent_class: str) -> float:
+    """Heads up all in equity of hand_class against opponent_class from the table
+
+    Args:
+        hand_class (str): hand class ex: "AKs"
+        opponent_class (str): hand class ex: "QQ"
+
+    Returns:
+        float: equity 0-1
+    """
+    return float(load_equity_table()[HAND_CLASS_INDEX[hand_class], HAND_CLASS_INDEX[opponent_class]])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the preflop heads up equity table")
+    parser.add_argument("--trials", type=int, default=3000, help="boards dealt per suit pattern of each pair of classes")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of processes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=EQUITY_TABLE_PATH)
+    args = parser.parse_args()
+
+    save_equity_table(build_equity_table(args.trials, args.workers, args.seed), args.output)
+    print(f"Saved {args.output}")
@@ -1,9 +1,13 @@
-from typing import List, Dict
-from itertools import combinations
+from typing import List, Dict, Tuple
+from bisect import bisect_left
 from functools import lru_cache
+from itertools import accumulate
 import random
+import numpy as np
 from deck_of_cards import suits, Card, ranks
-from evaluate_poker_hand import sort_hands_str, ranks_dict
+from preflop_equity import load_equity_table, HAND_CLASSES, HAND_CLASS_INDEX
+from hand_range import CLASS_COMBOS, COMBO_MASKS, Range, WeightedRange, group_classes
+from preflop_ranking import load_hand_ranks
 
 hand_ranks = {
     'AA': 1, 'KK': 2, 'QQ': 3, 'AKs': 4, 'JJ': 5, 'AQs': 6, 'KQs': 7, 'AJs': 8, 'KJs': 9, 'TT': 10,
@@ -26,26 +30,15 @@ hand_ranks = {
 }
 
 def generate_two_card_hands() -> List[str]:
-    ranks = ['A', 'K', 'Q', 'J', 'T', '9', '8', '7', '6', '5', '4', '3', '2']
-    suits = ['s', 'o']
-    two_card_hands = []
-
-    for i in range(len(ranks)):
-        for j in range(len(ranks)):
-            if ranks.index(ranks[i]) == ranks.index(ranks[j]):
-                hand = ranks[i] + ranks[j]
-            elif ranks.index(ranks[i]) < ranks.index(ranks[j]):
-                hand = ranks[i] + ranks[j] + suits[0]
-            elif ranks.index(ranks[i]) > ranks.index(ranks[j]):
-                hand = ranks[j] + ranks[i] + suits[1]
-            two_card_hands.append(hand)
-    return two_card_hands
-
-def convert_two_hand_string_to_list(hand_string: str) -> List[Card]:
+    # The 13 x 13 grid row by row, pairs on the diagonal, suited above it and off suit below
+    return list(HAND_CLASSES)
+
+def convert_two_hand_string_to_list(hand_string: str, rng: random.Random = random) -> List[Card]:
     """Convert two card Hand into List of two Cards with random suits
 
     Args:
         hand_string (str): string of hand ex: "AA", "AKo", or "AKs"
+        rng (random.Random): random number generator, pass a seeded one for reproducible suits
 
     Returns:
         List[Card]: List of two Cards with random suits
@@ -55,9 +48,9 @@ def convert_two_hand_string_to_list(hand_string: str) -> List[Card]:
     hand_type = hand_string[2:]
 
     if hand_type == "s":
-        suit1 = suit2 = random.choice(suits)
+        suit1 = suit2 = rng.choice(suits)
     else: # If Pair or off suit, assign two different random suits
-        suit1, suit2 = random.sample(suits, 2)
+        suit1, suit2 = rng.sample(suits, 2)
 
     rank1, rank2 = ranks[0], ranks[1]
     card1 = Card(rank1,suit1)
@@ -65,17 +58,40 @@ def convert_two_hand_string_to_list(hand_string: str) -> List[Card]:
     hand_list = [card1, card2]
     return hand_list
 
-def all_two_card_hand_list() -> List[List[Card]]:
+def all_two_card_hand_list(rng: random.Random = random) -> List[List[Card]]:
     list_str = generate_two_card_hands()
     all_cards = []
     for hand_str in list_str:
-        all_cards.append(convert_two_hand_string_to_list(hand_str))
+        all_cards.append(convert_two_hand_string_to_list(hand_str, rng))
     return all_cards
 
+@lru_cache(maxsize=None)
+def matchup_counts() -> np.ndarray:
+    """Card disjoint combo pairs of every two hand classes, ex: 6 x 6 for AA against KK but 6 for AA against AA
+
+    Returns:
+        np.ndarray: 169 x 169 int array in HAND_CLASSES order
+    """
+    combo_classes = np.zeros((len(COMBO_MASKS), len(HAND_CLASSES)), dtype=np.int64)
+    for i, combos in enumerate(CLASS_COMBOS):
+        combo_classes[combos, i] = 1
+    disjoint = ((COMBO_MASKS[:, None] & COMBO_MASKS[None, :]) == 0).astype(np.int64)
+    return combo_classes.T @ disjoint @ combo_classes
+
 def calculate_ev(hand: str, opponent_hands: List[str]) -> float:
-    # Simulate poker scenarios and calculate the expected value of the hand against opponent hands
-    # Return the calculated expected value as a float
-    return None
+    """All in equity of hand heads up against the opponent hands, each weighted by how often it can be dealt
+    against hand, see matchup_counts
+
+    Args:
+        hand (str): string of hand ex: "AA", "AKo", or "AKs"
+        opponent_hands (List[str]): strings of opponent hands
+
+    Returns:
+        float: expected share of the pot 0-1, looked up in the preflop equity table
+    """
+    i = HAND_CLASS_INDEX[hand]
+    opponent_indexes = [HAND_CLASS_INDEX[opponent_hand] for opponent_hand in opponent_hands]
+    return float(np.average(load_equity_table()[i, opponent_indexes], weights=matchup_counts()[i, opponent_indexes]))
 
 def rank_hands_by_ev(hand_rankings: Dict[str, float]) -> List[str]:
     # Rank the hands in descending order based on their expected value
@@ -84,22 +100,21 @@ def rank_hands_by_ev(hand_rankings: Dict[str, float]) -> List[str]:
 
 def ev_based_hand_ranking() -> List[str]:
     hands = generate_two_card_hands()
-    opponent_hands = list(combinations(hands, 2))  # Generate all possible combinations of opponent hands
 
     hand_rankings = {}  # Dictionary to store hand rankings based on expected value
 
+    # Against a random hand: every opponent class weighted by its combos left after card removal
     for hand in hands:
-        ev_sum = 0.0
-        for opponent_hand in opponent_hands:
-            ev_sum += calculate_ev(hand, opponent_hand)
-        average_ev = ev_sum / len(opponent_hands)
-        hand_rankings[hand] = average_ev
+        hand_rankings[hand] = calculate_ev(hand, hands)
 
     ranked_hands = rank_hands_by_ev(hand_rankings)
     return ranked_hands
 
+# Ranks used by hand_strength and the top range table, see set_hand_ranks
+HAND_RANKS = hand_ranks
+
 def hand_strength(hand_string: str) -> int:
-    return hand_ranks.get(hand_string, 170)
+    return HAND_RANKS.get(hand_string, 170)
 
 def convert_hand_to_str(hand: List[Card]) -> str:
     index1 = ranks.index(hand[0].value)
@@ -130,125 +145,114 @@ def calculate_top_hands(all_hands: List[List[Card]], percentage: int) -> List[Li
         display_hand(hand)
     return top_hands
 
+def build_top_range_table(ranked_hands: List[str]) -> Tuple[List[str], List[int]]:
+    """Hand classes strongest first and the number of combos in all the classes before each one
+
+    Args:
+        ranked_hands (List[str]): every hand class, strongest first
+
+    Returns:
+        Tuple[List[str], List[int]]: ranked_hands and their combos before counts, 0 for the first class
+    """
+    combos_before = list(accumulate((len(CLASS_COMBOS[HAND_CLASS_INDEX[hand]]) for hand in ranked_hands[:-1]), initial=0))
+    return list(ranked_hands), combos_before
+
+def set_hand_ranks(ranks: Dict[str, int]) -> None:
+    """Rank hand classes by ranks in hand_strength and calculate_top_range_str from now on
+
+    Args:
+        ranks (Dict[str, int]): rank of each hand class, 1 the strongest, ex: hand_ranks or
+        preflop_ranking.load_hand_ranks() of an equity ranking file
+    """
+    global HAND_RANKS, TOP_RANGE_HANDS, TOP_RANGE_COMBOS_BEFORE
+    HAND_RANKS = ranks
+    # Built once per ranking, every percentage is a binary search into it
+    TOP_RANGE_HANDS, TOP_RANGE_COMBOS_BEFORE = build_top_range_table(sorted(generate_two_card_hands(), key=hand_strength))
+    _top_range_groups.cache_clear()
+
 def calculate_top_range_str(percentage: int) -> List[str]:
-    all_hand_str = generate_two_card_hands()
-    num_hands = 1326
-    count = 0
-    num_hands_to_play = int(num_hands * percentage/100)
+    """Strongest hand classes making up percentage of the 1326 combos
 
-    sorted_hands = sorted(all_hand_str, key=lambda hand: hand_strength(hand), reverse=False)
-    top_hands = []
-    
-    for hand in sorted_hands:
-        top_hands.append(hand)
-        if count >= num_hands_to_play:
+    Classes are taken until the combos before the next one reach the target, that class included.
+
+    Args:
+        percentage (int): share of all combos 0-100
+
+    Returns:
+        List[str]: hand classes strongest first
+    """
+    num_hands_to_play = int(1326 * percentage / 100)
+    cutoff = bisect_left(TOP_RANGE_COMBOS_BEFORE, num_hands_to_play)
+    return TOP_RANGE_HANDS[:cutoff + 1]
+
+def top_weighted_range(percentage: float) -> WeightedRange:
+    """Strongest combos making up exactly percentage of the 1326 combos
+
+    Unlike calculate_top_range_str, which takes the class crossing the target whole, that class is
+    played at the weight filling the target, ex: AKo:0.5 when 6 of its 12 combos are needed.
+
+    Args:
+        percentage (float): share of all combos, clamped to 0-100
+
+    Returns:
+        WeightedRange: every class before the cutoff at weight 1, the class crossing it at a partial weight
+    """
+    target = 1326 * min(max(percentage, 0), 100) / 100
+    top_range = WeightedRange()
+    for hand, combos_before in zip(TOP_RANGE_HANDS, TOP_RANGE_COMBOS_BEFORE):
+        if combos_before >= target:
             break
-        elif len(hand) == 2: # If pair, 6 combinations
-            count+=6
-        elif hand[2] == "s": # If suited, 4 combinations
-            count+=4
-        elif hand[2] == "o": # If offsuit, 12 combinations
-            count+=12
-    return top_hands
+        top_range.set(hand, min(1.0, (target - combos_before) / len(CLASS_COMBOS[HAND_CLASS_INDEX[hand]])))
+    return top_range
 
-def group_hands(hand_list:List[str]) -> List[str]:
-    pairs = []
-    suited_hands = []
-    off_suit_hands = []
-    hand_list = sort_hands_str(hand_list, False)
+def top_range_groups(percentage: int) -> List[str]:
+    """group_hands of calculate_top_range_str, memoized per percentage
 
-    for hand in hand_list:
-        if len(hand) == 2:  # Pair
-            pairs.append(hand)
-        elif hand[-1] == 's':  # Suited hand
-            suited_hands.append(hand)
-        else:  # Off-suit hand
-            off_suit_hands.append(hand)
+    Args:
+        percentage (int): share of all combos, clamped to 0-100 which gives the same ranges
+
+    Returns:
+        List[str]: grouped hand classes ex: ["99+", "AJs+", "AKo"]
+    """
+    return list(_top_range_groups(min(max(int(percentage), 0), 100)))
+
+@lru_cache(maxsize=None)
+def _top_range_groups(percentage: int) -> Tuple[str, ...]:
+    return tuple(group_hands(calculate_top_range_str(percentage)))
+
+# The equity ranking of preflop_ranking.py once it has been built, the hand_ranks dict until then
+set_hand_ranks(load_hand_ranks() or hand_ranks)
+
+def group_hands(hand_list:List[str]) -> List[str]:
+    """Write hand classes in the compact notation, see hand_range.Range.groups
 
-    # Sort the groups
-    pairs = group_pairs(pairs)
-    suited_hands = group_non_pairs(suited_hands)
-    off_suit_hands = group_non_pairs(off_suit_hands)
+    Args:
+        hand_list (List[str]): hand classes ex: ["99", "TT", "AKs", "AQs"]
 
-    grouped_hands = pairs + suited_hands + off_suit_hands
-    return grouped_hands
+    Returns:
+        List[str]: pairs, then suited then off suit groups, strongest first ex: ["99-TT", "AQs+"]
+    """
+    return Range(hand_list).groups()
 
 def group_pairs(pair_list: List[str]) -> List[str]:
-    groups = []
-    group = []
-    if not pair_list:
-        return []
-    for pair in pair_list:
-        if not group or ranks_dict[pair[0]] - ranks_dict[group[-1][0]] == 1:
-            group.append(pair)
-        else:
-            groups.append(group)
-            group = [pair]
-    
-    groups.append(group)  # Add the last group
-    
-    result = []
-    for group in groups:
-        if len(group) == 1:
-            result.append(f"{group[0]}")
-        elif "AA" in group:
-            result.append(f"{group[0]}+")
-        else:
-            result.append(f"{group[0]}-{group[-1]}")
-    
-    return result[::-1]
+    return Range(pair_list).groups()
 
-def group_non_pairs(non_pairs_list):
-    result = []
-    if not non_pairs_list:
-        return []
-    group_start = non_pairs_list[0]
-    prev_hand = non_pairs_list[0]
-
-    for hand in non_pairs_list[1:]:
-        # Check if Same group, ex: 97o, 98o
-        if hand[0] == prev_hand[0] and ranks_dict[hand[1]] - ranks_dict[prev_hand[1]] == 1:
-            prev_hand = hand
-        else:
-            # Check if group is alone
-            if group_start == prev_hand:
-                result.append(group_start)
-            elif ranks_dict[prev_hand[0]] - ranks_dict[prev_hand[1]] == 1:
-                result.append(group_start + "+")
-            else:
-                result.append(group_start + "-" + prev_hand)
-            group_start = hand
-            prev_hand = hand
-    #TODO: FIX THE PLUS
-    if group_start == prev_hand:
-        result.append(group_start)
-    elif ranks_dict[prev_hand[0]] - ranks_dict[prev_hand[1]] == 1:
-        result.append(group_start + "+")
-    else:
-        result.append(group_start + "-" + prev_hand)
-    return result[::-1]
+def group_non_pairs(non_pairs_list: List[str]) -> List[str]:
+    return Range(non_pairs_list).groups()
 
 def ungroup_hands(hand_list: List[str]) -> List[str]:
+    """Expand groups of the compact notation into hand classes, each group's lowest first
+
+    Args:
+        hand_list (List[str]): groups ex: ["88+", "KTs-KQs", "AKo"]
+
+    Raises:
+        ValueError: If a group isn't in the notation
+
+    Returns:
+        List[str]: hand classes in the order of their groups
+    """
     result = []
     for hand in hand_list:
-        if len(hand) == 3:
-            if hand[2] == "+": # If pairs through AA, ex: 99+
-                hand_index = list(ranks_dict.keys()).index(hand[0])
-                for rank in list(ranks_dict.keys())[hand_index:]:
-                    result.append(rank + rank)
-            else: # Lone suited/off Hand
-                result.append(hand)
-        elif len(hand) == 2: # Lone pair, ex: 99
-            result.append(hand)
-        elif hand[3] == "+": # if suited/off through, ex: KTs+
-            hand_index_1 = list(ranks_dict.keys()).index(hand[0])
-            hand_index_2 = list(ranks_dict.keys()).index(hand[1])
-            for rank in list(ranks_dict.keys())[hand_index_2:hand_index_1]:
-                result.append(hand[0] + rank + hand[2])
-        elif hand[3] == "-": # ex: J8s-JTs
-            hand_index_1 = list(ranks_dict.keys()).index(hand[0])
-            hand_index_2 = list(ranks_dict.keys()).index(hand[1])
-            hand_index_3 = list(ranks_dict.keys()).index(hand[5])
-            for rank in list(ranks_dict.keys())[hand_index_2:hand_index_3+1]:
-                result.append(hand[0] + rank + hand[2])
+        result.extend(group_classes(hand))
     return result
@@ -0,0 +1,130 @@
+from typing import Dict, List, Optional
+import argparse
+import concurrent.futures
+import json
+import os
+import numpy as np
+from hand_range import Range, WeightedRange
+from poker_calculator import POT_SHARE, run_trials
+from preflop_equity import HAND_CLASSES, HAND_CLASS_INDEX
+
+# Preflop ranking of the 169 hand classes by all in equity
+#
+# Every class is simulated against a number of opponents, each dealt a random hand or a
+# hand from an opponent range, and the classes are ranked by their pot equity. The job
+# writes RANKING_PATH after every class so an interrupted run picks up where it stopped;
+# the file holds the ranking once every class is done. Build it with
+#   python preflop_ranking.py --trials 20000 --opponents 1
+# preflop_range_calculator ranks hands by it when it exists, by the hand_ranks dict otherwise.
+
+RANKING_VERSION = 1
+RANKING_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'preflop_ranking.json')
+
+def simulated_class_equity(hand_class: str, opponents: int = 1, opponent_range: Optional[str] = None, trials: int = 20000,
+                           seed: int = 0) -> float:
+    """All in pot equity of a hand class preflop, its combos dealt by the simulator like a range
+
+    Args:
+        hand_class (str): hand class ex: "AKs"
+        opponents (int): number of opponents
+        opponent_range (Optional[str]): range of every opponent in WeightedRange notation, None deals random hands
+        trials (int): number of simulations
+        seed (int): run seed, each class simulates its own substream of it
+
+    Returns:
+        float: equity percentage, split pots shared between the tied players
+    """
+    hero_weights = WeightedRange.from_range(Range([hand_class])).weights
+    opponent_weights = WeightedRange.parse(opponent_range).weights if opponent_range is not None else None
+    class_seed = np.random.SeedSequence(seed, spawn_key=(HAND_CLASS_INDEX[hand_class],))
+    counts = run_trials([], [[] for _ in range(opponents + 1)], trials, seed=class_seed,
+                        ranges=[hero_weights] + [opponent_weights] * opponents)
+    return counts[0][POT_SHARE] / trials * 100
+
+def rank_hand_classes(opponents: int = 1, opponent_range: Optional[str] = None, trials: int = 20000, workers: int = 1,
+                      seed: int = 0, path: str = RANKING_PATH) -> List[str]:
+    """Rank every hand class by simulated_class_equity, resuming from the classes already saved at path
+
+    Args:
+        opponents (int): number of opponents
+        opponent_range (Optional[str]): range of every opponent, None deals random hands
+        trials (int): simulations per class
+        workers (int): number of processes, 1 runs in this process
+        seed (int): seed for reproducible rankings, the same for any worker count or resumption
+        path (str): ranking file, written after every class
+
+    Raises:
+        ValueError: If path holds a run of another version or configuration
+
+    Returns:
+        List[str]: hand classes, strongest first
+    """
+    config = {"opponents": opponents, "opponent_range": opponent_range, "trials": trials, "seed": seed}
+    equities = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            saved = json.load(f)
+        if saved.get("version") != RANKING_VERSION or saved.get("config") != config:
+            raise ValueError(f"{path} holds a ranking of another version or configuration, remove it or pick another path")
+        equities = saved["equities"]
+
+    remaining = [hand_class for hand_class in HAND_CLASSES if hand_class not in equities]
+    if workers == 1:
+        for hand_class in remaining:
+            equities[hand_class] = simulated_class_equity(hand_class, opponents, opponent_range, trials, seed)
+            save_ranking(path, config, equities)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            futures = {executor.submit(simulated_class_equity, hand_class, opponents, opponent_range, trials, seed): hand_class
+                       for hand_class in remaining}
+            for future in concurrent.futures.as_completed(futures):
+                equities[futures[future]] = future.result()
+                save_ranking(path, config, equities)
+
+    if not remaining: # Nothing left to run, write the ranking of a finished file again
+        save_ranking(path, config, equities)
+    return ranking_from_equities(equities)
+
+def ranking_from_equities(equities: Dict[str, float]) -> List[str]:
+    # Strongest first, equal equities in HAND_CLASSES order
+    return sorted(equities, key=lambda hand_class: (-equities[hand_class], HAND_CLASS_INDEX[hand_class]))
+
+def save_ranking(path: str, config: dict, equities: Dict[str, float]) -> None:
+    """Write the equities so far, and the ranking once every class has one, replacing path atomically"""
+    ranking = {"version": RANKING_VERSION, "config": config,
+               "equities": {hand_class: equities[hand_class] for hand_class in HAND_CLASSES if hand_class in equities}}
+    if len(equities) == len(HAND_CLASSES):
+        ranking["ranking"] = ranking_from_equities(equities)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temporary_path = path + ".tmp"
+    with open(temporary_path, 'w') as f:
+        json.dump(ranking, f, indent=2)
+    os.replace(temporary_path, path)
+
+def load_hand_ranks(path: str = RANKING_PATH) -> Optional[Dict[str, int]]:
+    """Rank of each hand class in a finished ranking file, 1 the strongest
+
+    Returns:
+        Optional[Dict[str, int]]: hand class and its rank, None if path is missing, unfinished or of another version
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        saved = json.load(f)
+    if saved.get("version") != RANKING_VERSION or len(saved.get("ranking", [])) != len(HAND_CLASSES):
+        return None
+    return {hand_class: i + 1 for i, hand_class in enumerate(saved["ranking"])}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank the preflop hand classes by all in equity")
+    parser.add_argument("--trials", type=int, default=20000, help="simulations per hand class")
+    parser.add_argument("--opponents", type=int, default=1, help="number of opponents")
+    parser.add_argument("--opponent-range", help="range of every opponent ex: \"22+, A2s+, KTo+\", random hands if not given")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of processes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=RANKING_PATH)
+    args = parser.parse_args()
+
+    ranking = rank_hand_classes(args.opponents, args.opponent_range, args.trials, args.workers, args.seed, args.output)
+    print(f"Saved {args.output}, top 10: {', '.join(ranking[:10])}")
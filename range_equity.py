@@ -0,0 +1,237 @@
+from typing import Dict, List, Optional, Tuple, Union
+from collections import OrderedDict
+from itertools import combinations
+import threading
+import numpy as np
+from deck_of_cards import Board, Card, cards_to_mask, cards_to_ints
+from evaluate_poker_hand import evaluate_hand_batch
+from hand_range import CLASS_COMBOS, COMBOS, COMBO_CARDS, COMBO_INDEX, COMBO_MASKS, Range, WeightedRange
+
+# Range vs range equity
+#
+# Every two card combo has an index 0-1325 into hand_range.COMBOS. A board situation deals one
+# shared set of runouts (all of them once the flop is out, a sample preflop) and every
+# combo is scored on every runout once; those per combo strength columns are cached and
+# reused by every range pair asked about the same board, up to RUNOUT_CACHE_BYTES.
+
+
+# Runouts compared per NumPy step when resolving a range pair
+COMPARE_BATCH = 1 << 22
+# Hands scored per evaluate_hand_batch call when filling in combo strength columns
+EVALUATE_BATCH = 1 << 18
+# Bytes of runouts and strength columns RUNOUT_CACHE holds on to
+RUNOUT_CACHE_BYTES = 256 << 20
+
+def range_combos(hand_range: Union[List[str], Range, WeightedRange], dead_mask: int = 0) -> Dict[int, float]:
+    """Expand a range in the preflop calculator's notation into weighted combos
+
+    Args:
+        hand_range (Union[List[str], Range, WeightedRange]): Range, WeightedRange or hands, groups and combos
+        with optional weights ex: ["88+", "A9s+", "KTs-KQs", "AKo:0.5", "AsQs"]
+        dead_mask (int): card mask of the board and dead cards, combos using them are dropped
+
+    Raises:
+        ValueError: If a group isn't in the notation
+
+    Returns:
+        Dict[int, float]: combo index into COMBOS and its weight
+    """
+    if isinstance(hand_range, WeightedRange):
+        return hand_range.combo_weights(dead_mask)
+    if not isinstance(hand_range, Range):
+        return WeightedRange.parse(hand_range).combo_weights(dead_mask)
+    weights = {}
+    mask = hand_range.mask
+    while mask:
+        low_bit = mask & -mask
+        for i in CLASS_COMBOS[low_bit.bit_length() - 1]:
+            c1, c2 = COMBOS[i]
+            if not (dead_mask >> c1) & 1 and not (dead_mask >> c2) & 1:
+                weights[i] = 1.0
+        mask ^= low_bit
+    return weights
+
+class RunoutStrengths:
+    """Shared runouts of one board situation and the strength of each combo on them"""
+    def __init__(self, board_ints: Tuple[int, ...], dead_mask: int, n: int, seed: Optional[int]):
+        self.board_ints = board_ints
+        live = [i for i in range(52) if not ((dead_mask | cards_to_mask(board_ints)) >> i) & 1]
+        num_cards = 5 - len(board_ints)
+
+        if len(board_ints) >= 3:
+            runouts = list(combinations(live, num_cards))
+            runouts = np.array(runouts, dtype=np.int64).reshape(len(runouts), num_cards)
+        else:
+            rng = np.random.default_rng(seed)
+            keys = rng.random((n, len(live)))
+            runouts = np.array(live, dtype=np.int64)[np.argpartition(keys, num_cards, axis=1)[:, :num_cards]]
+
+        self.boards = np.concatenate([np.tile(np.array(board_ints, dtype=np.int64), (len(runouts), 1)), runouts], axis=1)
+        self.runout_masks = np.zeros(len(runouts), dtype=np.uint64)
+        for column in runouts.T:
+            self.runout_masks |= np.left_shift(np.uint64(1), column.astype(np.uint64))
+        self.columns: Dict[int, np.ndarray] = {}
+
+    def strengths(self, combo_indexes: np.ndarray) -> np.ndarray:
+        """Strength of each combo on each runout, -1 where the runout uses one of its cards
+
+        Args:
+            combo_indexes (np.ndarray): combo indexes into COMBOS
+
+        Returns:
+            np.ndarray: (runouts, combos) int32 strengths
+        """
+        missing = [i for i in dict.fromkeys(combo_indexes.tolist()) if i not in self.columns]
+        num_runouts = len(self.boards)
+        # A few combos per evaluate_hand_batch call so memory stays flat however many are missing
+        block = max(1, EVALUATE_BATCH // max(1, num_runouts))
+        for start in range(0, len(missing), block):
+            block_indexes = missing[start:start + block]
+            hands = np.repeat(COMBO_CARDS[block_indexes], num_runouts, axis=0)
+            boards = np.tile(self.boards, (len(block_indexes), 1))
+            strengths = evaluate_hand_batch(np.concatenate([hands, boards], axis=1)).reshape(len(block_indexes), num_runouts)
+            for i, column in zip(block_indexes, strengths):
+                blocked = (self.runout_masks & COMBO_MASKS[i]) != 0
+                self.columns[i] = np.where(blocked, -1, column)
+        return np.stack([self.columns[i] for i in combo_indexes.tolist()], axis=1)
+
+    @property
+    def nbytes(self) -> int:
+        # Memory held by the runouts and the strength columns scored so far
+        column_bytes = sum(column.nbytes for column in list(self.columns.values()))
+        return self.boards.nbytes + self.runout_masks.nbytes + column_bytes
+
+class RunoutCache:
+    """Least recently used RunoutStrengths per board situation, bounded by the bytes they hold"""
+    def __init__(self, max_bytes: int = RUNOUT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._situations: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, board_ints: Tuple[int, ...], dead_mask: int = 0, n: int = 2000,
+            seed: Optional[int] = None) -> RunoutStrengths:
+        """RunoutStrengths of a situation, dealt on a miss
+
+        Situations used least recently are dropped until the others fit in max_bytes. Columns are
+        added after the lookup, so the most recent situation can grow past the bound until the next one.
+        """
+        key = (tuple(board_ints), dead_mask, n, seed)
+        with self._lock:
+            runouts = self._situations.get(key)
+            if runouts is None:
+                runouts = RunoutStrengths(key[0], dead_mask, n, seed)
+                self._situations[key] = runouts
+            self._situations.move_to_end(key)
+
+            held = sum(situation.nbytes for situation in self._situations.values())
+            while held > self.max_bytes and len(self._situations) > 1:
+                _, dropped = self._situations.popitem(last=False)
+                held -= dropped.nbytes
+        return runouts
+
+    def clear(self) -> None:
+        with self._lock:
+            self._situations.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            situations = list(self._situations.values())
+        return {"size": len(situations), "bytes": sum(situation.nbytes for situation in situations),
+                "max_bytes": self.max_bytes}
+
+# Shared by every range pair so combo strengths are scored once per board situation
+RUNOUT_CACHE = RunoutCache()
+
+def runout_strengths(board_ints: Tuple[int, ...], dead_mask: int = 0, n: int = 2000,
+                     seed: Optional[int] = None) -> RunoutStrengths:
+    # Cached per board situation so combo strengths are shared across range pairs
+    return RUNOUT_CACHE.get(board_ints, dead_mask, n, seed)
+
+def hand_combos(hand_ints: List[int]) -> Dict[int, float]:
+    # A known hand is a range of one combo
+    return {COMBO_INDEX[tuple(sorted(hand_ints))]: 1.0}
+
+def range_vs_range_equity(hand_range: Union[List[str], Range, WeightedRange],
+                          opponent_range: Union[List[str], Range, WeightedRange], board: Optional[Board] = None,
+                          dead_cards: Optional[List[Card]] = None, n: int = 2000,
+                          seed: Optional[int] = None) -> Tuple[float, float, float]:
+    """Win Tie Loss of one range against another, every card disjoint combo pair weighted equally
+
+    Args:
+        hand_range (Union[List[str], Range, WeightedRange]): range ex: ["88+", "AQs+", "AKo:0.5"]
+        opponent_range (Union[List[str], Range, WeightedRange]): range ex: ["KTs+", "J8s-JTs"]
+        board (Optional[Board]): Board that is 0, 3, 4, 5 cards
+        dead_cards (Optional[List[Card]]): cards known to be out of play
+        n (int): number of sampled runouts preflop, every runout is dealt once the flop is out
+        seed (Optional[int]): seed of the preflop runout sample
+
+    Raises:
+        ValueError: If no combo of one range can face a combo of the other
+
+    Returns:
+        Tuple[float, float, float]: Win Tie Loss Percentage of hand_range
+    """
+    board_ints = tuple(board.board_ints()) if board else ()
+    dead_mask = cards_to_mask(cards_to_ints(dead_cards)) if dead_cards else 0
+    blocked_mask = dead_mask | cards_to_mask(board_ints)
+
+    combos = range_combos(hand_range, blocked_mask)
+    opponent_combos = range_combos(opponent_range, blocked_mask)
+    return combo_equity(combos, opponent_combos, board_ints, dead_mask, n, seed)
+
+def combo_equity(combos: Dict[int, float], opponent_combos: Dict[int, float], board_ints: Tuple[int, ...] = (),
+                 dead_mask: int = 0, n: int = 2000, seed: Optional[int] = None) -> Tuple[float, float, float]:
+    """Win Tie Loss of one set of weighted combos against another, see range_vs_range_equity
+
+    Args:
+        combos (Dict[int, float]): combo index into COMBOS and its weight
+        opponent_combos (Dict[int, float]): combo index into COMBOS and its weight
+        board_ints (Tuple[int, ...]): Board cards as ints
+        dead_mask (int): card mask of the dead cards
+        n (int): number of sampled runouts preflop
+        seed (Optional[int]): seed of the preflop runout sample
+
+    Raises:
+        ValueError: If no combo of one side can face a combo of the other
+
+    Returns:
+        Tuple[float, float, float]: Win Tie Loss Percentage of combos
+    """
+    blocked_mask = dead_mask | cards_to_mask(board_ints)
+    combos = {i: weight for i, weight in combos.items() if not int(COMBO_MASKS[i]) & blocked_mask}
+    opponent_combos = {i: weight for i, weight in opponent_combos.items() if not int(COMBO_MASKS[i]) & blocked_mask}
+    indexes = np.array(list(combos.keys()), dtype=np.int64)
+    opponent_indexes = np.array(list(opponent_combos.keys()), dtype=np.int64)
+    weights = np.array(list(combos.values()))
+    opponent_weights = np.array(list(opponent_combos.values()))
+
+    # Combo pairs sharing a card can't happen
+    pair_weights = weights[:, None] * opponent_weights[None, :]
+    if pair_weights.size:
+        pair_weights[(COMBO_MASKS[indexes][:, None] & COMBO_MASKS[opponent_indexes][None, :]) != 0] = 0
+    if not pair_weights.any():
+        raise ValueError("No combo of one range can face a combo of the other")
+
+    runouts = runout_strengths(tuple(board_ints), dead_mask, n, seed)
+    strengths = runouts.strengths(indexes)
+    opponent_strengths = runouts.strengths(opponent_indexes)
+
+    wins = np.zeros(pair_weights.shape)
+    ties = np.zeros(pair_weights.shape)
+    dealt = np.zeros(pair_weights.shape)
+    step = max(1, COMPARE_BATCH // pair_weights.size)
+    for start in range(0, len(strengths), step):
+        s1 = strengths[start:start + step, :, None]
+        s2 = opponent_strengths[start:start + step, None, :]
+        valid = (s1 >= 0) & (s2 >= 0)
+        wins += ((s1 > s2) & valid).sum(axis=0)
+        ties += ((s1 == s2) & valid).sum(axis=0)
+        dealt += valid.sum(axis=0)
+
+    # Average the per pair results over the pairs that saw at least one runout
+    pair_weights[dealt == 0] = 0
+    dealt[dealt == 0] = 1
+    total_weight = pair_weights.sum()
+    win = float((pair_weights * wins / dealt).sum() / total_weight)
+    tie = float((pair_weights * ties / dealt).sum() / total_weight)
+    return (round(win * 100, 2), round(tie * 100, 2), round((1 - win - tie) * 100, 2))
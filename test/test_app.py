@@ -0,0 +1,119 @@
+import unittest
+import json
+from app import app
+from equity_cache import EQUITY_CACHE
+from instrumentation import METRICS
+from hand_range import WeightedRange
+
+class TestHandGroups(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_groups(self):
+        response = self.client.post('/sort-cells', json={"selected_cells": ["AA", "KK", "AKs"]})
+        self.assertEqual(response.get_json(), {"sorted_cells": ["KK+", "AKs"]})
+        response = self.client.post('/ungroup-hands', json={"selected_cells": ["KK+"]})
+        self.assertEqual(sorted(response.get_json()["sorted_cells"]), ["AA", "KK"])
+
+    def test_top_range(self):
+        response = self.client.post('/calculate-top-range', json={"percentage": 10}).get_json()
+        self.assertEqual(response["calculated_hands"][0], "88+")
+        self.assertAlmostEqual(WeightedRange.parse(response["weighted_range"]).combos(), 132.6, delta=0.01)
+
+    def test_bad_request(self):
+        self.assertEqual(self.client.post('/sort-cells', json={"selected_cells": ["XX"]}).status_code, 400)
+        self.assertEqual(self.client.post('/ungroup-hands', json={"selected_cells": ["A"]}).status_code, 400)
+        self.assertEqual(self.client.post('/ungroup-hands', json={"selected_cells": "AA"}).status_code, 400)
+
+class TestEquityStream(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_stream(self):
+        response = self.client.get('/equity/stream?board=JS,4C,2D&hand=AS,KH&hand=QD,JC&target_error=1&time_budget=5')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        events = response.get_data(as_text=True).strip().split("\n\n")
+        self.assertEqual(events[-1], "event: done\ndata: {}")
+        snapshots = [json.loads(event[len("data: "):]) for event in events[:-1]]
+        self.assertGreater(len(snapshots), 0)
+        trials = [snapshot["trials"] for snapshot in snapshots]
+        self.assertEqual(trials, sorted(trials))
+        self.assertAlmostEqual(snapshots[-1]["win_tie_loss"]["Player 1"][0], 25.0, delta=5.0)
+        self.assertLessEqual(max(snapshots[-1]["errors"]["Player 1"]), 1.0)
+
+    def test_bad_request(self):
+        self.assertEqual(self.client.get('/equity/stream?board=JS,4C&hand=AS,KH&hand=QD,JC').status_code, 400)
+        self.assertEqual(self.client.get('/equity/stream?hand=AS,KH&hand=AS,JC').status_code, 400)
+        self.assertEqual(self.client.get('/equity/stream?hand=AS,KH&hand=1S,JC').status_code, 400)
+        self.assertEqual(self.client.get('/equity/stream?hand=AS,KH').status_code, 400)
+
+class TestEquity(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_hands(self):
+        response = self.client.post('/equity', json={"board": ["JS", "4C", "2D"], "players": [{"hand": ["AS", "KH"]}, {"hand": ["QD", "JC"]}]})
+        self.assertEqual(response.status_code, 200)
+        win_tie_loss = response.get_json()["win_tie_loss"]
+        self.assertAlmostEqual(win_tie_loss["Player 1"][0], 25.0, delta=1.0)
+        self.assertEqual(win_tie_loss["Player 1"][0], win_tie_loss["Player 2"][2])
+
+    def test_ranges(self):
+        response = self.client.post('/equity', json={"players": [{"range": ["AA"]}, {"range": ["KK"]}], "dead_cards": ["2C"], "target_error": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertAlmostEqual(response.get_json()["win_tie_loss"]["Player 1"][0], 82.0, delta=3.0)
+
+    def test_multiway(self):
+        players = [{"hand": ["AS", "KH"]}, {"hand": ["QD", "QC"]}, {"hand": ["7D", "6D"]}]
+        response = self.client.post('/equity', json={"board": ["JS", "4C", "2D", "9H"], "players": players})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()["win_tie_loss"]), 3)
+
+    def test_multiway_dead_cards(self):
+        # With the other Queens folded Player 2 only wins on the two Jacks left, out of 39 rivers
+        players = [{"hand": ["AS", "KH"]}, {"hand": ["QD", "JC"]}, {"hand": ["7D", "6D"]}]
+        response = self.client.post('/equity', json={"board": ["JS", "4C", "2D", "AH"], "players": players, "dead_cards": ["QS", "QH", "QC"]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["win_tie_loss"]["Player 2"][0], round(2 / 39 * 100, 2))
+
+    def test_multiway_ranges(self):
+        players = [{"hand": ["AS", "AH"]}, {"range": ["KK", "72o:0.5"]}, {"hand": ["QD", "QC"]}]
+        response = self.client.post('/equity', json={"players": players, "target_error": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertAlmostEqual(response.get_json()["win_tie_loss"]["Player 1"][0], 70.0, delta=5.0)
+
+    def test_bad_request(self):
+        self.assertEqual(self.client.post('/equity', json={"players": [{"hand": ["AS", "KH"]}]}).status_code, 400)
+        self.assertEqual(self.client.post('/equity', json=[1, 2]).status_code, 400)
+        self.assertEqual(self.client.post('/equity', json={"players": [1, 2]}).status_code, 400)
+        self.assertEqual(self.client.post('/equity', json={"board": ["JS", "4C"], "players": [{"hand": ["AS", "KH"]}, {}]}).status_code, 400)
+        self.assertEqual(self.client.post('/equity', data="not json", content_type="application/json").status_code, 400)
+        self.assertEqual(self.client.post('/equity', json={"players": [{"hand": ["AS", "KH"]}, {"hand": ["AS", "QC"]}]}).status_code, 400)
+        self.assertEqual(self.client.post('/equity', json={"players": [{"hand": ["AS", "KH"]}, {"range": ["A"]}]}).status_code, 400)
+        self.assertEqual(self.client.post('/equity', json={"players": [{"range": ["AA"]}, {"range": ["AA"]}], "dead_cards": ["AS", "AH"]}).status_code, 400)
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        EQUITY_CACHE.clear()
+        METRICS.reset()
+        METRICS.enable()
+
+    def tearDown(self):
+        METRICS.disable()
+        METRICS.reset()
+
+    def test_metrics(self):
+        self.client.post('/equity', json={"board": ["JS", "4C", "2D", "9H"], "dead_cards": ["2S"],
+                                          "players": [{"hand": ["AS", "KH"]}, {"hand": ["QD", "JC"]}, {"hand": ["TS", "TC"]}]})
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/plain')
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertIn("# TYPE poker_trials_total counter", lines)
+        self.assertIn("poker_instrumentation_enabled 1", lines)
+        # The turn is out, every one of the 41 rivers is enumerated
+        self.assertIn("poker_trials_total 41", lines)
+        self.assertIn("poker_evaluations_total 123", lines)
+        self.assertTrue(any(line.startswith('poker_phase_seconds_total{phase="evaluate"}') for line in lines))
@@ -0,0 +1,35 @@
+import unittest
+from benchmark import BENCHMARKS, compare_results, run_benchmark, run_benchmarks, _simulation
+
+class TestRunBenchmarks(unittest.TestCase):
+    def test_registered(self):
+        for street in ["preflop", "flop", "turn", "river"]:
+            self.assertIn(f"simulate_heads_up_{street}", BENCHMARKS)
+            self.assertIn(f"simulate_six_way_{street}", BENCHMARKS)
+        self.assertIn("evaluate_five_card_hand", BENCHMARKS)
+        self.assertIn("endpoint_equity_heads_up", BENCHMARKS)
+
+    def test_run(self):
+        report = run_benchmarks("group_hands", min_time=0.01)
+        self.assertEqual(list(report["results"]), ["group_hands", "ungroup_hands", "endpoint_ungroup_hands"])
+        result = report["results"]["group_hands"]
+        self.assertEqual(result["unit"], "calls")
+        self.assertGreater(result["ops_per_sec"], 0)
+        self.assertGreaterEqual(result["repeats"], 3)
+
+    def test_simulation_overlap(self):
+        self.assertRaises(ValueError, _simulation, [[51, 46], [0, 4]], [36, 9, 0])
+
+    def test_endpoint(self):
+        result = run_benchmark(BENCHMARKS["endpoint_ungroup_hands"], min_time=0.01)
+        self.assertEqual(result["unit"], "requests")
+
+class TestCompareResults(unittest.TestCase):
+    def test_regression(self):
+        baseline = {"results": {"a": {"unit": "hands", "ops_per_sec": 1000.0}, "b": {"unit": "hands", "ops_per_sec": 1000.0}}}
+        report = {"results": {"a": {"unit": "hands", "ops_per_sec": 650.0}, "b": {"unit": "hands", "ops_per_sec": 900.0},
+                              "c": {"unit": "hands", "ops_per_sec": 1.0}}}
+        regressions = compare_results(report, baseline, tolerance=0.3)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith("a:"))
+        self.assertEqual(compare_results(report, baseline, tolerance=0.5), [])
@@ -1,7 +1,8 @@
 import unittest
+import random
 from io import StringIO
 
-from deck_of_cards import Card, Deck, Player, Board, deal_cards, deal_flop
+from deck_of_cards import Card, Deck, Player, Board, deal_cards, deal_flop, card_to_int, int_to_card, str_to_int, int_to_str, cards_to_mask, mask_to_ints, convert_card_list_str, relabel_suits, SUIT_PERMUTATIONS
 
 suits = ['Club', 'Diamond', 'Heart',  'Spade']
 ranks = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K' , 'A']
@@ -40,6 +41,13 @@ class TestDeck(unittest.TestCase):
         # check that the shuffled deck is not in the same order as the unshuffled deck
         self.assertNotEqual(deck1.cards, deck2.cards)    
     
+    def test_shuffle_seeded(self):
+        deck1 = Deck()
+        deck2 = Deck()
+        deck1.shuffle(random.Random(8))
+        deck2.shuffle(random.Random(8))
+        self.assertEqual(deck1.cards, deck2.cards)
+
     def test_draw_card(self):
         deck = Deck()
         num_cards = len(deck.cards)
@@ -96,7 +104,22 @@ class TestDeck(unittest.TestCase):
         card4 = deck.draw_card()
         self.assertFalse(deck.has_card(card4))
 
-    def test_copy(self):
+    def test_remove_mask(self):
+        deck = Deck()
+        dead_mask = cards_to_mask([0, 51])
+        deck.remove_mask(dead_mask)
+        self.assertEqual(len(deck.cards), 50)
+        self.assertFalse(deck.has_card(Card('2', 'Club')))
+        self.assertFalse(deck.has_card(Card('A', 'Spade')))
+        self.assertEqual(deck.remaining_ints(), list(range(1, 51)))
+        self.assertEqual(deck.to_ints(), deck.remaining_ints())
+
+        card = deck.draw_card()
+        self.assertFalse(deck.has_card(card))
+        self.assertEqual(len(deck.remaining_ints()), 49)
+        self.assertEqual(deck.copy().remaining_ints(), deck.remaining_ints())
+
+
         deck = Deck()
         deck_copy = deck.copy()
 
@@ -137,7 +160,19 @@ class TestPlayer(unittest.TestCase):
         expected = 'A of Spade, K of Heart'
         self.assertEqual(self.player.display_hand(), expected)  # Just checking that it runs without error
 
+    def test_default_hand_not_shared(self):
+        player1 = Player("Player 1")
+        player2 = Player("Player 2")
+        player1.draw(self.deck)
+        self.assertEqual(len(player1.hand), 1)
+        self.assertEqual(player2.hand, [])
+
 class TestBoard(unittest.TestCase):
+    def test_default_board_not_shared(self):
+        board1 = Board()
+        board1.add_card_list([Card('A', 'Club')])
+        self.assertEqual(Board().board, [])
+
     def test_change_card_pos_1(self):
         card1 = Card('A' , 'Club')
         card2 = Card('4' , 'Heart')
@@ -229,4 +264,39 @@ class TestDeal(unittest.TestCase):
     def test_deal_cards(self):
         cards = deal_cards(2, self.deck)
         self.assertEqual(len(cards), 2)
-        self.assertEqual(len(self.deck.cards), 50)
\ No newline at end of file
+        self.assertEqual(len(self.deck.cards), 50)
+
+class TestCardEncoding(unittest.TestCase):
+    def test_deck_order(self):
+        deck = Deck()
+        self.assertEqual(deck.to_ints(), list(range(52)))
+        self.assertEqual(Deck.from_ints(range(52)).cards, deck.cards)
+
+    def test_round_trip(self):
+        for card in Deck().cards:
+            card_int = card_to_int(card)
+            self.assertEqual(int_to_card(card_int), card)
+            self.assertEqual(str_to_int(int_to_str(card_int)), card_int)
+            self.assertEqual(str_to_int(int_to_str(card_int, True)), card_int)
+            self.assertEqual(str_to_int(card.display()), card_int)
+
+    def test_strings(self):
+        self.assertEqual(str_to_int("2C"), 0)
+        self.assertEqual(str_to_int("AS"), 51)
+        self.assertEqual(str_to_int("A of Spade"), 51)
+        self.assertEqual(int_to_str(51), convert_card_list_str([Card('A', 'Spade')])[0])
+        self.assertEqual(int_to_str(51, True), "ASpade")
+        self.assertRaises(ValueError, str_to_int, "1S")
+        self.assertRaises(ValueError, str_to_int, "AX")
+        self.assertRaises(ValueError, card_to_int, Card('11', 'Spade'))
+
+    def test_mask(self):
+        card_ints = [0, 13, 51]
+        mask = cards_to_mask(card_ints)
+        self.assertEqual(mask, 1 | 1 << 13 | 1 << 51)
+        self.assertEqual(mask_to_ints(mask), card_ints)
+
+    def test_relabel_suits(self):
+        # As Kh with spades and clubs swapped is Ac Kh, in card order
+        self.assertEqual(relabel_suits([str_to_int("AS"), str_to_int("KH")], (3, 1, 2, 0)), (str_to_int("KH"), str_to_int("AC")))
+        self.assertEqual(len(SUIT_PERMUTATIONS), 24)
@@ -0,0 +1,54 @@
+import unittest
+from deck_of_cards import Card, Board, Player
+from equity_cache import canonicalize, EquityCache, EQUITY_CACHE
+from poker_calculator import add_counts, simulate_counts, simulate_win_tie_loss
+
+class TestCanonicalize(unittest.TestCase):
+    def test_suit_relabelling(self):
+        board1 = Board([Card("J", "Spade"), Card("4", "Club"), Card("2", "Diamond")]).board_ints()
+        hands1 = [Player("Player 1", [Card("A", "Spade"), Card("K", "Heart")]).hand_ints(), Player("Player 2", [Card("Q", "Diamond"), Card("J", "Club")]).hand_ints()]
+        board2 = Board([Card("2", "Club"), Card("J", "Heart"), Card("4", "Diamond")]).board_ints()
+        hands2 = [Player("Player 1", [Card("K", "Spade"), Card("A", "Heart")]).hand_ints(), Player("Player 2", [Card("Q", "Club"), Card("J", "Diamond")]).hand_ints()]
+        self.assertEqual(canonicalize(board1, hands1), canonicalize(board2, hands2))
+
+    def test_different_spots(self):
+        board = Board([Card("J", "Spade"), Card("4", "Club"), Card("2", "Diamond")]).board_ints()
+        suited = [Player("Player 1", [Card("A", "Spade"), Card("K", "Spade")]).hand_ints(), []]
+        offsuit = [Player("Player 1", [Card("A", "Spade"), Card("K", "Heart")]).hand_ints(), []]
+        self.assertNotEqual(canonicalize(board, suited), canonicalize(board, offsuit))
+        # Player order is kept
+        self.assertNotEqual(canonicalize(board, suited), canonicalize(board, suited[::-1]))
+
+class TestEquityCache(unittest.TestCase):
+    def test_lru(self):
+        cache = EquityCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(cache.stats(), {"hits": 2, "misses": 1, "size": 2, "maxsize": 2})
+
+    def test_isomorphic_spots_hit(self):
+        EQUITY_CACHE.clear()
+        board1 = Board([Card("J", "Spade"), Card("4", "Club"), Card("2", "Diamond")])
+        players1 = [Player("Player 1", [Card("A", "Spade"), Card("K", "Heart")]), Player("Player 2", [Card("Q", "Diamond"), Card("J", "Club")])]
+        board2 = Board([Card("J", "Heart"), Card("4", "Diamond"), Card("2", "Club")])
+        players2 = [Player("Hero", [Card("A", "Heart"), Card("K", "Spade")]), Player("Villain", [Card("Q", "Club"), Card("J", "Diamond")])]
+        results1 = simulate_win_tie_loss(board1, players1)
+        results2 = simulate_win_tie_loss(board2, players2)
+        self.assertEqual(results1["Player 1"], results2["Hero"])
+        self.assertEqual(EQUITY_CACHE.stats()["hits"], 1)
+        self.assertEqual(EQUITY_CACHE.stats()["misses"], 1)
+
+    def test_results_copied(self):
+        EQUITY_CACHE.clear()
+        board = Board([Card("J", "Spade"), Card("4", "Club"), Card("2", "Diamond")])
+        players = [Player("Player 1", [Card("A", "Spade"), Card("K", "Heart")]), Player("Player 2", [Card("Q", "Diamond"), Card("J", "Club")])]
+        counts = simulate_counts(board, players)
+        add_counts(counts, counts)
+        cached = simulate_counts(board, players)
+        add_counts(cached, cached)
+        self.assertEqual(simulate_counts(board, players), [[count / 2 for count in player_counts] for player_counts in counts])
+        self.assertEqual(EQUITY_CACHE.stats()["hits"], 2)
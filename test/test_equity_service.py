@@ -0,0 +1,42 @@
+import unittest
+from deck_of_cards import Card, Board
+from equity_service import EquityBatcher, MAX_RUNOUTS, request_work, runouts_for_error
+from range_equity import range_combos, combo_equity, runout_strengths
+
+class TestRunoutsForError(unittest.TestCase):
+    def test_runouts_for_error(self):
+        self.assertEqual(runouts_for_error(0.5), 10000)
+        self.assertEqual(runouts_for_error(1), 2500)
+        self.assertEqual(runouts_for_error(0.001), MAX_RUNOUTS)
+
+    def test_request_work(self):
+        combos, opponent_combos = range_combos(["AA"]), range_combos(["KK", "QQ"])
+        self.assertEqual(request_work(combos, opponent_combos, (), 0, 1000), 1000 * (6 + 12 + 72 // 50))
+        # 48 rivers on a turn board
+        self.assertEqual(request_work(combos, opponent_combos, (36, 9, 50, 22), 0, 1000), 48 * (6 + 12 + 72 // 50))
+
+class TestEquityBatcher(unittest.TestCase):
+    def test_coalesced_requests(self):
+        batcher = EquityBatcher(window=0.05)
+        board_ints = tuple(Board([Card("J", "Spade"), Card("4", "Club"), Card("2", "Diamond"), Card("9", "Heart")]).board_ints())
+        ranges = [(["QQ"], ["AKs"]), (["QQ"], ["AKo"]), (["TT+"], ["JTs", "KJs"])]
+        requests = [(range_combos(hand_range), range_combos(opponent_range)) for hand_range, opponent_range in ranges]
+        futures = [batcher.submit(combos, opponent_combos, board_ints, 0, 100) for combos, opponent_combos in requests]
+        results = [future.result(timeout=10) for future in futures]
+        # QQ, AKs, AKo, TT, JJ, KK, AA, JTs and KJs less the combos using the Jack of Spades on the board
+        self.assertEqual(len(runout_strengths(board_ints, 0, 100, None).columns), 6 + 4 + 12 + 6 + 3 + 6 + 6 + 3 + 3)
+        for (combos, opponent_combos), result in zip(requests, results):
+            self.assertEqual(result, combo_equity(combos, opponent_combos, board_ints, 0, 100, None))
+
+    def test_error(self):
+        batcher = EquityBatcher()
+        future = batcher.submit({}, range_combos(["AA"]))
+        self.assertRaises(ValueError, future.result, 10)
+
+    def test_large_requests(self):
+        batcher = EquityBatcher(max_batched_work=1000, max_work=100000)
+        combos, opponent_combos = range_combos(["AA"]), range_combos(["KK"])
+        self.assertRaises(ValueError, batcher.submit, combos, opponent_combos, (), 0, 10000)
+        # Resolved off the coalescing thread, same result
+        future = batcher.submit(combos, opponent_combos, (), 0, 1000)
+        self.assertEqual(future.result(timeout=10), combo_equity(combos, opponent_combos, (), 0, 1000, None))
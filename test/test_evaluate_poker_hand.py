@@ -1,6 +1,10 @@
 import unittest
 
-from evaluate_poker_hand import evaluate_five_card_hand, evaluate_hand, HandRank, evaluate_two_card_hand, sort_hands_str
+import random
+from itertools import combinations
+import numpy as np
+
+from evaluate_poker_hand import evaluate_five_card_hand, evaluate_hand, HandRank, evaluate_two_card_hand, sort_hands_str, evaluate_cards, encode_strength, decode_strength, evaluate_ints, evaluate_hand_batch
 from deck_of_cards import Card, Deck, Board, Player
 
 ranks = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K' , 'A']
@@ -245,6 +249,48 @@ class TestEvaluateHand(unittest.TestCase):
         hand15 = [Card('T', 'Heart'), Card('A', 'Club')]
         self.assertEqual(evaluate_hand(board15, hand15), (HandRank['HIGH_CARD'],[14,10,9,7,4]))
 
+class TestEvaluateCards(unittest.TestCase):
+    def test_encode_decode(self):
+        hand = (HandRank['PAIR'], [4, 14, 3, 2])
+        self.assertEqual(decode_strength(encode_strength(*hand)), hand)
+        self.assertEqual(decode_strength(encode_strength(HandRank['ROYAL_FLUSH'], [])), (HandRank['ROYAL_FLUSH'], []))
+
+    def test_strength_order(self):
+        pair = encode_strength(HandRank['PAIR'], [13, 10, 9, 7])
+        weaker_pair = encode_strength(HandRank['PAIR'], [13, 10, 9, 6])
+        two_pair = encode_strength(HandRank['TWO_PAIR'], [3, 2, 4])
+        self.assertGreater(pair, weaker_pair)
+        self.assertGreater(two_pair, pair)
+
+    def test_flush_over_straight(self):
+        cards = [Card('9', 'Heart'), Card('7', 'Club'), Card('8', 'Diamond'), Card('3', 'Club'), Card('9', 'Club'), Card('6', 'Club'), Card('J', 'Club')]
+        self.assertEqual(decode_strength(evaluate_cards(cards)), (HandRank['FLUSH'], [11, 9, 7, 6, 3]))
+
+    def test_matches_five_card_combinations(self):
+        deck = Deck()
+        rng = random.Random(7)
+        for _ in range(500):
+            cards = rng.sample(deck.cards, rng.choice([5, 6, 7]))
+            best = max(evaluate_five_card_hand(list(five)) for five in combinations(cards, 5))
+            self.assertEqual(decode_strength(evaluate_cards(cards)), best)
+
+class TestEvaluateHandBatch(unittest.TestCase):
+    def test_matches_evaluate_ints(self):
+        rng = random.Random(11)
+        hands = [rng.sample(range(52), 7) for _ in range(2000)]
+        # Make sure flushes and straight flushes are in the batch
+        hands.append([48, 44, 40, 36, 32, 1, 2])
+        hands.append([3, 7, 11, 15, 19, 23, 27])
+        strengths = evaluate_hand_batch(np.array(hands))
+        self.assertEqual(strengths.shape, (len(hands),))
+        self.assertEqual(strengths.tolist(), [evaluate_ints(hand) for hand in hands])
+
+    def test_five_and_six_cards(self):
+        rng = random.Random(12)
+        for size in (5, 6):
+            hands = [rng.sample(range(52), size) for _ in range(500)]
+            self.assertEqual(evaluate_hand_batch(np.array(hands)).tolist(), [evaluate_ints(hand) for hand in hands])
+
 class TestSortHandsStr(unittest.TestCase):
     def test_ascending(self):
         hand_list = ['AA', 'Q9s', 'AKo', 'K9o', '77', 'J9o', '62s', 'Q2o', 'T9o', '88']
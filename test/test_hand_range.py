@@ -0,0 +1,110 @@
+import unittest
+import numpy as np
+from hand_range import COMBOS, Range, WeightedRange, combo_str, group_classes, group_combos
+from preflop_range_calculator import calculate_top_range_str, group_hands
+
+class TestGroupClasses(unittest.TestCase):
+    def test_groups(self):
+        self.assertEqual(group_classes("99+"), ("99", "TT", "JJ", "QQ", "KK", "AA"))
+        self.assertEqual(group_classes("22-44"), ("22", "33", "44"))
+        self.assertEqual(group_classes("KTs+"), ("KTs", "KJs", "KQs"))
+        self.assertEqual(group_classes("J8o-JTo"), ("J8o", "J9o", "JTo"))
+        self.assertEqual(group_classes("AKo"), ("AKo",))
+        self.assertEqual(group_classes("22-AA")[-1], "AA")
+
+    def test_reversed_ends(self):
+        self.assertEqual(group_classes("44-22"), group_classes("22-44"))
+        self.assertEqual(group_classes("KK-QQ"), ("QQ", "KK"))
+        self.assertEqual(group_classes("JTs-J8s"), group_classes("J8s-JTs"))
+
+    def test_unknown(self):
+        for group in ["AKx", "KAs", "A1s+", "99-", "J8s-QTs", ""]:
+            with self.assertRaises(ValueError):
+                group_classes(group)
+
+class TestRange(unittest.TestCase):
+    def test_parse(self):
+        hand_range = Range.parse("88+, A9s+, KTs-KQs, AKo")
+        self.assertEqual(len(hand_range), 7 + 5 + 3 + 1)
+        self.assertIn("KJs", hand_range)
+        self.assertNotIn("K9s", hand_range)
+        self.assertNotIn("bad", hand_range)
+        self.assertEqual(hand_range, Range(["88+", "A9s+", "KTs-KQs", "AKo"]))
+        self.assertEqual(hand_range.combos(), 7 * 6 + 8 * 4 + 12)
+
+    def test_print(self):
+        hand_range = Range.parse("88+, A9s+, KTs-KQs, AKo")
+        self.assertEqual(hand_range.groups(), ["88+", "A9s+", "KTs+", "AKo"])
+        self.assertEqual(str(hand_range), "88+, A9s+, KTs+, AKo")
+        self.assertEqual(Range.parse(str(hand_range)), hand_range)
+        self.assertEqual(Range().groups(), [])
+
+    def test_same_as_group_hands(self):
+        for percentage in range(0, 101, 5):
+            hands = calculate_top_range_str(percentage)
+            self.assertEqual(Range(hands).groups(), group_hands(hands))
+            self.assertEqual(Range(Range(hands).groups()), Range(hands))
+
+    def test_add_remove(self):
+        hand_range = Range()
+        hand_range.add("AKs")
+        hand_range.add("AKs")
+        self.assertEqual(list(hand_range), ["AKs"])
+        hand_range.remove("AKs")
+        with self.assertRaises(KeyError):
+            hand_range.remove("AKs")
+        hand_range.discard("AKs")
+        self.assertEqual(len(hand_range), 0)
+
+    def test_set_operations(self):
+        pairs = Range.parse("22+")
+        top = Range.parse("TT+, AKs")
+        self.assertEqual(pairs | top, Range.parse("22+, AKs"))
+        self.assertEqual(pairs & top, Range.parse("TT+"))
+        self.assertEqual(pairs - top, Range.parse("22-99"))
+        self.assertEqual(len(~Range()), 169)
+        self.assertEqual((~pairs).combos(), 1326 - 13 * 6)
+
+class TestWeightedRange(unittest.TestCase):
+    def test_parse(self):
+        weighted_range = WeightedRange.parse("QQ+, AKs, AKo:0.5, AsQs, AhQh:0.25")
+        self.assertEqual(weighted_range["AdKc"], 0.5)
+        self.assertEqual(weighted_range["KsAs"], 1.0)
+        self.assertEqual(weighted_range["AhQh"], 0.25)
+        self.assertEqual(weighted_range["AdQd"], 0.0)
+        self.assertEqual(weighted_range.combos(), 18 + 4 + 6 + 1 + 0.25)
+        self.assertEqual(weighted_range.to_range(), Range.parse("QQ+, AQs+, AKo"))
+        with self.assertRaises(KeyError):
+            weighted_range["AA"]
+
+    def test_print(self):
+        weighted_range = WeightedRange.parse("QQ+, AKs, AKo:0.5, AsQs, AhQh:0.25")
+        self.assertEqual(str(weighted_range), "QQ+, AKs, AhQh:0.25, AsQs, AKo:0.5")
+        self.assertEqual(WeightedRange.parse(str(weighted_range)), weighted_range)
+        self.assertEqual(combo_str(COMBOS.index((0, 4))), "3c2c")
+
+    def test_bad_notation(self):
+        for notation in ["AKo:2", "AsAs", "AKx", "AK:x"]:
+            with self.assertRaises(ValueError):
+                WeightedRange.parse(notation)
+        self.assertEqual(len(group_combos("AsKs")), 1)
+
+    def test_dead_cards(self):
+        weighted_range = WeightedRange.parse("AA, AKo:0.5")
+        ace_of_spades = 51
+        combos = weighted_range.combo_weights(1 << ace_of_spades)
+        self.assertEqual(len(combos), 3 + 9)
+        self.assertEqual(sorted(set(combos.values())), [0.5, 1.0])
+        self.assertEqual(weighted_range.live_weights().sum(), weighted_range.combos())
+
+    def test_sample(self):
+        weighted_range = WeightedRange.parse("AA, AKo:0.5")
+        combos = weighted_range.sample(np.random.default_rng(0), 20000)
+        aces = np.isin(combos, list(group_combos("AA"))).mean()
+        self.assertAlmostEqual(aces, 0.5, delta=0.02) # 6 AA against 12 AKo at half weight
+        self.assertTrue(np.isin(combos, list(group_combos("AA")) + list(group_combos("AKo"))).all())
+        with self.assertRaises(ValueError):
+            WeightedRange().sample(np.random.default_rng(0), 10)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+import concurrent.futures
+from deck_of_cards import Card, Board, Player
+from equity_cache import EQUITY_CACHE
+from evaluate_poker_hand import evaluate_hand_batch
+from instrumentation import METRICS, Metrics, env_enabled, prometheus_text
+from poker_calculator import simulate_win_tie_loss, simulate_street_equity
+import numpy as np
+
+class TestMetrics(unittest.TestCase):
+    def test_disabled(self):
+        metrics = Metrics()
+        with metrics.timer("deal"):
+            pass
+        self.assertEqual(metrics.snapshot(), {"counters": {}, "timings": {}})
+
+    def test_merge(self):
+        metrics = Metrics(enabled=True)
+        metrics.count("trials", 10)
+        with metrics.timer("deal"):
+            pass
+        other = Metrics(enabled=True)
+        other.count("trials", 5)
+        other.add_time("deal", 1.0)
+        metrics.merge(other.snapshot())
+        self.assertEqual(metrics.snapshot()["counters"], {"trials": 15})
+        self.assertGreater(metrics.snapshot()["timings"]["deal"], 1.0)
+        stats = metrics.stats()
+        self.assertEqual(stats["counters"]["evaluations"], 0)
+        self.assertEqual(stats["timings"]["showdown"], 0.0)
+
+    def test_env_enabled(self):
+        for value in ["1", "true", "True", "yes", "on"]:
+            self.assertTrue(env_enabled(value))
+        for value in ["", "0", "false", "no", "off"]:
+            self.assertFalse(env_enabled(value))
+
+    def test_prometheus_text(self):
+        metrics = Metrics(enabled=True)
+        metrics.count("trials", 3)
+        text = prometheus_text(metrics.stats())
+        self.assertIn("poker_trials_total 3\n", text)
+        self.assertIn('poker_phase_seconds_total{phase="deal"} 0.000000000\n', text)
+        self.assertIn("# TYPE poker_equity_cache_size gauge\n", text)
+
+class TestEngineInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.board = Board([Card("J", "Spade"), Card("4", "Club"), Card("2", "Diamond")])
+        self.players = [Player("Player 1", [Card("A", "Spade"), Card("K", "Heart")]),
+                        Player("Player 2", [Card("Q", "Diamond"), Card("J", "Club")])]
+        METRICS.reset()
+        METRICS.enable()
+
+    def tearDown(self):
+        METRICS.disable()
+        METRICS.reset()
+
+    def test_simulation(self):
+        simulate_win_tie_loss(self.board, self.players, n=2500, seed=1, exact=False, use_cache=False)
+        stats = METRICS.stats()
+        self.assertEqual(stats["counters"], {"simulations": 1, "trials": 2500, "evaluations": 5000, "showdowns": 2500})
+        for phase in ["deal", "evaluate", "showdown", "aggregate", "simulate"]:
+            self.assertGreater(stats["timings"][phase], 0)
+
+    def test_streets(self):
+        simulate_street_equity(Board(), self.players, n=1000, seed=1)
+        counters = METRICS.stats()["counters"]
+        self.assertEqual(counters["trials"], 1000)
+        self.assertEqual(counters["showdowns"], 4000)
+        self.assertEqual(counters["evaluations"], 8000)
+
+    def test_executor(self):
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            simulate_win_tie_loss(self.board, self.players, n=3000, seed=1, exact=False, use_cache=False, executor=executor)
+        self.assertEqual(METRICS.stats()["counters"]["trials"], 3000)
+
+    def test_same_results(self):
+        metered = simulate_win_tie_loss(self.board, self.players, n=2000, seed=1, exact=False, use_cache=False)
+        METRICS.disable()
+        self.assertEqual(simulate_win_tie_loss(self.board, self.players, n=2000, seed=1, exact=False, use_cache=False), metered)
+
+    def test_cache_hits(self):
+        EQUITY_CACHE.clear()
+        simulate_win_tie_loss(self.board, self.players)
+        simulate_win_tie_loss(self.board, self.players)
+        self.assertEqual(METRICS.stats()["equity_cache"]["hits"], 1)
+        self.assertEqual(METRICS.stats()["counters"]["simulations"], 2)
+
+    def test_batch_evaluation(self):
+        evaluate_hand_batch(np.array([[0, 1, 2, 3, 4, 5, 6]] * 10))
+        self.assertEqual(METRICS.stats()["counters"]["evaluations"], 10)
+
+    def test_disabled(self):
+        METRICS.disable()
+        simulate_win_tie_loss(self.board, self.players, n=1000, seed=1, exact=False, use_cache=False)
+        self.assertEqual(METRICS.stats()["counters"]["trials"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
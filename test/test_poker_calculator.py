@@ -1,6 +1,9 @@
 import unittest
-from evaluate_poker_hand import HandRank
-from poker_calculator import compare_single_hand_rank, compare_hand_ranks, evaluate_hand_ranks, simulate_win_tie_loss
+import concurrent.futures
+import numpy as np
+from evaluate_poker_hand import HandRank, encode_strength
+from poker_calculator import compare_single_hand_rank, compare_hand_ranks, evaluate_hand_ranks, simulate_win_tie_loss, run_trials, enumerate_runouts, estimate_win_tie_loss, simulate_chunk, simulate_equity, new_counts, resolve_showdown, simulate_street_equity, run_street_trials, simulate_hand_report, seed_sequence, chunk_seed, deal_batch, deal_range_batch
+from hand_range import WeightedRange
 from deck_of_cards import Player, Card, Board
 
 class TestCompareSingleHandRank(unittest.TestCase):
@@ -121,6 +124,24 @@ class TestCompareHandRanks(unittest.TestCase):
         results = compare_hand_ranks(players)
         self.assertEqual(results, expected_results)
 
+    def test_split_pot(self):
+        player1 = Player("Player 1")
+        player2 = Player("Player 2")
+        player3 = Player("Player 3")
+
+        players = {
+            player1: encode_strength(HandRank['STRAIGHT'], [10]),
+            player2: encode_strength(HandRank['STRAIGHT'], [10]),
+            player3: encode_strength(HandRank['TWO_PAIR'], [14, 13, 12]),
+        }
+
+        expected_results = {
+            player1: "Tie",
+            player2: "Tie",
+            player3: "Loss",
+        }
+        self.assertEqual(compare_hand_ranks(players), expected_results)
+
 class TestEvaluateHandRanks(unittest.TestCase):
     def test_no_board(self):
         player1 = Player("Player 1", [Card("A", "Spade"), Card("K", "Heart")])
@@ -131,8 +152,8 @@ class TestEvaluateHandRanks(unittest.TestCase):
         hand_ranks = evaluate_hand_ranks(board, players)
 
         self.assertEqual(len(hand_ranks), 2)
-        self.assertEqual(hand_ranks[player1], (0, [14, 13])) 
-        self.assertEqual(hand_ranks[player2], (0, [12, 11]))  
+        self.assertEqual(hand_ranks[player1], encode_strength(0, [14, 13])) 
+        self.assertEqual(hand_ranks[player2], encode_strength(0, [12, 11]))  
 
         player3 = Player("Player 3", [Card("3", "Spade"), Card("Q", "Heart")])
         player4 = Player("Player 4", [Card("3", "Diamond"), Card("9", "Club")])
@@ -147,15 +168,15 @@ class TestEvaluateHandRanks(unittest.TestCase):
         hand_ranks2 = evaluate_hand_ranks(board, players)
 
         self.assertEqual(len(hand_ranks2), 9)
-        self.assertEqual(hand_ranks2[player1], (0, [14, 13])) 
-        self.assertEqual(hand_ranks2[player2], (0, [12, 11]))  
-        self.assertEqual(hand_ranks2[player3], (0, [12, 3])) 
-        self.assertEqual(hand_ranks2[player4], (0, [9, 3])) 
-        self.assertEqual(hand_ranks2[player5], (0, [14, 13])) 
-        self.assertEqual(hand_ranks2[player6], (0, [11, 5]))  
-        self.assertEqual(hand_ranks2[player7], (0, [13, 10])) 
-        self.assertEqual(hand_ranks2[player8], (0, [13, 8])) 
-        self.assertEqual(hand_ranks2[player9], (0, [11, 2])) 
+        self.assertEqual(hand_ranks2[player1], encode_strength(0, [14, 13])) 
+        self.assertEqual(hand_ranks2[player2], encode_strength(0, [12, 11]))  
+        self.assertEqual(hand_ranks2[player3], encode_strength(0, [12, 3])) 
+        self.assertEqual(hand_ranks2[player4], encode_strength(0, [9, 3])) 
+        self.assertEqual(hand_ranks2[player5], encode_strength(0, [14, 13])) 
+        self.assertEqual(hand_ranks2[player6], encode_strength(0, [11, 5]))  
+        self.assertEqual(hand_ranks2[player7], encode_strength(0, [13, 10])) 
+        self.assertEqual(hand_ranks2[player8], encode_strength(0, [13, 8])) 
+        self.assertEqual(hand_ranks2[player9], encode_strength(0, [11, 2])) 
 
     def test_with_flop(self):
         player1 = Player("Player 1", [Card("A", "Diamonds"), Card("A", "Clubs")])
@@ -166,8 +187,8 @@ class TestEvaluateHandRanks(unittest.TestCase):
         hand_ranks = evaluate_hand_ranks(board, players)
 
         self.assertEqual(len(hand_ranks), 2)
-        self.assertEqual(hand_ranks[player1], (1, [14, 12, 11, 10])) 
-        self.assertEqual(hand_ranks[player2], (1, [13, 12, 11, 10]))
+        self.assertEqual(hand_ranks[player1], encode_strength(1, [14, 12, 11, 10])) 
+        self.assertEqual(hand_ranks[player2], encode_strength(1, [13, 12, 11, 10]))
 
         board2 = Board([Card("J", "Spade"), Card("4", "Club"), Card("2", "Diamond")])
         player3 = Player("Player 3", [Card("A", "Spade"), Card("K", "Heart")])
@@ -177,8 +198,18 @@ class TestEvaluateHandRanks(unittest.TestCase):
         hand_ranks2 = evaluate_hand_ranks(board2, players2)
 
         self.assertEqual(len(hand_ranks2), 2)
-        self.assertEqual(hand_ranks2[player3], (0, [14, 13, 11, 4, 2])) 
-        self.assertEqual(hand_ranks2[player4], (1, [11, 12, 4, 2]))
+        self.assertEqual(hand_ranks2[player3], encode_strength(0, [14, 13, 11, 4, 2])) 
+        self.assertEqual(hand_ranks2[player4], encode_strength(1, [11, 12, 4, 2]))
+
+    def test_best_five_of_seven(self):
+        player1 = Player("Player 1", [Card("A", "Spade"), Card("K", "Spade")])
+        player2 = Player("Player 2", [Card("9", "Heart"), Card("8", "Club")])
+        board = Board([Card("Q", "Spade"), Card("J", "Spade"), Card("2", "Spade"), Card("T", "Diamond"), Card("3", "Heart")])
+
+        hand_ranks = evaluate_hand_ranks(board, [player1, player2])
+
+        self.assertEqual(hand_ranks[player1], encode_strength(HandRank['FLUSH'], [14, 13, 12, 11, 2]))
+        self.assertEqual(hand_ranks[player2], encode_strength(HandRank['STRAIGHT'], [12]))
         
 
 
@@ -191,14 +222,20 @@ class TestSimulateWinTieLoss(unittest.TestCase):
         ]
         results = simulate_win_tie_loss(board, players, n=10000)
 
-        # Assert that the win, tie, and loss percentages are within an acceptable range
-        self.assertAlmostEqual(results["Player 1"][0], 0.0, delta=0.05)
-        self.assertAlmostEqual(results["Player 1"][1], 100.0, delta=0.05)
-        self.assertAlmostEqual(results["Player 1"][2], 0.0, delta=0.05)
+        # Assert that the win, tie, and loss percentages are within an acceptable range,
+        # each side only wins by making a flush in one of its suits
+        self.assertAlmostEqual(results["Player 1"][0], 2.17, delta=0.75)
+        self.assertAlmostEqual(results["Player 1"][1], 95.65, delta=1.5)
+        self.assertAlmostEqual(results["Player 1"][2], 2.17, delta=0.75)
+
+        self.assertAlmostEqual(results["Player 2"][0], 2.17, delta=0.75)
+        self.assertAlmostEqual(results["Player 2"][1], 95.65, delta=1.5)
+        self.assertAlmostEqual(results["Player 2"][2], 2.17, delta=0.75)
 
-        self.assertAlmostEqual(results["Player 2"][0], 0.0, delta=0.05)
-        self.assertAlmostEqual(results["Player 2"][1], 100.0, delta=0.05)
-        self.assertAlmostEqual(results["Player 2"][2], 0.0, delta=0.05)
+    def test_random_opponent(self):
+        players = [Player("Player 1", [Card("A", "Spade"), Card("A", "Heart")]), Player("Player 2")]
+        results = simulate_win_tie_loss(Board(), players, n=20000, seed=5)
+        self.assertAlmostEqual(results["Player 1"][0], 85.2, delta=1)
 
     def test_flop(self):
         board = Board([Card("J", "Spade"), Card("4", "Club"), Card("2", "Diamond")])
@@ -215,4 +252,292 @@ class TestSimulateWinTieLoss(unittest.TestCase):
 
         self.assertAlmostEqual(results["Player 2"][0], 75.0, delta=5.00)
         self.assertAlmostEqual(results["Player 2"][1], 0.0, delta=5.00)
-        self.assertAlmostEqual(results["Player 2"][2], 25.0, delta=5.00)
\ No newline at end of file
+        self.assertAlmostEqual(results["Player 2"][2], 25.0, delta=5.00)
+
+    def test_seed_reproducible(self):
+        board = Board([Card("J", "Spade"), Card("4", "Club"), Card("2", "Diamond")])
+        players = [
+            Player("Player 1", [Card("A", "Spade"), Card("K", "Heart")]),
+            Player("Player 2", [Card("Q", "Diamond"), Card("J", "Club")])
+        ]
+        results1 = simulate_win_tie_loss(board, players, n=3000, seed=42)
+        results2 = simulate_win_tie_loss(board, players, n=3000, seed=42)
+        self.assertEqual(results1, results2)
+
+    def test_workers(self):
+        board_ints = Board([Card("J", "Spade"), Card("4", "Club"), Card("2", "Diamond")]).board_ints()
+        hands = [Player("Player 1", [Card("A", "Spade"), Card("K", "Heart")]).hand_ints(), []]
+        counts1 = run_trials(board_ints, hands, 2500, workers=1, seed=7)
+        counts2 = run_trials(board_ints, hands, 2500, workers=2, seed=7)
+        self.assertEqual(counts1, counts2)
+        for player_counts in counts1:
+            self.assertEqual(sum(player_counts[:3]), 2500)
+
+    def test_exact_turn(self):
+        board = Board([Card("J", "Spade"), Card("4", "Club"), Card("2", "Diamond"), Card("A", "Heart")])
+        hands = [[Card("A", "Spade"), Card("K", "Heart")], [Card("Q", "Diamond"), Card("J", "Club")]]
+        players = [Player("Player 1", hands[0]), Player("Player 2", hands[1])]
+        counts = enumerate_runouts(board.board_ints(), [player.hand_ints() for player in players])
+        self.assertEqual(sum(counts[0][:3]), 44)
+        # Player 2 needs one of the three Queens or two Jacks left
+        self.assertEqual(counts[1], [5, 0, 39, 5.0])
+
+        results = simulate_win_tie_loss(board, players, exact=True)
+        self.assertEqual(results["Player 2"], (round(5 / 44 * 100, 2), 0.0, round(39 / 44 * 100, 2)))
+
+    def test_dead_cards(self):
+        board = Board([Card("J", "Spade"), Card("4", "Club"), Card("2", "Diamond"), Card("A", "Heart")])
+        players = [
+            Player("Player 1", [Card("A", "Spade"), Card("K", "Heart")]),
+            Player("Player 2", [Card("Q", "Diamond"), Card("J", "Club")])
+        ]
+        # Two of the Queens were folded, three outs left out of 42 rivers
+        dead_cards = [Card("Q", "Spade"), Card("Q", "Heart")]
+        results = simulate_win_tie_loss(board, players, exact=True, dead_cards=dead_cards)
+        self.assertEqual(results["Player 2"], (round(3 / 42 * 100, 2), 0.0, round(39 / 42 * 100, 2)))
+        results = simulate_win_tie_loss(board, players, n=4000, seed=1, exact=False, dead_cards=dead_cards)
+        self.assertAlmostEqual(results["Player 2"][0], 3 / 42 * 100, delta=1.5)
+
+        results, _, trials = estimate_win_tie_loss(board, players, max_trials=2000, seed=1, dead_cards=dead_cards)
+        self.assertAlmostEqual(results["Player 2"][0], 3 / 42 * 100, delta=2)
+
+    def test_card_used_twice(self):
+        board = Board([Card("J", "Spade"), Card("4", "Club"), Card("2", "Diamond")])
+        players = [Player("Player 1", [Card("A", "Spade"), Card("K", "Heart")]), Player("Player 2")]
+        self.assertRaises(ValueError, simulate_win_tie_loss, board, players, dead_cards=[Card("J", "Spade")])
+        self.assertRaises(ValueError, simulate_win_tie_loss, board, players, dead_cards=[Card("A", "Spade")])
+
+    def test_exact_needs_hands(self):
+        board = Board([Card("J", "Spade"), Card("4", "Club"), Card("2", "Diamond")])
+        players = [Player("Player 1", [Card("A", "Spade"), Card("K", "Heart")]), Player("Player 2", [])]
+        self.assertRaises(ValueError, simulate_win_tie_loss, board, players, exact=True)
+
+    def test_random_hands_redealt(self):
+        # Two random hands are the same matchup, each trial deals new hands to both
+        players = [Player("Player 1"), Player("Player 2")]
+        results = simulate_win_tie_loss(Board(), players, n=20000, seed=1, use_cache=False)
+        self.assertAlmostEqual(results["Player 1"][0], results["Player 2"][0], delta=2)
+        self.assertEqual(players[0].hand, [])
+        self.assertEqual(players[1].hand, [])
+
+    def test_threads(self):
+        board_ints = Board([Card("J", "Spade"), Card("4", "Club"), Card("2", "Diamond")]).board_ints()
+        hands = [Player("Player 1", [Card("A", "Spade"), Card("K", "Heart")]).hand_ints(), [], []]
+        expected = run_trials(board_ints, hands, 3000, seed=3)
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            results = list(executor.map(lambda _: run_trials(board_ints, hands, 3000, seed=3), range(4)))
+        for counts in results:
+            self.assertEqual(counts, expected)
+
+class TestSimulateEquity(unittest.TestCase):
+    def test_split_pot(self):
+        # Everyone plays the broadway straight on the board
+        board = Board([Card("A", "Spade"), Card("K", "Heart"), Card("Q", "Diamond"), Card("J", "Club"), Card("T", "Spade")])
+        players = [
+            Player("Player 1", [Card("2", "Spade"), Card("3", "Heart")]),
+            Player("Player 2", [Card("4", "Diamond"), Card("5", "Club")]),
+            Player("Player 3", [Card("6", "Spade"), Card("7", "Heart")])
+        ]
+        self.assertEqual(simulate_equity(board, players), {"Player 1": 33.33, "Player 2": 33.33, "Player 3": 33.33})
+
+    def test_multiway(self):
+        players = [Player(f"Player {i + 1}") for i in range(6)]
+        players[0].hand = [Card("A", "Spade"), Card("A", "Heart")]
+        equities = simulate_equity(Board(), players, n=5000, seed=2)
+        self.assertAlmostEqual(sum(equities.values()), 100, delta=0.1)
+        # AA against five random hands
+        self.assertAlmostEqual(equities["Player 1"], 49.2, delta=3)
+
+class TestSimulateStreetEquity(unittest.TestCase):
+    def test_preflop(self):
+        players = [
+            Player("Player 1", [Card("A", "Spade"), Card("A", "Heart")]),
+            Player("Player 2", [Card("K", "Spade"), Card("K", "Heart")])
+        ]
+        curves = simulate_street_equity(Board(), players, n=5000, seed=4)
+        self.assertEqual(list(curves["Player 1"]), ["Preflop", "Flop", "Turn", "River"])
+        self.assertEqual(curves["Player 1"]["Preflop"], 100.0)
+        self.assertAlmostEqual(curves["Player 1"]["River"], 82.4, delta=2)
+
+    def test_flop(self):
+        board = Board([Card("J", "Spade"), Card("4", "Club"), Card("2", "Diamond")])
+        players = [
+            Player("Player 1", [Card("A", "Spade"), Card("K", "Heart")]),
+            Player("Player 2", [Card("Q", "Diamond"), Card("J", "Club")])
+        ]
+        curves = simulate_street_equity(board, players, n=5000, seed=4)
+        self.assertEqual(curves["Player 2"]["Flop"], 100.0)
+        self.assertLess(curves["Player 1"]["Turn"], curves["Player 1"]["River"])
+        self.assertNotIn("Preflop", curves["Player 2"])
+
+    def test_street_counts(self):
+        hands = [[51, 46], []]
+        street_counts = run_street_trials([], hands, 2000, (0, 3, 4, 5), seed=6)
+        # The river is scored on the same runouts as a river only run
+        self.assertEqual(street_counts[3], run_trials([], hands, 2000, seed=6))
+        for counts in street_counts:
+            self.assertEqual(sum(counts[0][:3]), 2000)
+
+class TestSimulateHandReport(unittest.TestCase):
+    def test_outs(self):
+        board = Board([Card("J", "Spade"), Card("4", "Club"), Card("2", "Diamond"), Card("A", "Heart")])
+        players = [
+            Player("Player 1", [Card("A", "Spade"), Card("K", "Heart")]),
+            Player("Player 2", [Card("Q", "Diamond"), Card("J", "Club")])
+        ]
+        report = simulate_hand_report(board, players, n=5000, seed=1)
+        self.assertEqual(list(report["Player 2"]), ["Turn", "River"])
+        self.assertEqual(report["Player 2"]["Turn"]["categories"]["PAIR"], 100.0)
+        self.assertNotIn("outs", report["Player 2"]["Turn"])
+
+        # The three Queens and two Jacks left, every time they come
+        river = report["Player 2"]["River"]
+        self.assertEqual(river["outs"], {"JD": 100.0, "JH": 100.0, "QC": 100.0, "QH": 100.0, "QS": 100.0})
+        self.assertEqual(river["out_percentage"], river["equity"])
+        self.assertEqual(report["Player 1"]["River"]["outs"], {})
+        # Pairing the board improves to two pair without winning
+        self.assertEqual(river["improving_cards"]["AC"], 100.0)
+        self.assertAlmostEqual(sum(river["categories"].values()), 100, delta=0.1)
+
+    def test_stats_counts(self):
+        hands = [[51, 46], []]
+        results = run_street_trials([36, 9, 0], hands, 2000, (3, 4, 5), seed=6, collect_stats=True)
+        # Same showdowns with or without the stats
+        self.assertEqual(results[:3], run_street_trials([36, 9, 0], hands, 2000, (3, 4, 5), seed=6))
+        flop_stats, turn_stats, river_stats = results[3:]
+        self.assertEqual(sum(flop_stats.dealt), 0)
+        self.assertEqual(sum(turn_stats.dealt), 2000)
+        self.assertEqual(sum(river_stats.categories[1]), 2000)
+
+class TestResolveShowdown(unittest.TestCase):
+    def test_one_pass(self):
+        counts = new_counts(4)
+        resolve_showdown([7, 9, 9, 9], counts)
+        resolve_showdown([9, 7, 7, 3], counts)
+        self.assertEqual(counts[0], [1, 0, 1, 1.0])
+        self.assertEqual(counts[1][:3], [0, 1, 1])
+        self.assertAlmostEqual(counts[1][3], 1 / 3)
+
+class TestSeeds(unittest.TestCase):
+    def test_chunk_seed(self):
+        root_seed = seed_sequence(5)
+        children = root_seed.spawn(3)
+        for i, child in enumerate(children):
+            self.assertEqual(chunk_seed(seed_sequence(5), i).generate_state(4).tolist(), child.generate_state(4).tolist())
+
+    def test_seed_sequence(self):
+        hands = [[51, 46], [], []]
+        counts = run_trials([], hands, 3000, seed=np.random.SeedSequence(9))
+        self.assertEqual(counts, run_trials([], hands, 3000, workers=3, seed=9))
+        self.assertNotEqual(counts, run_trials([], hands, 3000, seed=10))
+
+    def test_deal_batch(self):
+        rng = np.random.default_rng(0)
+        live = np.arange(10, 52)
+        deals = deal_batch(rng, live, 500, 9)
+        self.assertEqual(len(deals), 500)
+        for dealt in deals:
+            self.assertEqual(len(set(dealt)), 9)
+            self.assertTrue(all(10 <= card < 52 for card in dealt))
+
+class TestSimulateChunk(unittest.TestCase):
+    def test_full_board(self):
+        board_ints = Board([Card("J", "Spade"), Card("4", "Club"), Card("2", "Diamond"), Card("9", "Heart"), Card("Q", "Club")]).board_ints()
+        hands = [Player("Player 1", [Card("A", "Spade"), Card("K", "Heart")]).hand_ints(), Player("Player 2", [Card("Q", "Diamond"), Card("J", "Club")]).hand_ints()]
+        self.assertEqual(simulate_chunk(board_ints, hands, 500, 11), [[0, 0, 500, 0.0], [500, 0, 0, 500.0]])
+
+    def test_counts(self):
+        hands = [Player("Player 1", [Card("A", "Spade"), Card("K", "Heart")]).hand_ints(), [], []]
+        counts = simulate_chunk([], hands, 500, 11)
+        for player_counts in counts:
+            self.assertEqual(sum(player_counts[:3]), 500)
+        # Every pot is handed out in full, split pots included
+        self.assertAlmostEqual(sum(player_counts[3] for player_counts in counts), 500)
+        self.assertEqual(counts, simulate_chunk([], hands, 500, 11))
+
+class TestRanges(unittest.TestCase):
+    def setUp(self):
+        self.players = [Player("Player 1", [Card("A", "Spade"), Card("A", "Heart")]), Player("Player 2")]
+
+    def test_full_range(self):
+        # Every combo at the same weight is a random hand
+        equity = simulate_equity(Board(), self.players, n=20000, seed=1, ranges={"Player 2": WeightedRange(np.ones(1326))})
+        self.assertAlmostEqual(equity["Player 1"], 85.2, delta=1.0)
+
+    def test_weights(self):
+        kings = simulate_equity(Board(), self.players, n=20000, seed=1, ranges={"Player 2": WeightedRange.parse("KK")})
+        self.assertAlmostEqual(kings["Player 1"], 82.0, delta=1.0)
+        # 6 KK combos and 12 72o combos at half weight: half the hands are KK
+        mixed = simulate_equity(Board(), self.players, n=20000, seed=1, ranges={"Player 2": WeightedRange.parse("KK, 72o:0.5")})
+        self.assertAlmostEqual(mixed["Player 1"], (82.0 + 88.0) / 2, delta=1.0)
+
+    def test_blocked_combos(self):
+        # Player 1's aces and the Kc on the board leave AdAc and AdKd, AdAc splits nearly always
+        board = Board([Card("K", "Club"), Card("7", "Diamond"), Card("2", "Heart")])
+        ranges = {"Player 2": WeightedRange.parse("AA, AKs")}
+        win_tie_loss = simulate_win_tie_loss(board, self.players, n=6000, seed=2, ranges=ranges)
+        self.assertAlmostEqual(win_tie_loss["Player 2"][1], 49.0, delta=3.0)
+
+    def test_deal_range_batch(self):
+        live = np.array([i for i in range(52) if i not in (48, 49)], dtype=np.int64)
+        weights = [np.cumsum(WeightedRange.parse("KK, QQ").live_weights(1 << 48 | 1 << 49)),
+                   np.cumsum(WeightedRange.parse("KK").live_weights(1 << 48 | 1 << 49))]
+        rows = deal_range_batch(np.random.default_rng(0), live, 500, 5, weights)
+        for row in rows:
+            self.assertEqual(len(set(row)), 9)
+            self.assertTrue(all(44 <= card < 48 for card in row[2:4])) # Kings
+            self.assertNotIn(48, row)
+
+    def test_workers(self):
+        ranges = {"Player 2": WeightedRange.parse("QQ+, AKs")}
+        expected = simulate_equity(Board(), self.players, n=3000, seed=5, ranges=ranges)
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            self.assertEqual(simulate_equity(Board(), self.players, n=3000, seed=5, ranges=ranges, executor=executor), expected)
+
+    def test_errors(self):
+        three_players = self.players + [Player("Player 3")]
+        with self.assertRaises(ValueError):
+            simulate_equity(Board(), self.players, n=100, ranges={"Player 2": WeightedRange.parse("AsAh")})
+        with self.assertRaises(ValueError):
+            simulate_equity(Board(), three_players, n=100, ranges={"Player 2": WeightedRange.parse("KdKc"),
+                                                                   "Player 3": WeightedRange.parse("KdKs")})
+        with self.assertRaises(ValueError):
+            simulate_equity(Board(), self.players, n=100, ranges={"Player 1": WeightedRange.parse("KK")})
+        with self.assertRaises(ValueError):
+            simulate_equity(Board(), self.players, n=100, exact=True, ranges={"Player 2": WeightedRange.parse("KK")})
+
+class TestEstimateWinTieLoss(unittest.TestCase):
+    def test_converges(self):
+        players = [
+            Player("Player 1", [Card("A", "Spade"), Card("A", "Heart")]),
+            Player("Player 2", [Card("7", "Spade"), Card("2", "Heart")])
+        ]
+        results, errors, trials = estimate_win_tie_loss(Board([]), players, target_error=1.0, time_budget=30, seed=3)
+        self.assertLessEqual(max(errors["Player 1"]), 1.0)
+        self.assertLess(trials, 10000)
+        self.assertAlmostEqual(results["Player 1"][0], 88.0, delta=4.0)
+
+    def test_max_trials(self):
+        players = [
+            Player("Player 1", [Card("A", "Spade"), Card("K", "Heart")]),
+            Player("Player 2", [Card("Q", "Spade"), Card("Q", "Heart")])
+        ]
+        results, errors, trials = estimate_win_tie_loss(Board([]), players, target_error=0.01, time_budget=30, max_trials=2500, workers=2, seed=3)
+        self.assertEqual(trials, 2500)
+        # Same chunks as a fixed size run with the same seed
+        counts = run_trials([], [player.hand_ints() for player in players], 2500, seed=3)
+        self.assertEqual(results["Player 2"][0], round(counts[1][0] / 2500 * 100, 2))
+
+    def test_no_trials(self):
+        players = [Player("Player 1", [Card("A", "Spade"), Card("K", "Heart")]), Player("Player 2", [])]
+        self.assertRaises(ValueError, estimate_win_tie_loss, Board([]), players, max_trials=0)
+
+    def test_workers_same_result(self):
+        players = [
+            Player("Player 1", [Card("A", "Spade"), Card("K", "Heart")]),
+            Player("Player 2", [Card("Q", "Spade"), Card("Q", "Heart")])
+        ]
+        # Checked after every chunk, so extra workers only simulate ahead
+        one_worker = estimate_win_tie_loss(Board([]), players, target_error=0.8, time_budget=30, seed=1)
+        three_workers = estimate_win_tie_loss(Board([]), players, target_error=0.8, time_budget=30, seed=1, workers=3)
+        self.assertEqual(one_worker, three_workers)
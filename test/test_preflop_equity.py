@@ -0,0 +1,46 @@
+import unittest
+import numpy as np
+from preflop_equity import class_combos, canonical_matchup, matchup_patterns, matchup_equity, class_equity, load_equity_table, HAND_CLASSES
+from preflop_range_calculator import generate_two_card_hands
+
+class TestClassCombos(unittest.TestCase):
+    def test_combo_counts(self):
+        self.assertEqual(len(class_combos("AA")), 6)
+        self.assertEqual(len(class_combos("AKs")), 4)
+        self.assertEqual(len(class_combos("AKo")), 12)
+        self.assertEqual(sum(len(class_combos(hand)) for hand in HAND_CLASSES), 1326)
+
+    def test_hand_class_order(self):
+        self.assertEqual(HAND_CLASSES, generate_two_card_hands())
+
+class TestMatchupPatterns(unittest.TestCase):
+    def test_canonical_matchup(self):
+        # AsKs vs QhQd is the same matchup as AhKh vs QcQs
+        self.assertEqual(canonical_matchup((51, 47), (42, 41)), canonical_matchup((50, 46), (40, 43)))
+        self.assertNotEqual(canonical_matchup((51, 47), (42, 41)), canonical_matchup((51, 47), (43, 41)))
+
+    def test_pattern_weights(self):
+        patterns = matchup_patterns("AKs", "QQ")
+        # Queens share the suit of the suited hand or not
+        self.assertEqual(len(patterns), 2)
+        self.assertEqual(sum(patterns.values()), 4 * 6)
+
+        patterns = matchup_patterns("AA", "AA")
+        self.assertEqual(len(patterns), 1)
+        self.assertEqual(sum(patterns.values()), 6)
+
+class TestEquity(unittest.TestCase):
+    def test_matchup_equity(self):
+        rng = np.random.default_rng(0)
+        self.assertAlmostEqual(matchup_equity("AA", "KK", 5000, rng), 0.82, delta=0.02)
+        self.assertAlmostEqual(matchup_equity("22", "AKo", 5000, rng), 0.53, delta=0.02)
+        # Patterns with a shared suit, rarer, are dealt as many boards as the others but count less
+        self.assertAlmostEqual(matchup_equity("AKs", "QQ", 5000, rng), 0.46, delta=0.02)
+
+    def test_table(self):
+        table = load_equity_table()
+        self.assertEqual(table.shape, (169, 169))
+        self.assertTrue(np.allclose(table + table.T, 1.0, atol=1e-6))
+        self.assertAlmostEqual(class_equity("AA", "KK"), 0.82, delta=0.01)
+        self.assertAlmostEqual(class_equity("KK", "AA"), 0.18, delta=0.01)
+        self.assertEqual(class_equity("AKs", "AKs"), 0.5)
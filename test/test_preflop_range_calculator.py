@@ -1,6 +1,9 @@
 import unittest
+import random
 from deck_of_cards import Card
-from preflop_range_calculator import convert_two_hand_string_to_list, all_two_card_hand_list, hand_strength, hand_ranks, group_pairs, group_non_pairs, group_hands, ungroup_hands
+from preflop_range_calculator import convert_two_hand_string_to_list, all_two_card_hand_list, hand_strength, hand_ranks, group_pairs, group_non_pairs, group_hands, ungroup_hands, calculate_ev, matchup_counts, ev_based_hand_ranking, calculate_top_range_str, top_range_groups, top_weighted_range, set_hand_ranks
+import preflop_range_calculator
+from preflop_equity import HAND_CLASS_INDEX
 
 class TestConvertTwoHandStringToList(unittest.TestCase):
     def test_pair(self):
@@ -35,6 +38,11 @@ class TestConvertTwoHandStringToList(unittest.TestCase):
         self.assertEqual(hand_list[1].value, 'K')
         self.assertNotEqual(hand_list[0].suit, hand_list[1].suit)
 
+    def test_seeded(self):
+        hands1 = [convert_two_hand_string_to_list("AKo", random.Random(3)) for _ in range(5)]
+        hands2 = [convert_two_hand_string_to_list("AKo", random.Random(3)) for _ in range(5)]
+        self.assertEqual(hands1, hands2)
+
 class TestTwoCardHandList(unittest.TestCase):
     def test_all_two_card_hand_list(self):
         # Get the list of all two-card hands
@@ -51,6 +59,10 @@ class TestTwoCardHandList(unittest.TestCase):
             self.assertIsInstance(hand[1], Card)
 
 class HandStrengthTest(unittest.TestCase):
+    def setUp(self):
+        # The hand_ranks dict even where an equity ranking file has been built
+        set_hand_ranks(hand_ranks)
+
     def test_hand_strength_known_hand(self):
         self.assertEqual(hand_strength('AA'), 1)
         self.assertEqual(hand_strength('AKs'), 4)
@@ -109,4 +121,61 @@ class TestUnGroupHands(unittest.TestCase):
         hand_list = ['88+', 'A9s+', 'KTs-KQs', 'QTs-QJs', 'JTs', 'AQo+', 'KQo']
         list1 = ungroup_hands(hand_list)
         expected = ['88', '99', 'TT', 'JJ', 'QQ', 'KK', 'AA', 'A9s', 'ATs', 'AJs', 'AQs', 'AKs', 'KTs', 'KJs', 'KQs', 'QTs', 'QJs', 'JTs', 'AQo', 'AKo', 'KQo']
-        self.assertEqual(list1, expected)
\ No newline at end of file
+        self.assertEqual(list1, expected)
+
+    def test_pair_range(self):
+        self.assertEqual(ungroup_hands(['22-44', '77']), ['22', '33', '44', '77'])
+        self.assertEqual(ungroup_hands(group_hands(['22', '33', '44', '77', 'KK', 'AA'])), ['KK', 'AA', '77', '22', '33', '44'])
+
+class TestCalculateTopRange(unittest.TestCase):
+    def setUp(self):
+        set_hand_ranks(hand_ranks)
+
+    def test_table(self):
+        self.assertEqual(len(preflop_range_calculator.TOP_RANGE_HANDS), 169)
+        self.assertEqual(preflop_range_calculator.TOP_RANGE_HANDS[:4], ['AA', 'KK', 'QQ', 'AKs'])
+        self.assertEqual(preflop_range_calculator.TOP_RANGE_COMBOS_BEFORE[:5], [0, 6, 12, 18, 22])
+        self.assertEqual(preflop_range_calculator.TOP_RANGE_COMBOS_BEFORE[-1], 1326 - 12) # 72o is last
+
+    def test_top_range(self):
+        self.assertEqual(calculate_top_range_str(0), ['AA'])
+        # 13 combos: AA, KK and QQ make 18, AKs is the first class with the target reached before it
+        self.assertEqual(calculate_top_range_str(1), ['AA', 'KK', 'QQ', 'AKs'])
+        self.assertEqual(len(calculate_top_range_str(100)), 169)
+        self.assertEqual(calculate_top_range_str(10)[-1], 'Q9s')
+
+    def test_groups(self):
+        self.assertEqual(top_range_groups(1), ['QQ+', 'AKs'])
+        self.assertEqual(top_range_groups(150), top_range_groups(100))
+        self.assertEqual(top_range_groups(-5), ['AA'])
+        groups = top_range_groups(20)
+        groups.append('72o')
+        self.assertEqual(top_range_groups(20), group_hands(calculate_top_range_str(20)))
+
+    def test_weighted(self):
+        # 13.26 combos: AA and KK, then QQ at the 1.26 of its 6 combos still needed
+        top_range = top_weighted_range(1)
+        self.assertEqual(str(top_range), "KK+, QQ:0.21")
+        self.assertAlmostEqual(top_range.combos(), 13.26)
+        self.assertAlmostEqual(top_weighted_range(37.5).combos(), 1326 * 0.375)
+        self.assertEqual(top_weighted_range(100).combos(), 1326)
+        self.assertEqual(top_weighted_range(0).combos(), 0)
+
+class TestCalculateEv(unittest.TestCase):
+    def test_calculate_ev(self):
+        self.assertAlmostEqual(calculate_ev("AA", ["KK"]), 0.82, delta=0.01)
+        # 6 x 6 combo pairs of KK to 6 x 12 of 72o
+        self.assertAlmostEqual(calculate_ev("AA", ["KK", "72o"]), (0.82 * 36 + 0.88 * 72) / 108, delta=0.01)
+
+    def test_matchup_counts(self):
+        counts = matchup_counts()
+        self.assertEqual(counts[HAND_CLASS_INDEX["AA"], HAND_CLASS_INDEX["KK"]], 36)
+        self.assertEqual(counts[HAND_CLASS_INDEX["AA"], HAND_CLASS_INDEX["AA"]], 6)
+        self.assertEqual(counts[HAND_CLASS_INDEX["AKs"], HAND_CLASS_INDEX["AKo"]], 4 * 6)
+        self.assertEqual(counts.sum(), 1326 * 1225)
+
+    def test_ev_based_hand_ranking(self):
+        ranking = ev_based_hand_ranking()
+        self.assertEqual(len(ranking), 169)
+        self.assertEqual(ranking[:3], ['AA', 'KK', 'QQ'])
+        self.assertEqual(ranking[-1], '32o')
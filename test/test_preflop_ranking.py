@@ -0,0 +1,71 @@
+import unittest
+import json
+import os
+import tempfile
+from preflop_equity import HAND_CLASSES
+from preflop_ranking import RANKING_VERSION, simulated_class_equity, load_hand_ranks, rank_hand_classes, save_ranking
+from preflop_range_calculator import calculate_top_range_str, hand_ranks, hand_strength, set_hand_ranks
+
+class TestClassEquity(unittest.TestCase):
+    def test_random_opponent(self):
+        self.assertAlmostEqual(simulated_class_equity("AA", trials=20000), 85.2, delta=1.0)
+        self.assertAlmostEqual(simulated_class_equity("72o", trials=20000), 34.6, delta=1.0)
+
+    def test_opponents(self):
+        self.assertAlmostEqual(simulated_class_equity("AA", opponents=3, trials=10000), 64.0, delta=1.5)
+        self.assertAlmostEqual(simulated_class_equity("AA", opponent_range="KK", trials=10000), 82.0, delta=1.5)
+
+    def test_seeded(self):
+        self.assertEqual(simulated_class_equity("KQs", trials=2000, seed=4), simulated_class_equity("KQs", trials=2000, seed=4))
+
+class TestRankHandClasses(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "ranking.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_resume(self):
+        # An interrupted run with every class but AA and 72o done
+        config = {"opponents": 1, "opponent_range": None, "trials": 500, "seed": 0}
+        equities = {hand_class: 50.0 for hand_class in HAND_CLASSES if hand_class not in ("AA", "72o")}
+        save_ranking(self.path, config, equities)
+        self.assertIsNone(load_hand_ranks(self.path))
+
+        ranking = rank_hand_classes(trials=500, path=self.path)
+        self.assertEqual(ranking[0], "AA")
+        self.assertEqual(ranking[-1], "72o")
+        with open(self.path) as f:
+            saved = json.load(f)
+        self.assertEqual(saved["version"], RANKING_VERSION)
+        self.assertEqual(saved["ranking"], ranking)
+        self.assertEqual(saved["equities"]["KK"], 50.0) # Kept from the first run
+        self.assertEqual(saved["equities"]["AA"], simulated_class_equity("AA", trials=500))
+
+        ranks = load_hand_ranks(self.path)
+        self.assertEqual(ranks["AA"], 1)
+        self.assertEqual(sorted(ranks.values()), list(range(1, 170)))
+
+    def test_other_config(self):
+        save_ranking(self.path, {"opponents": 2, "opponent_range": None, "trials": 500, "seed": 0}, {"AA": 70.0})
+        with self.assertRaises(ValueError):
+            rank_hand_classes(trials=500, path=self.path)
+
+    def test_missing(self):
+        self.assertIsNone(load_hand_ranks(self.path))
+
+class TestSetHandRanks(unittest.TestCase):
+    def tearDown(self):
+        set_hand_ranks(hand_ranks)
+
+    def test_ranking(self):
+        # Pairs first, then every other class in HAND_CLASSES order
+        pairs = [hand_class for hand_class in HAND_CLASSES if len(hand_class) == 2]
+        ranking = pairs + [hand_class for hand_class in HAND_CLASSES if len(hand_class) == 3]
+        set_hand_ranks({hand_class: i + 1 for i, hand_class in enumerate(ranking)})
+        self.assertEqual(hand_strength("22"), 13)
+        self.assertEqual(calculate_top_range_str(5), pairs[:12])
+
+if __name__ == '__main__':
+    unittest.main()
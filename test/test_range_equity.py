@@ -0,0 +1,78 @@
+import unittest
+from unittest import mock
+import numpy as np
+import range_equity
+from deck_of_cards import Card, Board
+from evaluate_poker_hand import evaluate_ints
+from range_equity import range_combos, range_vs_range_equity, runout_strengths, RunoutCache, COMBOS
+
+class TestRangeCombos(unittest.TestCase):
+    def test_expand(self):
+        self.assertEqual(len(range_combos(["AA"])), 6)
+        self.assertEqual(len(range_combos(["KTs+"])), 12)
+        self.assertEqual(len(range_combos(["22-44", "AKo"])), 18 + 12)
+
+    def test_dead_cards(self):
+        ace_of_spades = 51
+        combos = range_combos(["AA", "AKs"], 1 << ace_of_spades)
+        self.assertEqual(len(combos), 3 + 3)
+        for i in combos:
+            self.assertNotIn(ace_of_spades, COMBOS[i])
+
+    def test_weights(self):
+        combos = range_combos(["AA", "AKo:0.5", "AsQs"])
+        self.assertEqual(len(combos), 6 + 12 + 1)
+        self.assertEqual(sum(combos.values()), 6 + 6 + 1)
+
+class TestRangeVsRangeEquity(unittest.TestCase):
+    def test_preflop(self):
+        win, tie, loss = range_vs_range_equity(["AA"], ["KK"], n=5000, seed=3)
+        self.assertAlmostEqual(win, 82.0, delta=1.5)
+        self.assertAlmostEqual(win + tie + loss, 100.0, delta=0.02)
+
+    def test_river(self):
+        board = Board([Card("2", "Club"), Card("3", "Diamond"), Card("7", "Heart"), Card("9", "Spade"), Card("T", "Club")])
+        self.assertEqual(range_vs_range_equity(["AA"], ["KK"], board), (100.0, 0.0, 0.0))
+        self.assertEqual(range_vs_range_equity(["AKs"], ["AKo"], board), (0.0, 100.0, 0.0))
+
+    def test_symmetry(self):
+        board = Board([Card("J", "Spade"), Card("4", "Club"), Card("2", "Diamond")])
+        win, tie, loss = range_vs_range_equity(["TT+", "AQs+"], ["JTs", "QJs", "KJs", "AJo+"], board)
+        opponent_win, opponent_tie, opponent_loss = range_vs_range_equity(["JTs", "QJs", "KJs", "AJo+"], ["TT+", "AQs+"], board)
+        self.assertAlmostEqual(win, opponent_loss, delta=0.02)
+        self.assertAlmostEqual(tie, opponent_tie, delta=0.02)
+
+    def test_shared_runouts_cached(self):
+        board = Board([Card("J", "Spade"), Card("4", "Club"), Card("2", "Diamond"), Card("9", "Heart")])
+        range_vs_range_equity(["QQ"], ["AKs"], board)
+        runouts = runout_strengths(tuple(board.board_ints()), 0, 2000, None)
+        cached = len(runouts.columns)
+        range_vs_range_equity(["QQ"], ["AKo"], board)
+        self.assertEqual(len(runouts.columns), cached + 12)
+
+    def test_blocked_ranges(self):
+        dead_cards = [Card("A", "Spade"), Card("A", "Heart")]
+        self.assertRaises(ValueError, range_vs_range_equity, ["AA"], ["AA"], None, dead_cards)
+
+class TestRunoutCache(unittest.TestCase):
+    def test_strengths_in_blocks(self):
+        board_ints = (36, 9, 50)
+        # Combos clear of the board, the callers drop the others
+        combos = np.array([0, 101, 700, 1324], dtype=np.int64)
+        with mock.patch.object(range_equity, "EVALUATE_BATCH", 1000):
+            strengths = RunoutCache().get(board_ints).strengths(combos)
+        runouts = RunoutCache().get(board_ints)
+        for column, i in enumerate(combos.tolist()):
+            for row in (0, 500, len(runouts.boards) - 1):
+                board = runouts.boards[row].tolist()
+                expected = -1 if set(COMBOS[i]) & set(board) else evaluate_ints(list(COMBOS[i]) + board)
+                self.assertEqual(strengths[row, column], expected)
+
+    def test_bounded_by_bytes(self):
+        cache = RunoutCache(max_bytes=15000)
+        combos = np.arange(20, dtype=np.int64)
+        for turn in (2, 3, 4):
+            cache.get((36, 9, 50, turn)).strengths(combos)
+        cache.get((36, 9, 50, 5))
+        self.assertLess(cache.stats()["size"], 4)
+        self.assertLessEqual(cache.stats()["bytes"], 15000)